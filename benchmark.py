@@ -0,0 +1,133 @@
+# MIT License
+#
+# Copyright (c) 2018 Evgeny Medvedev, evge.medvedev@gmail.com
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+
+
+import argparse
+import logging
+
+from benchmarks.corpus import generate_corpus, load_corpus, record_corpus, save_corpus
+from benchmarks.runner import compare_to_baseline, format_results_table, read_baseline, run_benchmarks, \
+    write_baseline
+from benchmarks.scenarios import DEFAULT_SCENARIOS, SCENARIOS
+from ethereumetl.logging_utils import logging_basic_config
+from ethereumetl.providers.auto import get_provider_from_uri
+
+parser = argparse.ArgumentParser(
+    description='Benchmark export jobs by replaying an RPC corpus through a local node. '
+                'Reports blocks/sec, rows/sec, peak RSS and CPU time for each job and exporter combination.')
+parser.add_argument('-c', '--corpus', default=None, type=str,
+                    help='The corpus file, JSON lines with a block and its receipts per line. '
+                         'If not provided a synthetic corpus is generated.')
+parser.add_argument('--blocks', default=1000, type=int, help='The number of blocks in a generated corpus.')
+parser.add_argument('--transactions-per-block', default=150, type=int,
+                    help='The mean number of transactions per block in a generated corpus.')
+parser.add_argument('--logs-per-transaction', default=1.5, type=float,
+                    help='The mean number of logs per transaction in a generated corpus.')
+parser.add_argument('--seed', default=0, type=int,
+                    help='The seed for the generated corpus and the latency jitter.')
+parser.add_argument('--record-from', default=None, type=str,
+                    help='The URI of a web3 provider to record the corpus from, between --start-block and '
+                         '--end-block. The corpus is written to --corpus and no benchmarks are run.')
+parser.add_argument('-s', '--start-block', default=None, type=int, help='Start block for recording.')
+parser.add_argument('-e', '--end-block', default=None, type=int, help='End block for recording.')
+parser.add_argument('--scenarios', default=','.join(DEFAULT_SCENARIOS), type=str,
+                    help='Comma separated scenarios to run. Available: ' + ', '.join(sorted(SCENARIOS)))
+parser.add_argument('--latency', default=0.0, type=float, help='The simulated node latency per request in seconds.')
+parser.add_argument('--jitter', default=0.0, type=float,
+                    help='The maximum random deviation from --latency per request in seconds.')
+parser.add_argument('-b', '--batch-size', default=100, type=int, help='The number of items to request in a batch.')
+parser.add_argument('-w', '--max-workers', default=5, type=int, help='The maximum number of workers.')
+parser.add_argument('-r', '--repeat', default=3, type=int,
+                    help='The number of runs per scenario. The median run is reported.')
+parser.add_argument('--baseline', default=None, type=str,
+                    help='The baseline file to compare results against. Exits with status 1 if any scenario '
+                         'is worse than the baseline by more than --tolerance.')
+parser.add_argument('--tolerance', default=0.1, type=float,
+                    help='The allowed regression compared to the baseline, as a fraction.')
+parser.add_argument('--save-baseline', default=None, type=str, help='The file to save results to as a baseline.')
+
+
+def main(args):
+    if args.record_from is not None:
+        if args.corpus is None or args.start_block is None or args.end_block is None:
+            raise ValueError('--corpus, --start-block and --end-block are required with --record-from')
+        corpus = record_corpus(
+            get_provider_from_uri(args.record_from, batch=True), args.start_block, args.end_block, args.batch_size)
+        save_corpus(corpus, args.corpus)
+        return 0
+
+    if args.corpus is not None:
+        corpus = load_corpus(args.corpus)
+    else:
+        corpus = generate_corpus(
+            block_count=args.blocks,
+            transactions_per_block=args.transactions_per_block,
+            logs_per_transaction=args.logs_per_transaction,
+            seed=args.seed)
+    logging.info('Corpus has {} blocks, {} transactions and {} logs'.format(
+        len(corpus.blocks), corpus.transaction_count(), corpus.log_count()))
+
+    results = run_benchmarks(
+        corpus,
+        scenario_names=[scenario.strip() for scenario in args.scenarios.split(',') if scenario.strip()],
+        latency_seconds=args.latency,
+        jitter_seconds=args.jitter,
+        batch_size=args.batch_size,
+        max_workers=args.max_workers,
+        repeat=args.repeat,
+        seed=args.seed)
+
+    parameters = {
+        'corpus': args.corpus,
+        'blocks': len(corpus.blocks),
+        'transactions': corpus.transaction_count(),
+        'logs': corpus.log_count(),
+        'latency': args.latency,
+        'jitter': args.jitter,
+        'batch_size': args.batch_size,
+        'max_workers': args.max_workers,
+    }
+
+    baseline = read_baseline(args.baseline) if args.baseline is not None else None
+    if baseline is not None and baseline.get('parameters') != parameters:
+        logging.warning('Baseline parameters {} differ from {}, results are not comparable'.format(
+            baseline.get('parameters'), parameters))
+
+    print(format_results_table(results, baseline['results'] if baseline is not None else None))
+
+    if args.save_baseline is not None:
+        write_baseline(args.save_baseline, parameters, results)
+
+    if baseline is not None:
+        regressions = compare_to_baseline(results, baseline['results'], args.tolerance)
+        for regression in regressions:
+            logging.error('Regression: ' + regression)
+        if regressions:
+            return 1
+    return 0
+
+
+# Scenarios run in spawned processes which import this module again, so nothing may run on import
+if __name__ == '__main__':
+    logging_basic_config()
+    exit(main(parser.parse_args()))
@@ -0,0 +1,226 @@
+# MIT License
+#
+# Copyright (c) 2018 Evgeny Medvedev, evge.medvedev@gmail.com
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+
+
+import hashlib
+import json
+import random
+
+from ethereumetl.file_utils import smart_open
+from ethereumetl.json_rpc_requests import generate_get_block_by_number_json_rpc, generate_get_receipt_json_rpc
+from ethereumetl.service.token_transfer_extractor import TRANSFER_EVENT_TOPIC
+from ethereumetl.utils import hex_to_dec, rpc_response_batch_to_results, split_to_batches
+
+ZERO_BLOOM = '0x' + '0' * 512
+
+
+# Blocks with transactions and their receipts, as returned by the node.
+# A corpus is stored as JSON lines, one line per block: {"block": {...}, "receipts": [...]}.
+class Corpus(object):
+    def __init__(self):
+        self.blocks = {}
+        self.receipts = {}
+        self.block_receipts = {}
+
+    def add_block(self, block, receipts):
+        block_number = hex_to_dec(block['number'])
+        self.blocks[block_number] = block
+        self.block_receipts[block_number] = receipts
+        for receipt in receipts:
+            self.receipts[receipt['transactionHash']] = receipt
+
+    def get_block(self, block_number, include_transactions):
+        block = self.blocks.get(block_number)
+        if block is None or include_transactions:
+            return block
+        return dict(block, transactions=[tx['hash'] for tx in block['transactions']])
+
+    def get_receipt(self, transaction_hash):
+        return self.receipts.get(transaction_hash)
+
+    def get_block_receipts(self, block_number):
+        return self.block_receipts.get(block_number)
+
+    @property
+    def start_block(self):
+        return min(self.blocks)
+
+    @property
+    def end_block(self):
+        return max(self.blocks)
+
+    def transaction_count(self):
+        return len(self.receipts)
+
+    def log_count(self):
+        return sum(len(receipt['logs']) for receipt in self.receipts.values())
+
+
+def save_corpus(corpus, path):
+    with smart_open(path, 'w') as corpus_file:
+        for block_number in sorted(corpus.blocks):
+            corpus_file.write(json.dumps({
+                'block': corpus.blocks[block_number],
+                'receipts': corpus.block_receipts[block_number]
+            }) + '\n')
+
+
+def load_corpus(path):
+    corpus = Corpus()
+    with smart_open(path, 'r') as corpus_file:
+        for line in corpus_file:
+            if line.strip():
+                entry = json.loads(line)
+                corpus.add_block(entry['block'], entry['receipts'])
+    return corpus
+
+
+def record_corpus(batch_web3_provider, start_block, end_block, batch_size=100):
+    """Fetches blocks with transactions and receipts from a node"""
+    corpus = Corpus()
+    for batch_start, batch_end in split_to_batches(start_block, end_block, batch_size):
+        blocks_rpc = list(generate_get_block_by_number_json_rpc(range(batch_start, batch_end + 1), True))
+        blocks = list(rpc_response_batch_to_results(batch_web3_provider.make_request(json.dumps(blocks_rpc))))
+        transaction_hashes = [tx['hash'] for block in blocks for tx in block['transactions']]
+        receipts = {}
+        for hashes_start, hashes_end in split_to_batches(0, len(transaction_hashes) - 1, batch_size):
+            receipts_rpc = list(generate_get_receipt_json_rpc(transaction_hashes[hashes_start:hashes_end + 1]))
+            response = batch_web3_provider.make_request(json.dumps(receipts_rpc))
+            for receipt in rpc_response_batch_to_results(response):
+                receipts[receipt['transactionHash']] = receipt
+        for block in blocks:
+            corpus.add_block(block, [receipts[tx['hash']] for tx in block['transactions']])
+    return corpus
+
+
+def generate_corpus(start_block=5000000, block_count=1000, transactions_per_block=150, logs_per_transaction=1.5,
+                    seed=0):
+    """Generates a corpus with mainnet-like density. The same arguments always give the same corpus"""
+    rng = random.Random(seed)
+    corpus = Corpus()
+    addresses = [_hex_bytes(rng, 20) for _ in range(1000)]
+    token_addresses = addresses[:50]
+    parent_hash = _hex_bytes(rng, 32)
+    for block_number in range(start_block, start_block + block_count):
+        block_hash = _hash('block', seed, block_number)
+        transaction_count = max(0, int(rng.gauss(transactions_per_block, transactions_per_block / 4)))
+        transactions = []
+        receipts = []
+        log_index = 0
+        cumulative_gas_used = 0
+        for transaction_index in range(transaction_count):
+            transaction_hash = _hash('transaction', seed, block_number, transaction_index)
+            from_address = rng.choice(addresses)
+            to_address = rng.choice(addresses)
+            input_data = '0x' if rng.random() < 0.4 else '0xa9059cbb' + _hex_bytes(rng, 64)[2:]
+            transactions.append({
+                'blockHash': block_hash,
+                'blockNumber': hex(block_number),
+                'from': from_address,
+                'gas': hex(rng.randint(21000, 500000)),
+                'gasPrice': hex(rng.randint(10 ** 9, 10 ** 11)),
+                'hash': transaction_hash,
+                'input': input_data,
+                'nonce': hex(rng.randint(0, 10000)),
+                'to': to_address,
+                'transactionIndex': hex(transaction_index),
+                'value': hex(rng.randint(0, 10 ** 19)),
+                'v': '0x1b',
+                'r': _hex_bytes(rng, 32),
+                's': _hex_bytes(rng, 32),
+            })
+            logs = []
+            for _ in range(_poisson(rng, logs_per_transaction)):
+                logs.append({
+                    'address': rng.choice(token_addresses),
+                    'blockHash': block_hash,
+                    'blockNumber': hex(block_number),
+                    'data': '0x' + '{:064x}'.format(rng.randint(0, 10 ** 24)),
+                    'logIndex': hex(log_index),
+                    'removed': False,
+                    'topics': [
+                        TRANSFER_EVENT_TOPIC,
+                        '0x' + '0' * 24 + rng.choice(addresses)[2:],
+                        '0x' + '0' * 24 + rng.choice(addresses)[2:],
+                    ],
+                    'transactionHash': transaction_hash,
+                    'transactionIndex': hex(transaction_index),
+                })
+                log_index += 1
+            gas_used = rng.randint(21000, 200000)
+            cumulative_gas_used += gas_used
+            receipts.append({
+                'blockHash': block_hash,
+                'blockNumber': hex(block_number),
+                'contractAddress': rng.choice(addresses) if rng.random() < 0.01 else None,
+                'cumulativeGasUsed': hex(cumulative_gas_used),
+                'gasUsed': hex(gas_used),
+                'logs': logs,
+                'logsBloom': ZERO_BLOOM,
+                'status': '0x1',
+                'transactionHash': transaction_hash,
+                'transactionIndex': hex(transaction_index),
+            })
+        corpus.add_block({
+            'difficulty': hex(rng.randint(10 ** 15, 10 ** 16)),
+            'extraData': _hex_bytes(rng, 16),
+            'gasLimit': hex(8000000),
+            'gasUsed': hex(cumulative_gas_used),
+            'hash': block_hash,
+            'logsBloom': ZERO_BLOOM,
+            'miner': rng.choice(addresses),
+            'mixHash': _hex_bytes(rng, 32),
+            'nonce': _hex_bytes(rng, 8),
+            'number': hex(block_number),
+            'parentHash': parent_hash,
+            'receiptsRoot': _hex_bytes(rng, 32),
+            'sha3Uncles': _hex_bytes(rng, 32),
+            'size': hex(rng.randint(1000, 50000)),
+            'stateRoot': _hex_bytes(rng, 32),
+            'timestamp': hex(1500000000 + block_number * 15),
+            'totalDifficulty': hex(block_number * 10 ** 15),
+            'transactions': transactions,
+            'transactionsRoot': _hex_bytes(rng, 32),
+            'uncles': [],
+        }, receipts)
+        parent_hash = block_hash
+    return corpus
+
+
+def _hash(*parts):
+    return '0x' + hashlib.sha256(':'.join(str(part) for part in parts).encode('utf-8')).hexdigest()
+
+
+def _hex_bytes(rng, length):
+    return '0x' + '{:0{}x}'.format(rng.getrandbits(length * 8), length * 2)
+
+
+def _poisson(rng, mean):
+    # Knuth's algorithm, good enough for small means
+    limit = pow(2.718281828459045, -mean)
+    count = 0
+    product = rng.random()
+    while product > limit:
+        count += 1
+        product *= rng.random()
+    return count
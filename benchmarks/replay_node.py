@@ -0,0 +1,141 @@
+# MIT License
+#
+# Copyright (c) 2018 Evgeny Medvedev, evge.medvedev@gmail.com
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+
+
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from socketserver import ThreadingMixIn
+
+from ethereumetl.utils import hex_to_dec
+
+
+# Answers JSON-RPC requests from a recorded corpus, simulating the latency of a remote node
+class ReplayNode(object):
+    def __init__(self, corpus, latency_seconds=0.0, jitter_seconds=0.0, seed=0):
+        self.corpus = corpus
+        self.latency_seconds = latency_seconds
+        self.jitter_seconds = jitter_seconds
+        self._random = random.Random(seed)
+        self._random_lock = threading.Lock()
+        self.request_count = 0
+
+    def handle(self, request):
+        self._sleep()
+        if isinstance(request, list):
+            return [self._handle_single(req) for req in request]
+        return self._handle_single(request)
+
+    def make_request(self, text):
+        """Same interface as BatchHTTPProvider, replays without going through HTTP"""
+        return self.handle(json.loads(text))
+
+    def _handle_single(self, req):
+        self.request_count += 1
+        method = req.get('method')
+        params = req.get('params', [])
+        if method == 'eth_getBlockByNumber':
+            result = self.corpus.get_block(self._block_number(params[0]), params[1])
+        elif method == 'eth_getTransactionReceipt':
+            result = self.corpus.get_receipt(params[0])
+        elif method in ('eth_getBlockReceipts', 'parity_getBlockReceipts'):
+            result = self.corpus.get_block_receipts(self._block_number(params[0]))
+        elif method == 'eth_blockNumber':
+            result = hex(self.corpus.end_block)
+        else:
+            return {'jsonrpc': '2.0', 'id': req.get('id'),
+                    'error': {'code': -32601, 'message': 'Method {} not supported'.format(method)}}
+        return {'jsonrpc': '2.0', 'id': req.get('id'), 'result': result}
+
+    def _block_number(self, block):
+        if block == 'latest':
+            return self.corpus.end_block
+        if block == 'earliest':
+            return self.corpus.start_block
+        return hex_to_dec(block)
+
+    def _sleep(self):
+        if self.latency_seconds <= 0 and self.jitter_seconds <= 0:
+            return
+        with self._random_lock:
+            jitter = self._random.uniform(-self.jitter_seconds, self.jitter_seconds)
+        delay = self.latency_seconds + jitter
+        if delay > 0:
+            time.sleep(delay)
+
+
+class _ThreadingHTTPServer(ThreadingMixIn, HTTPServer):
+    daemon_threads = True
+
+
+# Serves a ReplayNode over HTTP so that the real BatchHTTPProvider is exercised
+class ReplayNodeServer(object):
+    def __init__(self, replay_node, host='127.0.0.1', port=0):
+        self.replay_node = replay_node
+        self._server = _ThreadingHTTPServer((host, port), _build_handler(replay_node))
+        self._thread = None
+
+    @property
+    def uri(self):
+        host, port = self._server.server_address[:2]
+        return 'http://{}:{}'.format(host, port)
+
+    def start(self):
+        self._thread = threading.Thread(target=self._server.serve_forever, name='replay-node')
+        self._thread.daemon = True
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+        if self._thread is not None:
+            self._thread.join()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.stop()
+
+
+def _build_handler(replay_node):
+    class ReplayRequestHandler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+
+        def do_POST(self):
+            content_length = int(self.headers.get('Content-Length', 0))
+            request = json.loads(self.rfile.read(content_length).decode('utf-8'))
+            body = json.dumps(replay_node.handle(request)).encode('utf-8')
+            self.send_response(200)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    return ReplayRequestHandler
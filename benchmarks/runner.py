@@ -0,0 +1,198 @@
+# MIT License
+#
+# Copyright (c) 2018 Evgeny Medvedev, evge.medvedev@gmail.com
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+
+
+import json
+import logging
+import multiprocessing
+import os
+import resource
+import shutil
+import sys
+import tempfile
+import time
+
+from benchmarks.replay_node import ReplayNode, ReplayNodeServer
+from benchmarks.scenarios import SCENARIOS, TRANSACTION_HASHES_FILE, ScenarioContext, count_output_rows
+from ethereumetl.file_utils import smart_open
+from ethereumetl.providers.rpc import BatchHTTPProvider
+
+# Higher is better for throughput metrics, lower is better for cost metrics
+THROUGHPUT_METRICS = ['blocks_per_second', 'rows_per_second']
+COST_METRICS = ['peak_rss_mb', 'cpu_seconds']
+
+logger = logging.getLogger('benchmark')
+
+
+def run_benchmarks(corpus, scenario_names, latency_seconds=0.0, jitter_seconds=0.0, batch_size=100, max_workers=5,
+                   repeat=1, seed=0, in_process=False):
+    """Replays the corpus through a local node for each scenario and returns the measurements by scenario name.
+    Unless in_process is True every run happens in a fresh process, so that peak RSS and CPU time are per run"""
+    for scenario_name in scenario_names:
+        if scenario_name not in SCENARIOS:
+            raise ValueError('Unknown scenario {}. Available scenarios: {}'.format(
+                scenario_name, ', '.join(sorted(SCENARIOS))))
+
+    work_dir = tempfile.mkdtemp(prefix='ethereumetl-benchmark-')
+    try:
+        input_dir = os.path.join(work_dir, 'input')
+        os.makedirs(input_dir)
+        with smart_open(os.path.join(input_dir, TRANSACTION_HASHES_FILE), 'w') as transaction_hashes_file:
+            for block_number in sorted(corpus.blocks):
+                for transaction in corpus.blocks[block_number]['transactions']:
+                    transaction_hashes_file.write(transaction['hash'] + '\n')
+
+        replay_node = ReplayNode(corpus, latency_seconds=latency_seconds, jitter_seconds=jitter_seconds, seed=seed)
+        results = {}
+        with ReplayNodeServer(replay_node) as server:
+            for scenario_name in scenario_names:
+                runs = []
+                for run_index in range(repeat):
+                    output_dir = os.path.join(work_dir, 'output', scenario_name, str(run_index))
+                    os.makedirs(output_dir)
+                    args = (scenario_name, server.uri, corpus.start_block, corpus.end_block, batch_size, max_workers,
+                            input_dir, output_dir)
+                    run = run_scenario(*args) if in_process else _run_in_subprocess(args)
+                    logger.info('Scenario {} run {} finished in {:.2f} seconds'.format(
+                        scenario_name, run_index + 1, run['wall_seconds']))
+                    runs.append(run)
+                results[scenario_name] = _summarize(runs, corpus.end_block - corpus.start_block + 1)
+        return results
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+
+def run_scenario(scenario_name, provider_uri, start_block, end_block, batch_size, max_workers, input_dir, output_dir):
+    context = ScenarioContext(
+        batch_web3_provider=BatchHTTPProvider(provider_uri, request_kwargs={'timeout': 60}),
+        start_block=start_block,
+        end_block=end_block,
+        batch_size=batch_size,
+        max_workers=max_workers,
+        input_dir=input_dir,
+        output_dir=output_dir)
+
+    usage_before = resource.getrusage(resource.RUSAGE_SELF)
+    start_time = time.perf_counter()
+    SCENARIOS[scenario_name](context)
+    wall_seconds = time.perf_counter() - start_time
+    usage_after = resource.getrusage(resource.RUSAGE_SELF)
+
+    return {
+        'wall_seconds': wall_seconds,
+        'cpu_seconds': (usage_after.ru_utime - usage_before.ru_utime) + (usage_after.ru_stime - usage_before.ru_stime),
+        'peak_rss_mb': _max_rss_to_mb(usage_after.ru_maxrss),
+        'row_count': count_output_rows(output_dir),
+    }
+
+
+def _run_in_subprocess(args):
+    # spawn gives every run a fresh interpreter, fork would inherit the memory of the corpus
+    mp_context = multiprocessing.get_context('spawn')
+    queue = mp_context.Queue()
+    process = mp_context.Process(target=_subprocess_main, args=(args, queue))
+    process.start()
+    status, value = queue.get()
+    process.join()
+    if status == 'error':
+        raise RuntimeError('Scenario {} failed: {}'.format(args[0], value))
+    return value
+
+
+def _subprocess_main(args, queue):
+    try:
+        queue.put(('ok', run_scenario(*args)))
+    except Exception as e:
+        queue.put(('error', repr(e)))
+
+
+def _summarize(runs, block_count):
+    # The median run is reported, it is less sensitive to outliers than the mean
+    runs = sorted(runs, key=lambda run: run['wall_seconds'])
+    median_run = runs[len(runs) // 2]
+    wall_seconds = median_run['wall_seconds']
+    return {
+        'wall_seconds': round(wall_seconds, 3),
+        'blocks_per_second': round(block_count / wall_seconds, 2) if wall_seconds > 0 else None,
+        'rows_per_second': round(median_run['row_count'] / wall_seconds, 2) if wall_seconds > 0 else None,
+        'row_count': median_run['row_count'],
+        'peak_rss_mb': round(max(run['peak_rss_mb'] for run in runs), 1),
+        'cpu_seconds': round(median_run['cpu_seconds'], 3),
+    }
+
+
+def _max_rss_to_mb(max_rss):
+    # ru_maxrss is in kilobytes on Linux and in bytes on macOS
+    if sys.platform == 'darwin':
+        return max_rss / (1024.0 * 1024.0)
+    return max_rss / 1024.0
+
+
+def compare_to_baseline(results, baseline_results, tolerance):
+    """Returns descriptions of metrics that are worse than the baseline by more than tolerance, a fraction"""
+    regressions = []
+    for scenario_name, result in sorted(results.items()):
+        baseline_result = baseline_results.get(scenario_name)
+        if baseline_result is None:
+            continue
+        for metric in THROUGHPUT_METRICS + COST_METRICS:
+            value = result.get(metric)
+            baseline_value = baseline_result.get(metric)
+            if value is None or not baseline_value:
+                continue
+            change = (value - baseline_value) / float(baseline_value)
+            if metric in THROUGHPUT_METRICS:
+                change = -change
+            if change > tolerance:
+                regressions.append('{} {}: {} vs baseline {} ({:+.1%})'.format(
+                    scenario_name, metric, value, baseline_value, change if metric in COST_METRICS else -change))
+    return regressions
+
+
+def format_results_table(results, baseline_results=None):
+    columns = ['scenario', 'wall_seconds', 'blocks_per_second', 'rows_per_second', 'peak_rss_mb', 'cpu_seconds']
+    rows = [columns]
+    for scenario_name, result in sorted(results.items()):
+        row = [scenario_name]
+        for column in columns[1:]:
+            cell = str(result.get(column))
+            baseline_value = (baseline_results or {}).get(scenario_name, {}).get(column)
+            if baseline_value and result.get(column) is not None:
+                cell += ' ({:+.1%})'.format((result[column] - baseline_value) / float(baseline_value))
+            row.append(cell)
+        rows.append(row)
+    widths = [max(len(row[index]) for row in rows) for index in range(len(columns))]
+    return '\n'.join(
+        '  '.join(cell.ljust(width) if index == 0 else cell.rjust(width)
+                  for index, (cell, width) in enumerate(zip(row, widths)))
+        for row in rows)
+
+
+def read_baseline(path):
+    with smart_open(path, 'r') as baseline_file:
+        return json.load(baseline_file)
+
+
+def write_baseline(path, parameters, results):
+    with smart_open(path, 'w') as baseline_file:
+        json.dump({'parameters': parameters, 'results': results}, baseline_file, indent=2, sort_keys=True)
@@ -0,0 +1,142 @@
+# MIT License
+#
+# Copyright (c) 2018 Evgeny Medvedev, evge.medvedev@gmail.com
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+
+
+import os
+
+from ethereumetl.file_utils import smart_open
+from ethereumetl.jobs.export_blocks_and_receipts_job import ExportBlocksAndReceiptsJob
+from ethereumetl.jobs.export_blocks_job import ExportBlocksJob
+from ethereumetl.jobs.export_receipts_job import ExportReceiptsJob
+from ethereumetl.jobs.exporters.blocks_and_receipts_item_exporter import blocks_and_receipts_item_exporter
+from ethereumetl.jobs.exporters.blocks_and_transactions_item_exporter import blocks_and_transactions_item_exporter
+from ethereumetl.jobs.exporters.receipts_and_logs_item_exporter import receipts_and_logs_item_exporter
+
+TRANSACTION_HASHES_FILE = 'transaction_hashes.txt'
+
+
+# Each scenario runs one job with one exporter combination and writes its outputs to output_dir
+def export_blocks_scenario(file_format):
+    def run(context):
+        job = ExportBlocksJob(
+            start_block=context.start_block,
+            end_block=context.end_block,
+            batch_size=context.batch_size,
+            batch_web3_provider=context.batch_web3_provider,
+            max_workers=context.max_workers,
+            item_exporter=blocks_and_transactions_item_exporter(
+                context.output_path('blocks', file_format), context.output_path('transactions', file_format)))
+        job.run()
+
+    return run
+
+
+def export_receipts_scenario(file_format):
+    def run(context):
+        with smart_open(os.path.join(context.input_dir, TRANSACTION_HASHES_FILE), 'r') as transaction_hashes:
+            job = ExportReceiptsJob(
+                transaction_hashes_iterable=(transaction_hash.strip() for transaction_hash in transaction_hashes),
+                batch_size=context.batch_size,
+                batch_web3_provider=context.batch_web3_provider,
+                max_workers=context.max_workers,
+                item_exporter=receipts_and_logs_item_exporter(
+                    context.output_path('receipts', file_format), context.output_path('logs', file_format)))
+            job.run()
+
+    return run
+
+
+def export_block_receipts_scenario(file_format):
+    def run(context):
+        job = ExportReceiptsJob(
+            transaction_hashes_iterable=None,
+            block_numbers_iterable=range(context.start_block, context.end_block + 1),
+            block_receipts_method='eth_getBlockReceipts',
+            batch_size=context.batch_size,
+            batch_web3_provider=context.batch_web3_provider,
+            max_workers=context.max_workers,
+            item_exporter=receipts_and_logs_item_exporter(
+                context.output_path('receipts', file_format), context.output_path('logs', file_format)))
+        job.run()
+
+    return run
+
+
+def export_single_pass_scenario(file_format, block_receipts_method=None):
+    def run(context):
+        job = ExportBlocksAndReceiptsJob(
+            start_block=context.start_block,
+            end_block=context.end_block,
+            batch_size=context.batch_size,
+            batch_web3_provider=context.batch_web3_provider,
+            max_workers=context.max_workers,
+            item_exporter=blocks_and_receipts_item_exporter(
+                context.output_path('blocks', file_format),
+                context.output_path('transactions', file_format),
+                context.output_path('receipts', file_format),
+                context.output_path('logs', file_format),
+                context.output_path('token_transfers', file_format)),
+            block_receipts_method=block_receipts_method)
+        job.run()
+
+    return run
+
+
+SCENARIOS = {
+    'blocks_csv': export_blocks_scenario('csv'),
+    'blocks_json': export_blocks_scenario('json'),
+    'receipts_csv': export_receipts_scenario('csv'),
+    'receipts_json': export_receipts_scenario('json'),
+    'block_receipts_csv': export_block_receipts_scenario('csv'),
+    'single_pass_csv': export_single_pass_scenario('csv'),
+    'single_pass_json': export_single_pass_scenario('json'),
+    'single_pass_block_receipts_csv': export_single_pass_scenario('csv', 'eth_getBlockReceipts'),
+}
+
+DEFAULT_SCENARIOS = ['blocks_csv', 'receipts_csv', 'block_receipts_csv', 'single_pass_csv', 'single_pass_json']
+
+
+class ScenarioContext(object):
+    def __init__(self, batch_web3_provider, start_block, end_block, batch_size, max_workers, input_dir, output_dir):
+        self.batch_web3_provider = batch_web3_provider
+        self.start_block = start_block
+        self.end_block = end_block
+        self.batch_size = batch_size
+        self.max_workers = max_workers
+        self.input_dir = input_dir
+        self.output_dir = output_dir
+
+    def output_path(self, name, file_format):
+        return os.path.join(self.output_dir, '{}.{}'.format(name, file_format))
+
+
+def count_output_rows(output_dir):
+    """Counts exported rows in all files in output_dir, excluding CSV header lines"""
+    row_count = 0
+    for file_name in os.listdir(output_dir):
+        with open(os.path.join(output_dir, file_name), 'rb') as output_file:
+            line_count = sum(1 for _ in output_file)
+        if file_name.endswith('.csv') and line_count > 0:
+            line_count -= 1
+        row_count += line_count
+    return row_count
@@ -10,6 +10,7 @@ OPCODES taken from:
     https://github.com/ethereum/yellowpaper/blob/master/Paper.tex
 """
 
+import array
 import logging
 import sys
 import os
@@ -405,39 +406,124 @@ class EVMDisAssembler(object):
 
     def disassemble(self, bytecode):
         """ Disassemble evm bytecode to a Instruction objects """
+        return self.disassemble_compact(bytecode).instructions()
 
-        def iterbytes(bytecode):
-            iter_bytecode = (b for b in bytecode if b in '1234567890abcdefABCDEFx')  # 0x will bail below.
-            for b in zip(iter_bytecode, iter_bytecode):
-                b = ''.join(b)
-                try:
-                    yield int(b, 16)
-                except ValueError:
-                    logger.warning("skipping invalid byte: %s" % repr(b))
+    def disassemble_compact(self, bytecode):
+        """ Disassemble evm bytecode to compact instruction records, see EVMCompactCode """
+        compact_code = EVMCompactCode(hex_to_bytes(bytecode))
+        for msg, ke in compact_code.errors:
+            if self.debug:
+                logger.error(msg)
+            self.errors.append("%s; %r" % (msg, ke))
+        return compact_code
 
-        pc = 0
-        previous = None
-        iter_bytecode = iterbytes(bytecode)
-        # disassemble
+    def assemble(self, instructions):
+        """ Assemble a list of Instruction() objects to evm bytecode"""
+        for instruction in instructions:
+            yield instruction.serialize()
+
+
+def hex_to_bytes(bytecode):
+    """ Convert hex encoded bytecode to bytes in one go
+
+        falls back to skipping invalid characters and bytes for malformed input
+    """
+    if isinstance(bytecode, (bytes, bytearray)):
+        return bytes(bytecode)
+    try:
+        return bytes.fromhex(bytecode[2:] if bytecode.startswith('0x') else bytecode)
+    except ValueError:
+        pass
+
+    iter_bytecode = (b for b in bytecode if b in '1234567890abcdefABCDEFx')  # 0x will bail below.
+    result = bytearray()
+    for b in zip(iter_bytecode, iter_bytecode):
+        b = ''.join(b)
+        try:
+            result.append(int(b, 16))
+        except ValueError:
+            logger.warning("skipping invalid byte: %s" % repr(b))
+    return bytes(result)
+
+
+# operand length for every possible opcode, unknown opcodes do not have operands
+OPERAND_LENGTHS = bytes(EVMDisAssembler.OPCODE_TABLE[opcode].length_of_operand
+                        if opcode in EVMDisAssembler.OPCODE_TABLE else 0 for opcode in range(256))
+STOP = 0x00
+
+
+class EVMCompactCode(object):
+    """ Compact disassembly of evm bytecode
+
+        Instructions are stored as records (opcode, pc, operand slice) in arrays instead of Instruction objects.
+        Operands are slices of a memoryview over the code, nothing is copied.
+        Doubly linked Instruction objects are only built on demand, e.g. for EVMDasmPrinter.
+    """
+
+    def __init__(self, code):
+        self.code = code
+        self.opcodes = array.array('B')
+        self.addresses = array.array('L')
+        self.operand_lengths = array.array('B')
+        self.errors = []  # (message, exception) for unknown opcodes before the first STOP
+        self._view = memoryview(code)
+        self._disassemble()
+
+    def _disassemble(self):
+        code = self.code
+        code_length = len(code)
+        opcodes_append = self.opcodes.append
+        addresses_append = self.addresses.append
+        operand_lengths_append = self.operand_lengths.append
         seen_stop = False
-        for opcode in iter_bytecode:
-            logger.debug(opcode)
-            try:
-                instruction = self.OPCODE_TABLE[opcode].consume(iter_bytecode)
-            except KeyError as ke:
-                instruction = Instruction(opcode=opcode,
-                                          name="UNKNOWN_%s" % hex(opcode),
-                                          description="Invalid opcode")
-
-                if not seen_stop:
-                    msg = "error: byte at address %d (%s) is not a valid operator" % (pc, hex(opcode))
-                    if self.debug:
-                        logger.exception(msg)
-                    self.errors.append("%s; %r" % (msg, ke))
-            if instruction.name == 'STOP' and not seen_stop:
+        pc = 0
+        while pc < code_length:
+            opcode = code[pc]
+            operand_length = min(OPERAND_LENGTHS[opcode], code_length - pc - 1)
+            opcodes_append(opcode)
+            addresses_append(pc)
+            operand_lengths_append(operand_length)
+            if opcode == STOP:
                 seen_stop = True
-            instruction.address = pc
-            pc += instruction.size()
+            elif not seen_stop and opcode not in EVMDisAssembler.OPCODE_TABLE:
+                msg = "error: byte at address %d (%s) is not a valid operator" % (pc, hex(opcode))
+                self.errors.append((msg, KeyError(opcode)))
+            pc += 1 + operand_length
+
+    def __len__(self):
+        return len(self.opcodes)
+
+    def __iter__(self):
+        """ yields (opcode, pc, operand) records, operand is a memoryview slice """
+        for index in range(len(self.opcodes)):
+            yield self.opcodes[index], self.addresses[index], self.operand(index)
+
+    def operand(self, index):
+        operand_start = self.addresses[index] + 1
+        return self._view[operand_start:operand_start + self.operand_lengths[index]]
+
+    def instruction(self, index):
+        """ build a single (unlinked) Instruction object for the record at index """
+        opcode = self.opcodes[index]
+        template = EVMDisAssembler.OPCODE_TABLE.get(opcode)
+        if template is not None:
+            instruction = Instruction(opcode=opcode,
+                                      name=template.name,
+                                      length_of_operand=template.length_of_operand,
+                                      description=template.description)
+        else:
+            instruction = Instruction(opcode=opcode,
+                                      name="UNKNOWN_%s" % hex(opcode),
+                                      description="Invalid opcode")
+        instruction.operand = self.operand(index).hex()
+        instruction.address = self.addresses[index]
+        return instruction
+
+    def instructions(self):
+        """ yields doubly linked Instruction objects """
+        previous = None
+        for index in range(len(self.opcodes)):
+            instruction = self.instruction(index)
             # doubly link
             instruction.previous = previous
             if previous:
@@ -447,11 +533,6 @@ class EVMDisAssembler(object):
             previous = instruction
             yield instruction
 
-    def assemble(self, instructions):
-        """ Assemble a list of Instruction() objects to evm bytecode"""
-        for instruction in instructions:
-            yield instruction.serialize()
-
 
 class EVMDasmPrinter:
     """ utility class for different output formats
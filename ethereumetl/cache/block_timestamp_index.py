@@ -0,0 +1,150 @@
+# MIT License
+#
+# Copyright (c) 2018 Evgeny Medvedev, evge.medvedev@gmail.com
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+
+
+import bisect
+import mmap
+import os
+import pathlib
+import struct
+import threading
+
+# Little endian uint64 block number and uint64 timestamp
+RECORD_FORMAT = '<QQ'
+RECORD_SIZE = struct.calcsize(RECORD_FORMAT)
+
+
+# Persistent index of (block_number, timestamp) samples, sorted by block number.
+# Samples are stored in a compact binary file which is memory-mapped, so lookups are binary searches
+# that don't read the whole file. New samples are kept in memory until flush(), which merges them
+# with the file and atomically replaces it. Concurrent writers don't corrupt the file
+# but samples of all but the last writer may be lost.
+# The index must only be used for a single chain.
+class BlockTimestampIndex(object):
+    def __init__(self, path):
+        dirname = os.path.dirname(path)
+        if dirname:
+            pathlib.Path(dirname).mkdir(parents=True, exist_ok=True)
+        self.path = path
+        self._lock = threading.Lock()
+        # Sorted list of (timestamp, block_number) samples not yet written to the file
+        self._pending = []
+        self._file = None
+        self._mmap = None
+        self._size = 0
+        self._open()
+
+    def find_bounds(self, timestamp):
+        """Returns the closest samples (block_number, timestamp) with timestamp lower or equal and
+        greater or equal to the given timestamp. Either of them is None if there is no such sample"""
+        with self._lock:
+            lower, upper = self._find_bounds_in_file(timestamp)
+
+            index = bisect.bisect_right(self._pending, (timestamp, float('inf')))
+            if index > 0:
+                pending_timestamp, pending_block = self._pending[index - 1]
+                if lower is None or pending_block > lower[0]:
+                    lower = (pending_block, pending_timestamp)
+            index = bisect.bisect_left(self._pending, (timestamp, -1))
+            if index < len(self._pending):
+                pending_timestamp, pending_block = self._pending[index]
+                if upper is None or pending_block < upper[0]:
+                    upper = (pending_block, pending_timestamp)
+
+            return lower, upper
+
+    def add(self, block_number, timestamp):
+        with self._lock:
+            bisect.insort(self._pending, (timestamp, block_number))
+
+    def flush(self):
+        with self._lock:
+            if len(self._pending) == 0:
+                return
+            # Re-read the file as other processes may have replaced it
+            self._close()
+            self._open()
+            samples = dict(self._read_all())
+            for timestamp, block_number in self._pending:
+                samples[block_number] = timestamp
+
+            tmp_path = '{}.{}.tmp'.format(self.path, os.getpid())
+            with open(tmp_path, 'wb') as tmp_file:
+                for block_number in sorted(samples):
+                    tmp_file.write(struct.pack(RECORD_FORMAT, block_number, samples[block_number]))
+            self._close()
+            os.replace(tmp_path, self.path)
+            self._open()
+            self._pending = []
+
+    def close(self):
+        self.flush()
+        with self._lock:
+            self._close()
+
+    def __len__(self):
+        with self._lock:
+            return self._size + len(self._pending)
+
+    def _open(self):
+        if not os.path.exists(self.path):
+            self._size = 0
+            return
+        self._file = open(self.path, 'rb')
+        file_size = os.fstat(self._file.fileno()).st_size
+        self._size = file_size // RECORD_SIZE
+        # Zero length files can't be memory-mapped
+        if self._size > 0:
+            self._mmap = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+
+    def _close(self):
+        if self._mmap is not None:
+            self._mmap.close()
+            self._mmap = None
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+        self._size = 0
+
+    def _read(self, index):
+        return struct.unpack_from(RECORD_FORMAT, self._mmap, index * RECORD_SIZE)
+
+    def _read_all(self):
+        for index in range(self._size):
+            yield self._read(index)
+
+    def _find_bounds_in_file(self, timestamp):
+        # Timestamps increase with block numbers, so the records are sorted by timestamp too
+        low, high = 0, self._size
+        while low < high:
+            middle = (low + high) // 2
+            if self._read(middle)[1] < timestamp:
+                low = middle + 1
+            else:
+                high = middle
+        # low is the first record with timestamp greater or equal to the given timestamp
+        upper = self._read(low) if low < self._size else None
+        if upper is not None and upper[1] == timestamp:
+            return upper, upper
+        lower = self._read(low - 1) if low > 0 else None
+        return lower, upper
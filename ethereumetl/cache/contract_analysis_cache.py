@@ -0,0 +1,65 @@
+# MIT License
+#
+# Copyright (c) 2018 Evgeny Medvedev, evge.medvedev@gmail.com
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+
+from eth_utils import keccak
+
+from ethereumetl.cache.lru_cache import LRUCache
+
+DEFAULT_MAX_SIZE = 100000
+
+
+# Caches results of contract bytecode analysis (function_sighashes, is_erc20, is_erc721) by bytecode hash.
+# Many contracts are byte-identical clones (proxies, contracts created by factories),
+# so the same bytecode needs to be analysed only once.
+# Lookups go to the in-memory LRU cache first and then to the optional persistent store,
+# which can be shared across partitions and processes.
+class ContractAnalysisCache(object):
+    def __init__(self, max_size=DEFAULT_MAX_SIZE, store=None):
+        self._lru_cache = LRUCache(max_size)
+        self._store = store
+
+    def get(self, code_hash):
+        analysis = self._lru_cache.get(code_hash)
+        if analysis is None and self._store is not None:
+            analysis = self._store.get(code_hash)
+            if analysis is not None:
+                self._lru_cache.put(code_hash, analysis)
+        return analysis
+
+    def put(self, code_hash, analysis):
+        self._lru_cache.put(code_hash, analysis)
+        if self._store is not None:
+            self._store.put(code_hash, analysis)
+
+    def close(self):
+        if self._store is not None:
+            self._store.close()
+
+
+def get_bytecode_hash(bytecode):
+    try:
+        code_hash = keccak(hexstr=bytecode)
+    except ValueError:
+        # Malformed bytecode is still cached, keyed by the hash of its text
+        code_hash = keccak(text=bytecode)
+    return '0x' + code_hash.hex()
@@ -0,0 +1,99 @@
+# MIT License
+#
+# Copyright (c) 2018 Evgeny Medvedev, evge.medvedev@gmail.com
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+
+import json
+import os
+import pathlib
+import sqlite3
+import threading
+import zlib
+
+DEFAULT_TABLE_NAME = 'kv'
+# Other processes may hold the write lock, e.g. export_all partitions running in parallel
+DEFAULT_LOCK_TIMEOUT_SECONDS = 60
+# SQLite limits the number of parameters in a statement to 999 by default
+MAX_KEYS_PER_QUERY = 500
+
+
+# Thread safe persistent key-value store backed by a single SQLite file.
+# Values are serialized to JSON, and compressed with zlib if compress is True.
+# A table must always be opened with the same compress value. The file can be shared by multiple processes.
+class SqliteKeyValueStore(object):
+    def __init__(self, path, table_name=DEFAULT_TABLE_NAME, timeout=DEFAULT_LOCK_TIMEOUT_SECONDS, compress=False):
+        dirname = os.path.dirname(path)
+        if dirname:
+            pathlib.Path(dirname).mkdir(parents=True, exist_ok=True)
+        self.path = path
+        self.table_name = table_name
+        self.compress = compress
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(path, timeout=timeout, check_same_thread=False)
+        with self._lock, self._connection:
+            self._connection.execute('PRAGMA journal_mode=WAL')
+            self._connection.execute(
+                'CREATE TABLE IF NOT EXISTS {} (key TEXT PRIMARY KEY, value TEXT NOT NULL)'.format(self.table_name))
+
+    def get(self, key, default=None):
+        with self._lock:
+            row = self._connection.execute(
+                'SELECT value FROM {} WHERE key = ?'.format(self.table_name), (key,)).fetchone()
+        if row is None:
+            return default
+        return self._deserialize(row[0])
+
+    def get_many(self, keys):
+        """Returns a dict with the values of the keys that are found"""
+        keys = list(keys)
+        values = {}
+        for index in range(0, len(keys), MAX_KEYS_PER_QUERY):
+            chunk = keys[index:index + MAX_KEYS_PER_QUERY]
+            with self._lock:
+                rows = self._connection.execute('SELECT key, value FROM {} WHERE key IN ({})'.format(
+                    self.table_name, ', '.join('?' * len(chunk))), chunk).fetchall()
+            for key, value in rows:
+                values[key] = self._deserialize(value)
+        return values
+
+    def put(self, key, value):
+        self.put_many([(key, value)])
+
+    def put_many(self, items):
+        rows = [(key, self._serialize(value)) for key, value in items]
+        with self._lock, self._connection:
+            self._connection.executemany(
+                'INSERT OR REPLACE INTO {} (key, value) VALUES (?, ?)'.format(self.table_name), rows)
+
+    def close(self):
+        with self._lock:
+            self._connection.close()
+
+    def _serialize(self, value):
+        text = json.dumps(value)
+        if self.compress:
+            return sqlite3.Binary(zlib.compress(text.encode('utf-8')))
+        return text
+
+    def _deserialize(self, value):
+        if self.compress:
+            return json.loads(zlib.decompress(value).decode('utf-8'))
+        return json.loads(value)
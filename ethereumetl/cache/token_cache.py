@@ -0,0 +1,81 @@
+# MIT License
+#
+# Copyright (c) 2018 Evgeny Medvedev, evge.medvedev@gmail.com
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+
+
+from ethereumetl.cache.lru_cache import LRUCache
+
+DEFAULT_MAX_SIZE = 100000
+
+IMMUTABLE_TOKEN_FIELDS = ['symbol', 'name', 'decimals']
+
+
+# Caches token metadata by token address, so popular tokens are not queried again for every partition.
+# symbol, name and decimals don't change and are cached indefinitely.
+# total_supply is cached together with the block it was fetched at and is reused for blocks up to
+# total_supply_max_age blocks later. If total_supply_max_age is None total_supply is always fetched.
+# Lookups go to the in-memory LRU cache first and then to the optional persistent store.
+class TokenCache(object):
+    def __init__(self, max_size=DEFAULT_MAX_SIZE, store=None, total_supply_max_age=None):
+        self._lru_cache = LRUCache(max_size)
+        self._store = store
+        self.total_supply_max_age = total_supply_max_age
+
+    def get(self, token_address, block='latest'):
+        """Returns a dict with the cached fields that are valid at the given block, or an empty dict"""
+        cached_token = self._get(token_address.lower())
+        if cached_token is None:
+            return {}
+
+        fields = {field: cached_token[field] for field in IMMUTABLE_TOKEN_FIELDS}
+        total_supply_block = cached_token.get('total_supply_block')
+        if self.total_supply_max_age is not None and isinstance(block, int) and total_supply_block is not None \
+                and 0 <= block - total_supply_block <= self.total_supply_max_age:
+            fields['total_supply'] = cached_token['total_supply']
+        return fields
+
+    def put(self, token, block='latest'):
+        # Calls to addresses that are not contracts return nothing, e.g. if the token is not created yet
+        # at the block. Such results are not cached
+        if all(getattr(token, field) is None for field in IMMUTABLE_TOKEN_FIELDS + ['total_supply']):
+            return
+
+        cached_token = {field: getattr(token, field) for field in IMMUTABLE_TOKEN_FIELDS}
+        cached_token['total_supply'] = token.total_supply
+        cached_token['total_supply_block'] = block if isinstance(block, int) else None
+
+        token_address = token.address.lower()
+        self._lru_cache.put(token_address, cached_token)
+        if self._store is not None:
+            self._store.put(token_address, cached_token)
+
+    def close(self):
+        if self._store is not None:
+            self._store.close()
+
+    def _get(self, token_address):
+        cached_token = self._lru_cache.get(token_address)
+        if cached_token is None and self._store is not None:
+            cached_token = self._store.get(token_address)
+            if cached_token is not None:
+                self._lru_cache.put(token_address, cached_token)
+        return cached_token
@@ -0,0 +1,231 @@
+# MIT License
+#
+# Copyright (c) 2018 Evgeny Medvedev, evge.medvedev@gmail.com
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+
+
+import collections
+import csv
+import io
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+from ethereumetl.csv_utils import set_max_field_size_limit
+from ethereumetl.file_utils import smart_open
+
+DEFAULT_CHUNK_SIZE = 64 * 1024 * 1024
+READ_BUFFER_SIZE = 8 * 1024 * 1024
+# Items per batch when the input is streamed instead of split into chunks
+DEFAULT_STREAM_BATCH_SIZE = 10000
+
+CSV_FORMAT = 'csv'
+JSON_FORMAT = 'json'
+ITEM_FORMATS = [CSV_FORMAT, JSON_FORMAT]
+
+
+def get_item_format(input):
+    return CSV_FORMAT if input is not None and input.endswith('.csv') else JSON_FORMAT
+
+
+# Reads items from a csv or json lines file. If max_workers is given, regular files are split into chunks of
+# chunk_size bytes at line boundaries and the chunks are parsed in a process pool. Otherwise the file is streamed
+# in the main process, item by item.
+# Iterating yields item dicts in file order, the same as csv.DictReader or json.loads of every line.
+# read_batches yields the items of every chunk and can map them in the worker process.
+class ChunkedItemReader(object):
+    def __init__(self, input, item_format=None, max_workers=None, chunk_size=DEFAULT_CHUNK_SIZE):
+        self.input = input
+        self.item_format = item_format if item_format is not None else get_item_format(input)
+        if self.item_format not in ITEM_FORMATS:
+            raise ValueError('Item format must be one of {}'.format(', '.join(ITEM_FORMATS)))
+        self.max_workers = max_workers
+        self.chunk_size = chunk_size
+
+    def __iter__(self):
+        if not self._is_parallel():
+            yield from self._read_stream_items()
+            return
+        for items in self.read_batches():
+            yield from items
+
+    # map_items is applied to the list of items of every chunk, it must be a top level function
+    # so that it can be pickled. Batches are yielded in file order
+    def read_batches(self, map_items=None):
+        if self.item_format == CSV_FORMAT:
+            set_max_field_size_limit()
+
+        if not self._is_parallel():
+            yield from self._read_stream_batches(map_items)
+        elif self.item_format == CSV_FORMAT:
+            header_line, start = read_csv_header(self.input)
+            if header_line is None:
+                return
+            header = next(csv.reader([header_line]))
+            yield from map_csv_chunks(
+                self.input, start, self.chunk_size, self.max_workers, parse_csv_chunk, header, map_items)
+        else:
+            for _, _, _, items in map_chunks(
+                    self.input, 0, self.chunk_size, self.max_workers, parse_json_chunk, map_items):
+                yield items
+
+    def _is_parallel(self):
+        # Chunks are only read in place of streaming when they are parsed in parallel,
+        # reading a chunk in the main process would keep all of its items in memory
+        return bool(self.max_workers) and is_regular_file(self.input)
+
+    def _read_stream_items(self):
+        if self.item_format == CSV_FORMAT:
+            set_max_field_size_limit()
+        with smart_open(self.input, 'r') as input_file:
+            if self.item_format == CSV_FORMAT:
+                yield from csv.DictReader(input_file)
+            else:
+                for line in input_file:
+                    yield json.loads(line)
+
+    def _read_stream_batches(self, map_items):
+        batch = []
+        for item in self._read_stream_items():
+            batch.append(item)
+            if len(batch) >= DEFAULT_STREAM_BATCH_SIZE:
+                yield _map_items(batch, map_items)
+                batch = []
+        if len(batch) > 0:
+            yield _map_items(batch, map_items)
+
+
+# Top level functions so that they can be pickled and executed in a worker process
+def parse_csv_chunk(input, start, end, header, map_items, strict=False):
+    set_max_field_size_limit()
+    data = read_chunk(input, start, end)
+    lines = io.StringIO(decode_chunk(data), newline='\n')
+    try:
+        items = _map_items(list(csv.DictReader(lines, fieldnames=header)), map_items)
+    except Exception:
+        # A chunk that starts inside a quoted value can fail to parse or map,
+        # it is parsed again after realignment
+        if strict:
+            raise
+        items = None
+    return data.count(b'"'), items
+
+
+def parse_json_chunk(input, start, end, map_items):
+    data = read_chunk(input, start, end)
+    lines = io.StringIO(decode_chunk(data), newline='\n')
+    return 0, _map_items([json.loads(line) for line in lines], map_items)
+
+
+def _map_items(items, map_items):
+    return items if map_items is None else map_items(items)
+
+
+# Like map_chunks for csv files, yields the result of chunk_function for chunks in file order.
+# A chunk boundary can fall inside a quoted value that spans lines. Such chunks are found by the parity
+# of the quotes before the boundary and are parsed again together with the following chunks.
+# chunk_function returns the number of quotes in the chunk and the result, the result may be None
+# if parsing failed when strict is False.
+def map_csv_chunks(input, start, chunk_size, max_workers, chunk_function, *args):
+    realign_start = None
+    for chunk_start, chunk_end, quote_count, result in map_chunks(
+            input, start, chunk_size, max_workers, chunk_function, *args):
+        if realign_start is None:
+            if quote_count % 2 == 0:
+                if result is None:
+                    # Parsed again in this process to raise the error
+                    _, result = chunk_function(input, chunk_start, chunk_end, *args, strict=True)
+                yield result
+            else:
+                # The end of this chunk is inside a quoted value
+                realign_start = chunk_start
+        elif quote_count % 2 == 1:
+            # The quoted value is closed in this chunk, all chunks since realign_start are parsed as one
+            _, result = chunk_function(input, realign_start, chunk_end, *args, strict=True)
+            yield result
+            realign_start = None
+    if realign_start is not None:
+        _, result = chunk_function(input, realign_start, None, *args, strict=True)
+        yield result
+
+
+def map_chunks(input, start, chunk_size, max_workers, chunk_function, *args):
+    chunks = _iterate_chunks(input, start, chunk_size)
+    if max_workers is None or max_workers <= 0:
+        for chunk_start, chunk_end in chunks:
+            yield (chunk_start, chunk_end) + chunk_function(input, chunk_start, chunk_end, *args)
+        return
+
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        # A few chunks per worker are queued, so that the values of the whole file are not kept in memory
+        futures = collections.deque()
+        for chunk_start, chunk_end in chunks:
+            if len(futures) >= max_workers * 2:
+                yield _chunk_result(futures.popleft())
+            future = executor.submit(chunk_function, input, chunk_start, chunk_end, *args)
+            futures.append((chunk_start, chunk_end, future))
+        while len(futures) > 0:
+            yield _chunk_result(futures.popleft())
+
+
+def _chunk_result(chunk):
+    chunk_start, chunk_end, future = chunk
+    return (chunk_start, chunk_end) + future.result()
+
+
+def _iterate_chunks(input, start, chunk_size):
+    file_size = os.path.getsize(input)
+    with open(input, 'rb') as input_file:
+        while start < file_size:
+            # Chunks end after a newline
+            input_file.seek(min(start + chunk_size, file_size) - 1)
+            input_file.readline()
+            end = input_file.tell()
+            yield start, end
+            start = end
+
+
+def read_chunk(input, start, end):
+    with open(input, 'rb', buffering=READ_BUFFER_SIZE) as input_file:
+        input_file.seek(start)
+        return input_file.read() if end is None else input_file.read(end - start)
+
+
+def decode_chunk(data):
+    # Same newline translation as files opened in text mode
+    text = data.decode('utf-8')
+    if '\r' in text:
+        text = text.replace('\r\n', '\n').replace('\r', '\n')
+    return text
+
+
+def read_csv_header(input):
+    """Returns the header line of a csv file and the offset of the first record, or None if the file is empty"""
+    with open(input, 'rb') as input_file:
+        header_line = input_file.readline()
+        start = input_file.tell()
+    if len(header_line) == 0:
+        return None, start
+    return decode_chunk(header_line), start
+
+
+def is_regular_file(input):
+    return input is not None and input != '-' and os.path.isfile(input)
@@ -0,0 +1,119 @@
+# MIT License
+#
+# Copyright (c) 2018 Evgeny Medvedev, evge.medvedev@gmail.com
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+
+
+import csv
+import io
+import json
+
+from ethereumetl.chunked_reader import DEFAULT_CHUNK_SIZE, decode_chunk, is_regular_file, map_chunks, \
+    map_csv_chunks, read_chunk, read_csv_header
+from ethereumetl.csv_utils import get_csv_column_index, read_csv_column_values, set_max_field_size_limit
+from ethereumetl.file_utils import smart_open
+
+_json_decoder = json.JSONDecoder()
+
+
+# Extracts a single column from a csv file. Regular files are split into chunks of chunk_size bytes at line
+# boundaries, and the chunks are parsed in a process pool if max_workers is given. Values are written in file order.
+def extract_csv_column(input, output, column, max_workers=None, chunk_size=DEFAULT_CHUNK_SIZE):
+    set_max_field_size_limit()
+    with smart_open(output, 'w') as output_file:
+        if not is_regular_file(input):
+            with smart_open(input, 'r') as input_file:
+                lines = iter(input_file)
+                header_line = next(lines, None)
+                if header_line is not None:
+                    index, is_last_column = get_csv_column_index(header_line, column)
+                    _write_values(output_file, read_csv_column_values(lines, index, is_last_column))
+            return
+
+        header_line, start = read_csv_header(input)
+        if header_line is None:
+            return
+        index, is_last_column = get_csv_column_index(header_line, column)
+
+        for values in map_csv_chunks(input, start, chunk_size, max_workers, extract_csv_chunk, index, is_last_column):
+            output_file.write(values)
+
+
+# Extracts a single field from a json lines file. Lines are only decoded from the field onwards when the field
+# name occurs once in a flat object, other lines are parsed with json.loads.
+# Regular files are split into chunks and parsed in a process pool if max_workers is given.
+def extract_json_field(input, output, field, max_workers=None, chunk_size=DEFAULT_CHUNK_SIZE):
+    with smart_open(output, 'w') as output_file:
+        if not is_regular_file(input):
+            with smart_open(input, 'r') as input_file:
+                key = json.dumps(field)
+                _write_values(output_file, (get_json_field(line, field, key) for line in input_file))
+            return
+
+        for _, _, _, values in map_chunks(input, 0, chunk_size, max_workers, extract_json_chunk, field):
+            output_file.write(values)
+
+
+def get_json_field(line, field, key=None):
+    if key is None:
+        key = json.dumps(field)
+    key_index = line.find(key)
+    if key_index >= 0 and line.find(key, key_index + 1) < 0 and '\\"' not in line and line.count('{') == 1:
+        # The key can't be inside a string value or a nested object
+        value_index = _skip_whitespace(line, key_index + len(key))
+        if line.startswith(':', value_index):
+            value, _ = _json_decoder.raw_decode(line, _skip_whitespace(line, value_index + 1))
+            return value
+    return json.loads(line)[field]
+
+
+# Top level functions so that they can be pickled and executed in a worker process
+def extract_csv_chunk(input, start, end, index, is_last_column, strict=False):
+    set_max_field_size_limit()
+    data = read_chunk(input, start, end)
+    lines = io.StringIO(decode_chunk(data), newline='\n')
+    try:
+        values = ''.join(value + '\n' for value in read_csv_column_values(lines, index, is_last_column))
+    except (IndexError, csv.Error):
+        # A chunk that starts inside a quoted value can fail to parse, it is parsed again after realignment
+        if strict:
+            raise
+        values = None
+    return data.count(b'"'), values
+
+
+def extract_json_chunk(input, start, end, field):
+    data = read_chunk(input, start, end)
+    lines = io.StringIO(decode_chunk(data), newline='\n')
+    key = json.dumps(field)
+    values = ''.join(get_json_field(line, field, key) + '\n' for line in lines)
+    return 0, values
+
+
+def _skip_whitespace(line, index):
+    while index < len(line) and line[index] in ' \t':
+        index += 1
+    return index
+
+
+def _write_values(output_file, values):
+    for value in values:
+        output_file.write(value + '\n')
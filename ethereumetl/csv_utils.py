@@ -23,8 +23,9 @@
 
 # https://stackoverflow.com/questions/15063936/csv-error-field-larger-than-field-limit-131072
 
-import sys
 import csv
+import itertools
+import sys
 
 
 def set_max_field_size_limit():
@@ -40,3 +41,60 @@ def set_max_field_size_limit():
         except OverflowError:
             max_int = int(max_int / 10)
             decrement = True
+
+
+def read_csv_column(input_file, column):
+    """Yields the values of a single column, without building a dict for every row"""
+    lines = iter(input_file)
+    header_line = next(lines, None)
+    if header_line is None:
+        return
+    index, is_last_column = get_csv_column_index(header_line, column)
+    yield from read_csv_column_values(lines, index, is_last_column)
+
+
+def get_csv_column_index(header_line, column):
+    """Returns the index of the column in the header line and whether it is the last column"""
+    header = next(csv.reader([header_line]))
+    if column not in header:
+        raise ValueError('Column {} is not found in the header {}'.format(column, header))
+    index = header.index(column)
+    return index, index == len(header) - 1
+
+
+def read_csv_column_values(lines, index, is_last_column):
+    """Yields the values at index from csv lines without the header.
+    Lines without quotes are split directly, quoted rows are parsed with the csv module"""
+    lines = iter(lines)
+    for line in lines:
+        if line == '\n' or line == '\r\n':
+            # Empty rows are skipped, same as csv.DictReader
+            continue
+        if '"' not in line:
+            value = line.split(',', index + 1)[index]
+            yield value.rstrip('\r\n') if is_last_column else value
+        else:
+            # The csv reader pulls more lines from the same iterator if a quoted value spans lines
+            row = next(csv.reader(itertools.chain([line], lines)))
+            yield row[index]
+
+
+def read_csv_records(lines):
+    """Yields the text and the parsed row of every csv record without the header. A quoted value can span lines"""
+    lines = iter(lines)
+    for line in lines:
+        if line == '\n' or line == '\r\n':
+            continue
+        if '"' not in line:
+            yield line, line.rstrip('\r\n').split(',')
+        else:
+            record_lines = [line]
+            quote_count = line.count('"')
+            while quote_count % 2 == 1:
+                next_line = next(lines, None)
+                if next_line is None:
+                    break
+                record_lines.append(next_line)
+                quote_count += next_line.count('"')
+            record = ''.join(record_lines)
+            yield record, next(csv.reader([record]))
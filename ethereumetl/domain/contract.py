@@ -28,3 +28,5 @@ class EthContract(object):
         self.function_sighashes = []
         self.is_erc20 = False
         self.is_erc721 = False
+        # Additional interfaces, interface name to whether it's implemented
+        self.interfaces = {}
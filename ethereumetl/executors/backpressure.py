@@ -0,0 +1,113 @@
+# MIT License
+#
+# Copyright (c) 2018 Evgeny Medvedev, evge.medvedev@gmail.com
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+
+
+import threading
+
+from ethereumetl.metrics import registry
+
+ITEMS_IN_FLIGHT = registry.gauge(
+    'ethereumetl_backpressure_items_in_flight', 'Items in batches submitted to executors and not finished.').labels()
+BYTES_IN_FLIGHT = registry.gauge(
+    'ethereumetl_backpressure_bytes_in_flight',
+    'Estimated response bytes of batches submitted to executors and not finished.').labels()
+BACKPRESSURE_WAIT = registry.histogram(
+    'ethereumetl_backpressure_wait_seconds',
+    'Time spent waiting for the backpressure limits to submit a batch.').labels()
+
+
+# Limits the items and the estimated response bytes of batches in flight of an executor.
+# Submitting a batch blocks while the limits would be exceeded. A batch is always admitted when nothing
+# is in flight, so batches larger than the limits don't block forever. A batch with unknown response bytes
+# is only admitted when nothing is in flight if the bytes are limited.
+class Backpressure(object):
+    def __init__(self, max_items=None, max_bytes=None):
+        self._condition = threading.Condition()
+        self.items_in_flight = 0
+        self.bytes_in_flight = 0
+        self.peak_items_in_flight = 0
+        self.peak_bytes_in_flight = 0
+        self.configure(max_items, max_bytes)
+
+    def configure(self, max_items=None, max_bytes=None):
+        """None means no limit"""
+        with self._condition:
+            self.max_items = max_items
+            self.max_bytes = max_bytes
+            self._condition.notify_all()
+
+    def acquire(self, item_count, byte_count=0):
+        """byte_count None means the response bytes are not estimated yet"""
+        with self._condition:
+            if not self._admits(item_count, byte_count):
+                with BACKPRESSURE_WAIT.time():
+                    while not self._admits(item_count, byte_count):
+                        self._condition.wait()
+            byte_count = byte_count or 0
+            self.items_in_flight += item_count
+            self.bytes_in_flight += byte_count
+            self.peak_items_in_flight = max(self.peak_items_in_flight, self.items_in_flight)
+            self.peak_bytes_in_flight = max(self.peak_bytes_in_flight, self.bytes_in_flight)
+        ITEMS_IN_FLIGHT.inc(item_count)
+        BYTES_IN_FLIGHT.inc(byte_count)
+
+    def release(self, item_count, byte_count=0):
+        byte_count = byte_count or 0
+        with self._condition:
+            self.items_in_flight -= item_count
+            self.bytes_in_flight -= byte_count
+            self._condition.notify_all()
+        ITEMS_IN_FLIGHT.dec(item_count)
+        BYTES_IN_FLIGHT.dec(byte_count)
+
+    def _admits(self, item_count, byte_count):
+        if self.items_in_flight == 0:
+            return True
+        if self.max_items is not None and self.items_in_flight + item_count > self.max_items:
+            return False
+        if self.max_bytes is not None and (byte_count is None or self.bytes_in_flight + byte_count > self.max_bytes):
+            return False
+        return True
+
+    def get_peak_message(self):
+        return 'Peak in flight {} items, {:.1f} MB of estimated responses.'.format(
+            self.peak_items_in_flight, self.peak_bytes_in_flight / (1024 * 1024))
+
+
+# Limits of the backpressure created for each executor that is not given one, configured by the CLI.
+# Every executor gets its own budget, so nested executors don't wait for each other.
+class BackpressureLimits(object):
+    def __init__(self):
+        self.max_items = None
+        self.max_bytes = None
+
+    def configure(self, max_items=None, max_bytes=None):
+        """None means no limit"""
+        self.max_items = max_items
+        self.max_bytes = max_bytes
+
+    def create_backpressure(self):
+        return Backpressure(max_items=self.max_items, max_bytes=self.max_bytes)
+
+
+default_backpressure_limits = BackpressureLimits()
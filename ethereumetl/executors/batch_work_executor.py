@@ -23,35 +23,97 @@
 from requests.exceptions import Timeout as RequestsTimeout, HTTPError, TooManyRedirects
 from web3.utils.threads import Timeout as Web3Timeout
 
+from ethereumetl.executors.backpressure import default_backpressure_limits
 from ethereumetl.executors.bounded_executor import BoundedExecutor
 from ethereumetl.executors.fail_safe_executor import FailSafeExecutor
+from ethereumetl.metrics import registry
+from ethereumetl.profiling import profiler
 from ethereumetl.progress_logger import ProgressLogger
+from ethereumetl.providers.request_metrics import get_thread_response_bytes
 from ethereumetl.utils import dynamic_batch_iterator
 
 RETRY_EXCEPTIONS = (ConnectionError, HTTPError, RequestsTimeout, TooManyRedirects, Web3Timeout, OSError)
 
+# Weight of the last batch in the estimate of response bytes per item
+BYTES_PER_ITEM_SMOOTHING = 0.2
+
+BATCHES_QUEUED = registry.gauge(
+    'ethereumetl_executor_batches_queued', 'Batches submitted to executors and waiting for a worker.').labels()
+BATCHES_IN_PROGRESS = registry.gauge(
+    'ethereumetl_executor_batches_in_progress', 'Batches being processed by executor workers.').labels()
+BATCH_DURATION = registry.histogram(
+    'ethereumetl_executor_batch_duration_seconds', 'Duration of batch processing, including retries.').labels()
+BATCH_RETRIES = registry.counter(
+    'ethereumetl_executor_batch_retries_total', 'Batches retried item by item after an error.').labels()
+ITEMS_PROCESSED = registry.counter(
+    'ethereumetl_executor_items_processed_total', 'Items processed by executors.').labels()
+
 
 # Executes the given work in batches, reducing the batch size exponentially in case of errors.
+# Submitting batches blocks while the items or the estimated response bytes of batches in flight exceed
+# the limits of backpressure, which is created from the default limits when not given.
 class BatchWorkExecutor:
-    def __init__(self, starting_batch_size, max_workers, retry_exceptions=RETRY_EXCEPTIONS):
+    def __init__(self, starting_batch_size, max_workers, retry_exceptions=RETRY_EXCEPTIONS, backpressure=None):
         self.batch_size = starting_batch_size
         self.max_workers = max_workers
         # Using bounded executor prevents unlimited queue growth
         # and allows monitoring in-progress futures and failing fast in case of errors.
         self.executor = FailSafeExecutor(BoundedExecutor(1, self.max_workers))
         self.retry_exceptions = retry_exceptions
+        if backpressure is None:
+            backpressure = default_backpressure_limits.create_backpressure()
+        self.backpressure = backpressure
         self.progress_logger = ProgressLogger()
+        # Learned from finished batches, None until the first batch finishes
+        self.bytes_per_item = None
 
     def execute(self, work_iterable, work_handler, total_items=None):
         self.progress_logger.start(total_items=total_items)
         for batch in dynamic_batch_iterator(work_iterable, lambda: self.batch_size):
-            self.executor.submit(self._fail_safe_execute, work_handler, batch)
+            estimated_bytes = self._estimate_bytes(len(batch))
+            self.backpressure.acquire(len(batch), estimated_bytes)
+            BATCHES_QUEUED.inc()
+            try:
+                self.executor.submit(self._fail_safe_execute, work_handler, batch, estimated_bytes)
+            except Exception:
+                BATCHES_QUEUED.dec()
+                self.backpressure.release(len(batch), estimated_bytes)
+                raise
 
     # Check race conditions
-    def _fail_safe_execute(self, work_handler, batch):
+    def _fail_safe_execute(self, work_handler, batch, estimated_bytes=None):
+        BATCHES_QUEUED.dec()
+        BATCHES_IN_PROGRESS.inc()
+        response_bytes_before = get_thread_response_bytes()
+        try:
+            with BATCH_DURATION.time(), profiler.stage('batch'):
+                self._execute_with_retries(work_handler, batch)
+        finally:
+            BATCHES_IN_PROGRESS.dec()
+            self.backpressure.release(len(batch), estimated_bytes)
+        self._update_bytes_per_item(get_thread_response_bytes() - response_bytes_before, len(batch))
+        ITEMS_PROCESSED.inc(len(batch))
+        self.progress_logger.track(len(batch))
+
+    def _estimate_bytes(self, item_count):
+        bytes_per_item = self.bytes_per_item
+        if bytes_per_item is None:
+            return None
+        return int(item_count * bytes_per_item)
+
+    def _update_bytes_per_item(self, response_bytes, item_count):
+        # Races between threads only make the estimate slightly less smooth
+        bytes_per_item = response_bytes / item_count
+        if self.bytes_per_item is None:
+            self.bytes_per_item = bytes_per_item
+        else:
+            self.bytes_per_item += BYTES_PER_ITEM_SMOOTHING * (bytes_per_item - self.bytes_per_item)
+
+    def _execute_with_retries(self, work_handler, batch):
         try:
             work_handler(batch)
         except self.retry_exceptions:
+            BATCH_RETRIES.inc()
             batch_size = self.batch_size
             # Reduce the batch size. Subsequent batches will be 2 times smaller
             if batch_size == len(batch) and batch_size > 1:
@@ -59,8 +121,7 @@ class BatchWorkExecutor:
             # For the failed batch try handling items one by one
             for item in batch:
                 work_handler([item])
-        self.progress_logger.track(len(batch))
 
     def shutdown(self):
         self.executor.shutdown()
-        self.progress_logger.finish()
+        self.progress_logger.finish(details=self.backpressure.get_peak_message())
@@ -21,28 +21,48 @@
 # SOFTWARE.
 
 
+import threading
+
+
+# Fails fast: submit raises the exception of the first failed future.
+# Completed futures are tracked with done callbacks, so submit doesn't scan the futures in progress.
 class FailSafeExecutor:
 
     def __init__(self, delegate):
         self._delegate = delegate
-        self._futures = []
+        self._lock = threading.Lock()
+        self._in_progress = 0
+        self._failed_futures = []
 
     def submit(self, fn, *args, **kwargs):
-        self._check_completed_futures()
-        future = self._delegate.submit(fn, *args, **kwargs)
-        self._futures.append(future)
+        self._check_failed_futures()
+        with self._lock:
+            self._in_progress += 1
+        try:
+            future = self._delegate.submit(fn, *args, **kwargs)
+        except Exception:
+            with self._lock:
+                self._in_progress -= 1
+            raise
+        future.add_done_callback(self._on_done)
 
         return future
 
     def shutdown(self):
         self._delegate.shutdown(wait=True)
-        self._check_completed_futures()
-        assert len(self._futures) == 0
+        self._check_failed_futures()
+        assert self._in_progress == 0
+
+    def _on_done(self, future):
+        with self._lock:
+            self._in_progress -= 1
+            if future.cancelled() or future.exception() is not None:
+                self._failed_futures.append(future)
 
-    def _check_completed_futures(self):
+    def _check_failed_futures(self):
         """Fail safe in this case means fail fast. TODO: Add retry logic"""
-        for future in self._futures.copy():
-            if future.done():
-                # Will throw an exception here if the future failed
-                future.result()
-                self._futures.remove(future)
+        if len(self._failed_futures) > 0:
+            with self._lock:
+                future = self._failed_futures.pop(0)
+            # Will throw an exception here
+            future.result()
@@ -0,0 +1,157 @@
+# MIT License
+#
+# Copyright (c) 2018 Evgeny Medvedev, evge.medvedev@gmail.com
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+
+
+import functools
+import io
+import json
+
+from ethereumetl.chunked_reader import CSV_FORMAT, DEFAULT_CHUNK_SIZE, ITEM_FORMATS, decode_chunk, get_item_format, \
+    is_regular_file, map_chunks, map_csv_chunks, read_chunk, read_csv_header
+from ethereumetl.csv_utils import read_csv_records, set_max_field_size_limit
+from ethereumetl.file_utils import smart_open
+from ethereumetl.predicate import PredicateError, compile_predicate
+
+
+# Writes the csv records or json lines that match the predicate, unchanged and in file order.
+# Regular files are split into chunks and filtered in a process pool if max_workers is given.
+def filter_items(input, output, predicate, item_format=None, max_workers=None, chunk_size=DEFAULT_CHUNK_SIZE):
+    if item_format is None:
+        item_format = get_item_format(input)
+    if item_format not in ITEM_FORMATS:
+        raise ValueError('Item format must be one of {}'.format(', '.join(ITEM_FORMATS)))
+
+    with smart_open(output, 'w') as output_file:
+        if item_format == CSV_FORMAT:
+            _filter_csv(input, output_file, predicate, max_workers, chunk_size)
+        else:
+            _filter_json(input, output_file, predicate, max_workers, chunk_size)
+
+
+def _filter_csv(input, output_file, predicate, max_workers, chunk_size):
+    set_max_field_size_limit()
+    if not is_regular_file(input):
+        with smart_open(input, 'r') as input_file:
+            lines = iter(input_file)
+            header_line = next(lines, None)
+            if header_line is not None:
+                output_file.write(header_line)
+                _write_lines(output_file, _matching_csv_records(lines, _parse_header(header_line), predicate))
+        return
+
+    header_line, start = read_csv_header(input)
+    if header_line is None:
+        return
+    header = _parse_header(header_line)
+    # Fails early on invalid predicates and unknown columns
+    compile_csv_predicate(predicate, header)
+
+    output_file.write(header_line)
+    for records in map_csv_chunks(input, start, chunk_size, max_workers, filter_csv_chunk, header, predicate):
+        output_file.write(records)
+
+
+def _filter_json(input, output_file, predicate, max_workers, chunk_size):
+    if not is_regular_file(input):
+        with smart_open(input, 'r') as input_file:
+            _write_lines(output_file, _matching_json_lines(input_file, predicate))
+        return
+
+    compile_predicate(predicate)
+    for _, _, _, lines in map_chunks(input, 0, chunk_size, max_workers, filter_json_chunk, predicate):
+        output_file.write(lines)
+
+
+# Top level functions so that they can be pickled and executed in a worker process
+def filter_csv_chunk(input, start, end, header, predicate, strict=False):
+    set_max_field_size_limit()
+    data = read_chunk(input, start, end)
+    lines = io.StringIO(decode_chunk(data), newline='\n')
+    try:
+        records = ''.join(_matching_csv_records(lines, header, predicate))
+    except PredicateError:
+        raise
+    except Exception:
+        # A chunk that starts inside a quoted value can fail to parse or evaluate,
+        # it is filtered again after realignment
+        if strict:
+            raise
+        records = None
+    return data.count(b'"'), records
+
+
+def filter_json_chunk(input, start, end, predicate):
+    data = read_chunk(input, start, end)
+    lines = io.StringIO(decode_chunk(data), newline='\n')
+    return 0, ''.join(_matching_json_lines(lines, predicate))
+
+
+# The predicate is compiled once per chunk
+def _matching_csv_records(lines, header, predicate):
+    matches = compile_csv_predicate(predicate, header)
+    return (_with_newline(record) for record, row in read_csv_records(lines) if matches(row))
+
+
+def _matching_json_lines(lines, predicate):
+    matches = compile_predicate(predicate)
+    return (_with_newline(line) for line in lines if matches(json.loads(line)))
+
+
+def _write_lines(output_file, lines):
+    for line in lines:
+        output_file.write(line)
+
+
+def compile_csv_predicate(predicate, header):
+    return compile_predicate(predicate, get_field=functools.partial(get_csv_row_field, header))
+
+
+def get_csv_row_field(header, field):
+    if field not in header:
+        raise PredicateError('Column {} is not found in the header {}'.format(field, list(header)))
+    index = header.index(field)
+
+    def get_field(row):
+        return parse_csv_value(row[index])
+    return get_field
+
+
+# Values of csv files are strings, they are converted so that predicates work the same on csv and json items
+def parse_csv_value(value):
+    if value == '':
+        return None
+    if value == 'True':
+        return True
+    if value == 'False':
+        return False
+    if value.isdecimal():
+        return int(value)
+    return value
+
+
+def _parse_header(header_line):
+    return tuple(next(read_csv_records([header_line]))[1])
+
+
+def _with_newline(line):
+    return line if line.endswith('\n') else line + '\n'
@@ -21,13 +21,20 @@
 # SOFTWARE.
 
 
+from ethereumetl.profiling import profiler
+
+
 class BaseJob(object):
     def run(self):
         try:
-            self._start()
-            self._export()
+            with profiler.job_stage('start'):
+                self._start()
+            with profiler.job_stage('export'):
+                self._export()
         finally:
-            self._end()
+            with profiler.job_stage('end'):
+                self._end()
+            profiler.report(type(self).__name__)
 
     def _start(self):
         pass
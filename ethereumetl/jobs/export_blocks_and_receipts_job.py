@@ -0,0 +1,172 @@
+# MIT License
+#
+# Copyright (c) 2018 Evgeny Medvedev, evge.medvedev@gmail.com
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+
+
+import json
+
+from ethereumetl.executors.batch_work_executor import BatchWorkExecutor
+from ethereumetl.jobs.base_job import BaseJob
+from ethereumetl.json_rpc_requests import generate_get_block_by_number_json_rpc, \
+    generate_get_block_receipts_json_rpc, generate_get_receipt_json_rpc
+from ethereumetl.mappers.block_mapper import EthBlockMapper
+from ethereumetl.mappers.receipt_log_mapper import EthReceiptLogMapper
+from ethereumetl.mappers.receipt_mapper import EthReceiptMapper
+from ethereumetl.mappers.token_transfer_mapper import EthTokenTransferMapper
+from ethereumetl.mappers.transaction_mapper import EthTransactionMapper
+from ethereumetl.profiling import profiler
+from ethereumetl.service.token_transfer_extractor import EthTokenTransferExtractor
+from ethereumetl.utils import rpc_response_batch_to_results, split_to_batches, validate_range
+
+
+# Exports blocks, transactions, receipts, logs and token transfers in one pass.
+# The receipts of a block batch are requested right after its blocks, using the transaction hashes from them,
+# and token transfers are extracted from the receipt logs, so every block is fetched once.
+# With block_receipts_method (see ethereumetl.providers.capabilities) receipts are requested per block.
+class ExportBlocksAndReceiptsJob(BaseJob):
+    def __init__(
+            self,
+            start_block,
+            end_block,
+            batch_size,
+            batch_web3_provider,
+            max_workers,
+            item_exporter,
+            export_blocks=True,
+            export_transactions=True,
+            export_receipts=True,
+            export_logs=True,
+            export_token_transfers=True,
+            block_receipts_method=None):
+        validate_range(start_block, end_block)
+        self.start_block = start_block
+        self.end_block = end_block
+
+        self.batch_size = batch_size
+        self.batch_web3_provider = batch_web3_provider
+        self.block_receipts_method = block_receipts_method
+
+        self.batch_work_executor = BatchWorkExecutor(batch_size, max_workers)
+        self.item_exporter = item_exporter
+
+        self.export_blocks = export_blocks
+        self.export_transactions = export_transactions
+        self.export_receipts = export_receipts
+        self.export_logs = export_logs
+        self.export_token_transfers = export_token_transfers
+        if not any([export_blocks, export_transactions, export_receipts, export_logs, export_token_transfers]):
+            raise ValueError('At least one of export_blocks, export_transactions, export_receipts, export_logs '
+                             'or export_token_transfers must be True')
+
+        self.block_mapper = EthBlockMapper()
+        self.transaction_mapper = EthTransactionMapper()
+        self.receipt_mapper = EthReceiptMapper()
+        self.receipt_log_mapper = EthReceiptLogMapper()
+        self.token_transfer_mapper = EthTokenTransferMapper()
+        self.token_transfer_extractor = EthTokenTransferExtractor()
+
+    def _start(self):
+        self.item_exporter.open()
+
+    def _export(self):
+        self.batch_work_executor.execute(
+            range(self.start_block, self.end_block + 1),
+            self._export_batch,
+            total_items=self.end_block - self.start_block + 1
+        )
+
+    def _export_batch(self, block_number_batch):
+        # Everything is requested before anything is exported,
+        # so that a batch retried after a failed request doesn't export duplicates
+        blocks = self._get_blocks(block_number_batch)
+        receipts = []
+        if self._receipts_needed():
+            if self.block_receipts_method is not None:
+                receipts = self._get_block_receipts([block.number for block in blocks if block.transaction_count > 0])
+            else:
+                receipts = self._get_receipts([tx.hash for block in blocks for tx in block.transactions])
+
+        with profiler.stage('mapping'):
+            for block in blocks:
+                self._export_block(block)
+            for receipt in receipts:
+                self._export_receipt(receipt)
+
+    def _receipts_needed(self):
+        return self.export_receipts or self.export_logs or self.export_token_transfers
+
+    def _get_blocks(self, block_numbers):
+        # Transactions are needed for the receipt requests even if they are not exported
+        include_transactions = self.export_transactions or self._receipts_needed()
+        with profiler.stage('request_building'):
+            blocks_rpc = list(generate_get_block_by_number_json_rpc(block_numbers, include_transactions))
+            request = json.dumps(blocks_rpc)
+        response = self.batch_web3_provider.make_request(request)
+        with profiler.stage('mapping'):
+            results = rpc_response_batch_to_results(response)
+            return [self.block_mapper.json_dict_to_block(result) for result in results]
+
+    def _get_receipts(self, transaction_hashes):
+        # A block batch can have thousands of transactions, receipts are requested in batches of the same size
+        receipts = []
+        for batch_start, batch_end in split_to_batches(0, len(transaction_hashes) - 1, self.batch_size):
+            with profiler.stage('request_building'):
+                receipts_rpc = list(generate_get_receipt_json_rpc(transaction_hashes[batch_start:batch_end + 1]))
+                request = json.dumps(receipts_rpc)
+            response = self.batch_web3_provider.make_request(request)
+            with profiler.stage('mapping'):
+                results = rpc_response_batch_to_results(response)
+                receipts.extend(self.receipt_mapper.json_dict_to_receipt(result) for result in results)
+        return receipts
+
+    def _get_block_receipts(self, block_numbers):
+        if len(block_numbers) == 0:
+            return []
+        with profiler.stage('request_building'):
+            receipts_rpc = list(generate_get_block_receipts_json_rpc(block_numbers, self.block_receipts_method))
+            request = json.dumps(receipts_rpc)
+        response = self.batch_web3_provider.make_request(request)
+        with profiler.stage('mapping'):
+            return [self.receipt_mapper.json_dict_to_receipt(result)
+                    for results in rpc_response_batch_to_results(response) for result in results]
+
+    def _export_block(self, block):
+        if self.export_blocks:
+            self.item_exporter.export_item(self.block_mapper.block_to_dict(block))
+        if self.export_transactions:
+            for tx in block.transactions:
+                self.item_exporter.export_item(self.transaction_mapper.transaction_to_dict(tx))
+
+    def _export_receipt(self, receipt):
+        if self.export_receipts:
+            self.item_exporter.export_item(self.receipt_mapper.receipt_to_dict(receipt))
+        for log in receipt.logs:
+            if self.export_logs:
+                self.item_exporter.export_item(self.receipt_log_mapper.receipt_log_to_dict(log))
+            if self.export_token_transfers:
+                token_transfer = self.token_transfer_extractor.extract_transfer_from_log(log)
+                if token_transfer is not None:
+                    self.item_exporter.export_item(self.token_transfer_mapper.token_transfer_to_dict(token_transfer))
+
+    def _end(self):
+        self.batch_work_executor.shutdown()
+        self.item_exporter.close()
@@ -28,6 +28,7 @@ from ethereumetl.jobs.base_job import BaseJob
 from ethereumetl.json_rpc_requests import generate_get_block_by_number_json_rpc
 from ethereumetl.mappers.block_mapper import EthBlockMapper
 from ethereumetl.mappers.transaction_mapper import EthTransactionMapper
+from ethereumetl.profiling import profiler
 from ethereumetl.utils import rpc_response_batch_to_results, validate_range
 
 
@@ -57,8 +58,7 @@ class ExportBlocksJob(BaseJob):
         if not self.export_blocks and not self.export_transactions:
             raise ValueError('At least one of export_blocks or export_transactions must be True')
 
-        self.block_mapper = EthBlockMapper()
-        self.transaction_mapper = EthTransactionMapper()
+        self.response_mapper = BlockResponseMapper(export_blocks, export_transactions)
 
     def _start(self):
         self.item_exporter.open()
@@ -71,21 +71,38 @@ class ExportBlocksJob(BaseJob):
         )
 
     def _export_batch(self, block_number_batch):
-        blocks_rpc = list(generate_get_block_by_number_json_rpc(block_number_batch, self.export_transactions))
-        response = self.batch_web3_provider.make_request(json.dumps(blocks_rpc))
-        results = rpc_response_batch_to_results(response)
-        blocks = [self.block_mapper.json_dict_to_block(result) for result in results]
-
-        for block in blocks:
-            self._export_block(block)
-
-    def _export_block(self, block):
-        if self.export_blocks:
-            self.item_exporter.export_item(self.block_mapper.block_to_dict(block))
-        if self.export_transactions:
-            for tx in block.transactions:
-                self.item_exporter.export_item(self.transaction_mapper.transaction_to_dict(tx))
+        with profiler.stage('request_building'):
+            blocks_rpc = list(generate_get_block_by_number_json_rpc(block_number_batch, self.export_transactions))
+            request = json.dumps(blocks_rpc)
+        response = self.batch_web3_provider.make_request(request)
+        with profiler.stage('mapping'):
+            for item in self.response_mapper.response_to_items(blocks_rpc, response):
+                self.item_exporter.export_item(item)
 
     def _end(self):
         self.batch_work_executor.shutdown()
         self.item_exporter.close()
+
+
+# Maps eth_getBlockByNumber batch responses to block and transaction items.
+# Shared by ExportBlocksJob and ReplayRawArchiveJob, so it must be picklable
+class BlockResponseMapper(object):
+    def __init__(self, export_blocks=True, export_transactions=True):
+        self.export_blocks = export_blocks
+        self.export_transactions = export_transactions
+        self.block_mapper = EthBlockMapper()
+        self.transaction_mapper = EthTransactionMapper()
+
+    def accepts(self, requests):
+        # Blocks requested without transactions can't be used to export transactions
+        return all(request['method'] == 'eth_getBlockByNumber'
+                   and (not self.export_transactions or request['params'][1]) for request in requests)
+
+    def response_to_items(self, requests, response):
+        for result in rpc_response_batch_to_results(response):
+            block = self.block_mapper.json_dict_to_block(result)
+            if self.export_blocks:
+                yield self.block_mapper.block_to_dict(block)
+            if self.export_transactions:
+                for tx in block.transactions:
+                    yield self.transaction_mapper.transaction_to_dict(tx)
@@ -29,7 +29,7 @@ from ethereumetl.json_rpc_requests import generate_get_code_json_rpc
 from ethereumetl.mappers.contract_mapper import EthContractMapper
 
 # Exports contracts bytecode
-from ethereumetl.service.eth_contract_service import EthContractService
+from ethereumetl.service.eth_contract_analyzer import EthContractAnalyzer
 
 
 class ExportContractsJob(BaseJob):
@@ -39,15 +39,24 @@ class ExportContractsJob(BaseJob):
             batch_size,
             batch_web3_provider,
             max_workers,
-            item_exporter):
+            item_exporter,
+            contract_analysis_cache=None,
+            analysis_max_workers=None,
+            interfaces=None,
+            contract_analyzer=None):
         self.batch_web3_provider = batch_web3_provider
         self.contract_addresses_iterable = contract_addresses_iterable
 
         self.batch_work_executor = BatchWorkExecutor(batch_size, max_workers)
         self.item_exporter = item_exporter
 
-        self.contract_service = EthContractService()
-        self.contract_mapper = EthContractMapper()
+        # Bytecode analysis runs in a separate process pool if analysis_max_workers is given.
+        # A given contract_analyzer is shared with other jobs, so it's shut down by the caller
+        self.owns_contract_analyzer = contract_analyzer is None
+        if contract_analyzer is None:
+            contract_analyzer = EthContractAnalyzer(analysis_max_workers, contract_analysis_cache, interfaces)
+        self.contract_analyzer = contract_analyzer
+        self.response_mapper = ContractResponseMapper(self.contract_analyzer)
 
     def _start(self):
         self.item_exporter.open()
@@ -59,30 +68,42 @@ class ExportContractsJob(BaseJob):
         contracts_code_rpc = list(generate_get_code_json_rpc(contract_addresses))
         response_batch = self.batch_web3_provider.make_request(json.dumps(contracts_code_rpc))
 
-        contracts = []
-        for response in response_batch:
-            # request id is the index of the contract address in contract_addresses list
-            request_id = response['id']
-            result = response['result']
-
-            contract_address = contract_addresses[request_id]
-            contract = self._get_contract(contract_address, result)
-            contracts.append(contract)
+        for item in self.response_mapper.response_to_items(contracts_code_rpc, response_batch):
+            self.item_exporter.export_item(item)
 
-        for contract in contracts:
-            self.item_exporter.export_item(self.contract_mapper.contract_to_dict(contract))
+    def _end(self):
+        self.batch_work_executor.shutdown()
+        if self.owns_contract_analyzer:
+            self.contract_analyzer.shutdown()
+        self.item_exporter.close()
 
-    def _get_contract(self, contract_address, rpc_result):
-        contract = self.contract_mapper.rpc_result_to_contract(contract_address, rpc_result)
-        bytecode = contract.bytecode
-        function_sighashes = self.contract_service.get_function_sighashes(bytecode)
 
-        contract.function_sighashes = function_sighashes
-        contract.is_erc20 = self.contract_service.is_erc20_contract(function_sighashes)
-        contract.is_erc721 = self.contract_service.is_erc721_contract(function_sighashes)
+# Maps eth_getCode batch responses to contract items.
+# Shared by ExportContractsJob and ReplayRawArchiveJob, so it must be picklable when
+# the contract_analyzer doesn't use a process pool
+class ContractResponseMapper(object):
+    def __init__(self, contract_analyzer=None):
+        self.contract_analyzer = contract_analyzer or EthContractAnalyzer()
+        self.contract_mapper = EthContractMapper()
 
-        return contract
+    def accepts(self, requests):
+        return all(request['method'] == 'eth_getCode' for request in requests)
 
-    def _end(self):
-        self.batch_work_executor.shutdown()
-        self.item_exporter.close()
+    def response_to_items(self, requests, response):
+        contracts = []
+        for response_item in response:
+            # request id is the index of the contract address in the batch
+            request_id = response_item['id']
+            result = response_item['result']
+
+            contract_address = requests[request_id]['params'][0]
+            contracts.append(self.contract_mapper.rpc_result_to_contract(contract_address, result))
+
+        analyses = self.contract_analyzer.analyze([contract.bytecode for contract in contracts])
+        for contract, analysis in zip(contracts, analyses):
+            contract.function_sighashes = analysis['function_sighashes']
+            contract.is_erc20 = analysis['is_erc20']
+            contract.is_erc721 = analysis['is_erc721']
+            contract.interfaces = analysis.get('interfaces', {})
+
+        return [self.contract_mapper.contract_to_dict(contract) for contract in contracts]
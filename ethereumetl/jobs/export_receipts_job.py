@@ -25,13 +25,19 @@ import json
 
 from ethereumetl.jobs.base_job import BaseJob
 from ethereumetl.executors.batch_work_executor import BatchWorkExecutor
-from ethereumetl.json_rpc_requests import generate_get_receipt_json_rpc
+from ethereumetl.json_rpc_requests import generate_get_block_receipts_json_rpc, generate_get_receipt_json_rpc
 from ethereumetl.mappers.receipt_log_mapper import EthReceiptLogMapper
 from ethereumetl.mappers.receipt_mapper import EthReceiptMapper
+from ethereumetl.mappers.token_transfer_mapper import EthTokenTransferMapper
+from ethereumetl.profiling import profiler
+from ethereumetl.providers.capabilities import BLOCK_RECEIPTS_METHODS
+from ethereumetl.service.token_transfer_extractor import EthTokenTransferExtractor
 from ethereumetl.utils import rpc_response_batch_to_results
 
 
-# Exports receipts and logs
+# Exports receipts and logs.
+# Receipts are requested by transaction hash, or by block number with block_receipts_method
+# (see ethereumetl.providers.capabilities) if block_numbers_iterable is given instead of transaction hashes.
 class ExportReceiptsJob(BaseJob):
     def __init__(
             self,
@@ -41,9 +47,17 @@ class ExportReceiptsJob(BaseJob):
             max_workers,
             item_exporter,
             export_receipts=True,
-            export_logs=True):
+            export_logs=True,
+            block_numbers_iterable=None,
+            block_receipts_method=None):
         self.batch_web3_provider = batch_web3_provider
         self.transaction_hashes_iterable = transaction_hashes_iterable
+        self.block_numbers_iterable = block_numbers_iterable
+        self.block_receipts_method = block_receipts_method
+        if (transaction_hashes_iterable is None) == (block_numbers_iterable is None):
+            raise ValueError('Exactly one of transaction_hashes_iterable or block_numbers_iterable must be provided')
+        if block_numbers_iterable is not None and block_receipts_method is None:
+            raise ValueError('block_receipts_method must be provided with block_numbers_iterable')
 
         self.batch_work_executor = BatchWorkExecutor(batch_size, max_workers)
         self.item_exporter = item_exporter
@@ -53,30 +67,69 @@ class ExportReceiptsJob(BaseJob):
         if not self.export_receipts and not self.export_logs:
             raise ValueError('At least one of export_receipts or export_logs must be True')
 
-        self.receipt_mapper = EthReceiptMapper()
-        self.receipt_log_mapper = EthReceiptLogMapper()
+        self.response_mapper = ReceiptResponseMapper(export_receipts, export_logs)
 
     def _start(self):
         self.item_exporter.open()
 
     def _export(self):
-        self.batch_work_executor.execute(self.transaction_hashes_iterable, self._export_receipts)
+        if self.block_numbers_iterable is not None:
+            self.batch_work_executor.execute(self.block_numbers_iterable, self._export_block_receipts)
+        else:
+            self.batch_work_executor.execute(self.transaction_hashes_iterable, self._export_receipts)
 
     def _export_receipts(self, transaction_hashes):
-        receipts_rpc = list(generate_get_receipt_json_rpc(transaction_hashes))
-        response = self.batch_web3_provider.make_request(json.dumps(receipts_rpc))
-        results = rpc_response_batch_to_results(response)
-        receipts = [self.receipt_mapper.json_dict_to_receipt(result) for result in results]
-        for receipt in receipts:
-            self._export_receipt(receipt)
-
-    def _export_receipt(self, receipt):
-        if self.export_receipts:
-            self.item_exporter.export_item(self.receipt_mapper.receipt_to_dict(receipt))
-        if self.export_logs:
-            for log in receipt.logs:
-                self.item_exporter.export_item(self.receipt_log_mapper.receipt_log_to_dict(log))
+        with profiler.stage('request_building'):
+            receipts_rpc = list(generate_get_receipt_json_rpc(transaction_hashes))
+            request = json.dumps(receipts_rpc)
+        response = self.batch_web3_provider.make_request(request)
+        with profiler.stage('mapping'):
+            for item in self.response_mapper.response_to_items(receipts_rpc, response):
+                self.item_exporter.export_item(item)
+
+    def _export_block_receipts(self, block_numbers):
+        with profiler.stage('request_building'):
+            receipts_rpc = list(generate_get_block_receipts_json_rpc(block_numbers, self.block_receipts_method))
+            request = json.dumps(receipts_rpc)
+        response = self.batch_web3_provider.make_request(request)
+        with profiler.stage('mapping'):
+            for item in self.response_mapper.response_to_items(receipts_rpc, response):
+                self.item_exporter.export_item(item)
 
     def _end(self):
         self.batch_work_executor.shutdown()
         self.item_exporter.close()
+
+
+# Maps eth_getTransactionReceipt and block receipts batch responses to receipt and log items,
+# and to token transfer items extracted from the logs if export_token_transfers is True.
+# Shared by ExportReceiptsJob and ReplayRawArchiveJob, so it must be picklable
+class ReceiptResponseMapper(object):
+    def __init__(self, export_receipts=True, export_logs=True, export_token_transfers=False):
+        self.export_receipts = export_receipts
+        self.export_logs = export_logs
+        self.export_token_transfers = export_token_transfers
+        self.receipt_mapper = EthReceiptMapper()
+        self.receipt_log_mapper = EthReceiptLogMapper()
+        self.token_transfer_mapper = EthTokenTransferMapper()
+        self.token_transfer_extractor = EthTokenTransferExtractor()
+
+    def accepts(self, requests):
+        return all(request['method'] == 'eth_getTransactionReceipt' or request['method'] in BLOCK_RECEIPTS_METHODS
+                   for request in requests)
+
+    def response_to_items(self, requests, response):
+        # Batches are built with a single method. Block receipts methods return a list of receipts for each block
+        block_receipts = len(requests) > 0 and requests[0]['method'] in BLOCK_RECEIPTS_METHODS
+        for result in rpc_response_batch_to_results(response):
+            for receipt_result in (result if block_receipts else [result]):
+                receipt = self.receipt_mapper.json_dict_to_receipt(receipt_result)
+                if self.export_receipts:
+                    yield self.receipt_mapper.receipt_to_dict(receipt)
+                for log in receipt.logs:
+                    if self.export_logs:
+                        yield self.receipt_log_mapper.receipt_log_to_dict(log)
+                    if self.export_token_transfers:
+                        token_transfer = self.token_transfer_extractor.extract_transfer_from_log(log)
+                        if token_transfer is not None:
+                            yield self.token_transfer_mapper.token_transfer_to_dict(token_transfer)
@@ -24,16 +24,41 @@
 from ethereumetl.executors.batch_work_executor import BatchWorkExecutor
 from ethereumetl.jobs.base_job import BaseJob
 from ethereumetl.mappers.token_mapper import EthTokenMapper
-from ethereumetl.service.eth_token_service import EthTokenService
+from ethereumetl.service.eth_token_service import EthBatchTokenService, EthMulticallTokenService, EthTokenService
 
 
+# If batch_web3_provider is given token functions are called for batch_size tokens in a single JSON RPC batch,
+# otherwise tokens are exported one by one with web3.
+# With multicall the calls for a batch are aggregated into a few Multicall3 calls.
+# block is the block number the calls are pinned to, it's only supported with batch_web3_provider.
+# Tokens found in token_cache are not fetched again
 class ExportTokensJob(BaseJob):
-    def __init__(self, web3, item_exporter, token_addresses_iterable, max_workers):
+    def __init__(
+            self,
+            web3,
+            item_exporter,
+            token_addresses_iterable,
+            max_workers,
+            batch_web3_provider=None,
+            batch_size=100,
+            multicall=False,
+            block='latest',
+            token_cache=None):
         self.item_exporter = item_exporter
         self.token_addresses_iterable = token_addresses_iterable
-        self.batch_work_executor = BatchWorkExecutor(1, max_workers)
 
-        self.token_service = EthTokenService(web3, clean_user_provided_content)
+        if batch_web3_provider is not None:
+            self.batch_work_executor = BatchWorkExecutor(batch_size, max_workers)
+            if multicall:
+                self.batch_token_service = EthMulticallTokenService(
+                    batch_web3_provider, clean_user_provided_content, block=block, token_cache=token_cache)
+            else:
+                self.batch_token_service = EthBatchTokenService(
+                    batch_web3_provider, clean_user_provided_content, block=block, token_cache=token_cache)
+        else:
+            self.batch_work_executor = BatchWorkExecutor(1, max_workers)
+            self.batch_token_service = None
+        self.token_service = EthTokenService(web3, clean_user_provided_content, token_cache)
         self.token_mapper = EthTokenMapper()
 
     def _start(self):
@@ -43,8 +68,12 @@ class ExportTokensJob(BaseJob):
         self.batch_work_executor.execute(self.token_addresses_iterable, self._export_tokens)
 
     def _export_tokens(self, token_addresses):
-        for token_address in token_addresses:
-            self._export_token(token_address)
+        if self.batch_token_service is not None:
+            for token in self.batch_token_service.get_tokens(token_addresses):
+                self.item_exporter.export_item(self.token_mapper.token_to_dict(token))
+        else:
+            for token_address in token_addresses:
+                self._export_token(token_address)
 
     def _export_token(self, token_address):
         token = self.token_service.get_token(token_address)
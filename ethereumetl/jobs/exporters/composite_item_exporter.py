@@ -20,35 +20,52 @@
 # OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
 # SOFTWARE.
 import logging
+import os
 
 from ethereumetl.atomic_counter import AtomicCounter
 from ethereumetl.exporters import CsvItemExporter, JsonLinesItemExporter
 from ethereumetl.file_utils import get_file_handle, close_silently
+from ethereumetl.metrics import registry
+from ethereumetl.profiling import profiler
+
+ITEMS_EXPORTED = registry.counter(
+    'ethereumetl_exporter_items_total', 'Items written by exporters.', ['item_type'])
+BYTES_EXPORTED = registry.counter(
+    'ethereumetl_exporter_bytes_total', 'Bytes written by exporters, before compression.', ['item_type'])
 
 
 class CompositeItemExporter:
-    def __init__(self, filename_mapping, field_mapping):
+    def __init__(self, filename_mapping, field_mapping, append=False):
+        """If append is True items are appended to existing files, CSV headers are only written to empty files"""
         self.filename_mapping = filename_mapping
         self.field_mapping = field_mapping
+        self.append = append
 
         self.file_mapping = {}
         self.exporter_mapping = {}
         self.counter_mapping = {}
+        self.items_metric_mapping = {}
 
         self.logger = logging.getLogger('CompositeItemExporter')
 
     def open(self):
         for item_type, filename in self.filename_mapping.items():
-            file = get_file_handle(filename, binary=True)
+            append_to_file = self.append and is_file(filename)
+            include_headers_line = not (append_to_file and os.path.exists(filename) and os.path.getsize(filename) > 0)
+            file = get_file_handle(filename, mode='a' if append_to_file else 'w', binary=True)
+            if filename is not None:
+                file = MeteredFile(file, BYTES_EXPORTED.labels(item_type))
             fields = self.field_mapping[item_type]
             self.file_mapping[item_type] = file
             if str(filename).endswith('.json'):
                 item_exporter = JsonLinesItemExporter(file, fields_to_export=fields)
             else:
-                item_exporter = CsvItemExporter(file, fields_to_export=fields)
+                item_exporter = CsvItemExporter(
+                    file, fields_to_export=fields, include_headers_line=include_headers_line)
             self.exporter_mapping[item_type] = item_exporter
 
             self.counter_mapping[item_type] = AtomicCounter()
+            self.items_metric_mapping[item_type] = ITEMS_EXPORTED.labels(item_type)
 
     def export_item(self, item):
         item_type = item.get('type', None)
@@ -58,11 +75,19 @@ class CompositeItemExporter:
         exporter = self.exporter_mapping[item_type]
         if exporter is None:
             raise ValueError('Exporter for item type {} not found'.format(item_type))
-        exporter.export_item(item)
+        with profiler.stage('serialization'):
+            exporter.export_item(item)
 
         counter = self.counter_mapping[item_type]
         if counter is not None:
             counter.increment()
+        self.items_metric_mapping[item_type].inc()
+
+    def flush(self):
+        for file in self.file_mapping.values():
+            flush = getattr(file, 'flush', None)
+            if flush is not None:
+                flush()
 
     def close(self):
         for item_type, file in self.file_mapping.items():
@@ -70,3 +95,22 @@ class CompositeItemExporter:
             counter = self.counter_mapping[item_type]
             if counter is not None:
                 self.logger.info('{} items exported: {}'.format(item_type, counter.increment() - 1))
+
+
+def is_file(filename):
+    return filename is not None and filename != '-'
+
+
+# Counts bytes written to the file
+class MeteredFile(object):
+    def __init__(self, file, bytes_counter):
+        self._file = file
+        self._bytes_counter = bytes_counter
+
+    def write(self, data):
+        self._bytes_counter.inc(len(data))
+        with profiler.stage('write'):
+            return self._file.write(data)
+
+    def __getattr__(self, name):
+        return getattr(self._file, name)
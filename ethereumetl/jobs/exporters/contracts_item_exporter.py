@@ -32,12 +32,18 @@ FIELDS_TO_EXPORT = [
 ]
 
 
-def contracts_item_exporter(contracts_output):
+def contracts_item_exporter(contracts_output, interfaces=None):
+    """interfaces are the additional interfaces checked for contracts, exported in is_<interface> fields"""
+    fields = list(FIELDS_TO_EXPORT)
+    for interface in (interfaces or []):
+        # erc20 and erc721 are always exported
+        if 'is_' + interface not in fields:
+            fields.append('is_' + interface)
     return CompositeItemExporter(
         filename_mapping={
             'contract': contracts_output
         },
         field_mapping={
-            'contract': FIELDS_TO_EXPORT
+            'contract': fields
         }
     )
@@ -0,0 +1,69 @@
+# MIT License
+#
+# Copyright (c) 2018 Evgeny Medvedev, evge.medvedev@gmail.com
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+
+
+from ethereumetl.jobs.exporters.blocks_and_transactions_item_exporter import BLOCK_FIELDS_TO_EXPORT, \
+    TRANSACTION_FIELDS_TO_EXPORT
+from ethereumetl.jobs.exporters.composite_item_exporter import CompositeItemExporter
+from ethereumetl.jobs.exporters.receipts_and_logs_item_exporter import LOG_FIELDS_TO_EXPORT, \
+    RECEIPT_FIELDS_TO_EXPORT
+from ethereumetl.jobs.exporters.token_transfers_item_exporter import \
+    FIELDS_TO_EXPORT as TOKEN_TRANSFER_FIELDS_TO_EXPORT
+
+RETRACTED_BLOCK_FIELDS_TO_EXPORT = [
+    'block_number',
+    'block_hash'
+]
+
+FIELD_MAPPING = {
+    'block': BLOCK_FIELDS_TO_EXPORT,
+    'transaction': TRANSACTION_FIELDS_TO_EXPORT,
+    'receipt': RECEIPT_FIELDS_TO_EXPORT,
+    'log': LOG_FIELDS_TO_EXPORT,
+    'token_transfer': TOKEN_TRANSFER_FIELDS_TO_EXPORT,
+    'retracted_block': RETRACTED_BLOCK_FIELDS_TO_EXPORT
+}
+
+
+def stream_item_exporter(
+        blocks_output=None,
+        transactions_output=None,
+        receipts_output=None,
+        logs_output=None,
+        token_transfers_output=None,
+        retracted_blocks_output=None):
+    """Item types without output are not exported. Items are appended to existing files"""
+    filename_mapping = {
+        'block': blocks_output,
+        'transaction': transactions_output,
+        'receipt': receipts_output,
+        'log': logs_output,
+        'token_transfer': token_transfers_output,
+        'retracted_block': retracted_blocks_output
+    }
+    filename_mapping = {item_type: output for item_type, output in filename_mapping.items() if output is not None}
+    return CompositeItemExporter(
+        filename_mapping=filename_mapping,
+        field_mapping={item_type: FIELD_MAPPING[item_type] for item_type in filename_mapping},
+        append=True
+    )
@@ -20,6 +20,7 @@
 # OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
 # SOFTWARE.
 
+from ethereumetl.chunked_reader import ChunkedItemReader
 from ethereumetl.executors.batch_work_executor import BatchWorkExecutor
 from ethereumetl.jobs.base_job import BaseJob
 from ethereumetl.mappers.token_transfer_mapper import EthTokenTransferMapper
@@ -27,6 +28,8 @@ from ethereumetl.mappers.receipt_log_mapper import EthReceiptLogMapper
 from ethereumetl.service.token_transfer_extractor import EthTokenTransferExtractor
 
 
+# logs_iterable is an iterable of log dicts. If it is a ChunkedItemReader with max_workers, logs are parsed
+# and transfers are extracted in the reader processes, instead of the batch work executor threads.
 class ExtractTokenTransfersJob(BaseJob):
     def __init__(
             self,
@@ -39,26 +42,46 @@ class ExtractTokenTransfersJob(BaseJob):
         self.batch_work_executor = BatchWorkExecutor(batch_size, max_workers)
         self.item_exporter = item_exporter
 
-        self.receipt_log_mapper = EthReceiptLogMapper()
-        self.token_transfer_mapper = EthTokenTransferMapper()
-        self.token_transfer_extractor = EthTokenTransferExtractor()
-
     def _start(self):
         self.item_exporter.open()
 
     def _export(self):
-        self.batch_work_executor.execute(self.logs_iterable, self._extract_transfers)
+        if isinstance(self.logs_iterable, ChunkedItemReader) and self.logs_iterable.max_workers:
+            # Progress is logged by the batch work executor, which finishes it on shutdown
+            progress_logger = self.batch_work_executor.progress_logger
+            progress_logger.start()
+            for log_count, token_transfers in self.logs_iterable.read_batches(_count_and_extract_token_transfers):
+                self._export_token_transfers(token_transfers)
+                progress_logger.track(log_count)
+        else:
+            self.batch_work_executor.execute(self.logs_iterable, self._extract_transfers)
 
     def _extract_transfers(self, log_dicts):
-        for log_dict in log_dicts:
-            self._extract_transfer(log_dict)
+        self._export_token_transfers(extract_token_transfers(log_dicts))
 
-    def _extract_transfer(self, log_dict):
-        log = self.receipt_log_mapper.dict_to_receipt_log(log_dict)
-        token_transfer = self.token_transfer_extractor.extract_transfer_from_log(log)
-        if token_transfer is not None:
-            self.item_exporter.export_item(self.token_transfer_mapper.token_transfer_to_dict(token_transfer))
+    def _export_token_transfers(self, token_transfers):
+        for token_transfer in token_transfers:
+            self.item_exporter.export_item(token_transfer)
 
     def _end(self):
         self.batch_work_executor.shutdown()
         self.item_exporter.close()
+
+
+# Top level functions so that they can be pickled and executed in a worker process
+def extract_token_transfers(log_dicts):
+    receipt_log_mapper = EthReceiptLogMapper()
+    token_transfer_mapper = EthTokenTransferMapper()
+    token_transfer_extractor = EthTokenTransferExtractor()
+
+    token_transfers = []
+    for log_dict in log_dicts:
+        log = receipt_log_mapper.dict_to_receipt_log(log_dict)
+        token_transfer = token_transfer_extractor.extract_transfer_from_log(log)
+        if token_transfer is not None:
+            token_transfers.append(token_transfer_mapper.token_transfer_to_dict(token_transfer))
+    return token_transfers
+
+
+def _count_and_extract_token_transfers(log_dicts):
+    return len(log_dicts), extract_token_transfers(log_dicts)
@@ -0,0 +1,121 @@
+# MIT License
+#
+# Copyright (c) 2018 Evgeny Medvedev, evge.medvedev@gmail.com
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+
+
+import collections
+from concurrent.futures import ProcessPoolExecutor
+
+from ethereumetl.jobs.base_job import BaseJob
+from ethereumetl.progress_logger import ProgressLogger
+from ethereumetl.providers.raw_archive import get_duplicate_request_ids, parse_raw_archive_line, \
+    read_raw_archive_lines, remove_requests
+
+DEFAULT_LINES_PER_TASK = 20
+
+
+# Exports items from raw archives written by RawCaptureBatchProvider, without calling the node.
+# response_mappers are the response mappers of the export jobs, e.g. BlockResponseMapper, ReceiptResponseMapper
+# and ContractResponseMapper. Every archived batch is mapped by the mappers that accept it.
+# Parsing and mapping run in a process pool if max_workers is given, items are exported in archive order.
+# Requests archived more than once in an archive, e.g. when a batch was retried, are mapped once.
+class ReplayRawArchiveJob(BaseJob):
+    def __init__(
+            self,
+            raw_archive_paths,
+            response_mappers,
+            item_exporter,
+            max_workers=None,
+            lines_per_task=DEFAULT_LINES_PER_TASK):
+        self.raw_archive_paths = raw_archive_paths
+        self.response_mappers = response_mappers
+        self.item_exporter = item_exporter
+        self.max_workers = max_workers
+        self.lines_per_task = lines_per_task
+
+        self.progress_logger = ProgressLogger(name='raw archive replay')
+        self._executor = None
+
+    def _start(self):
+        if self.max_workers is not None and self.max_workers > 0:
+            self._executor = ProcessPoolExecutor(max_workers=self.max_workers)
+        self.item_exporter.open()
+
+    def _export(self):
+        self.progress_logger.start()
+        if self._executor is None:
+            for lines in self._iterate_tasks():
+                self._export_items(map_raw_archive_lines(self.response_mappers, lines), len(lines))
+        else:
+            # A few tasks per worker are queued, so that workers don't wait for the parent
+            # and the archive is not read into memory all at once
+            futures = collections.deque()
+            for lines in self._iterate_tasks():
+                if len(futures) >= self.max_workers * 2:
+                    self._export_future(futures.popleft())
+                futures.append((self._executor.submit(map_raw_archive_lines, self.response_mappers, lines), len(lines)))
+            while len(futures) > 0:
+                self._export_future(futures.popleft())
+        self.progress_logger.finish()
+
+    def _iterate_tasks(self):
+        lines = []
+        for path in self.raw_archive_paths:
+            # Every partition has its own archive, so duplicates are only looked for within an archive
+            seen_request_keys = set()
+            for line in read_raw_archive_lines(path):
+                lines.append((line, get_duplicate_request_ids(line, seen_request_keys)))
+                if len(lines) >= self.lines_per_task:
+                    yield lines
+                    lines = []
+        if len(lines) > 0:
+            yield lines
+
+    def _export_future(self, future_and_line_count):
+        future, line_count = future_and_line_count
+        self._export_items(future.result(), line_count)
+
+    def _export_items(self, items, line_count):
+        for item in items:
+            self.item_exporter.export_item(item)
+        self.progress_logger.track(line_count)
+
+    def _end(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+        self.item_exporter.close()
+
+
+# Top level function so that it can be pickled and executed in a worker process.
+# lines are pairs of an archive line and the ids of its requests that were already archived
+def map_raw_archive_lines(response_mappers, lines):
+    items = []
+    for line, duplicate_request_ids in lines:
+        requests, response = parse_raw_archive_line(line)
+        if len(duplicate_request_ids) > 0:
+            requests, response = remove_requests(requests, response, duplicate_request_ids)
+            if len(requests) == 0:
+                continue
+        for response_mapper in response_mappers:
+            if response_mapper.accepts(requests):
+                items.extend(response_mapper.response_to_items(requests, response))
+    return items
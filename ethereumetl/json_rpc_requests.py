@@ -39,6 +39,15 @@ def generate_get_receipt_json_rpc(transaction_hashes):
         )
 
 
+def generate_get_block_receipts_json_rpc(block_numbers, method='eth_getBlockReceipts'):
+    for idx, block_number in enumerate(block_numbers):
+        yield generate_json_rpc(
+            method=method,
+            params=[hex(block_number)],
+            request_id=idx
+        )
+
+
 def generate_get_code_json_rpc(contract_addresses, block='latest'):
     for idx, contract_address in enumerate(contract_addresses):
         yield generate_json_rpc(
@@ -48,6 +57,16 @@ def generate_get_code_json_rpc(contract_addresses, block='latest'):
         )
 
 
+def generate_eth_call_json_rpc(calls, block='latest'):
+    """calls is a list of dicts with 'to' and 'data' keys"""
+    for idx, call in enumerate(calls):
+        yield generate_json_rpc(
+            method='eth_call',
+            params=[call, hex(block) if isinstance(block, int) else block],
+            request_id=idx
+        )
+
+
 def generate_json_rpc(method, params, request_id=1):
     return {
         'jsonrpc': '2.0',
@@ -34,7 +34,7 @@ class EthContractMapper(object):
         return contract
 
     def contract_to_dict(self, contract):
-        return {
+        result = {
             'type': 'contract',
             'address': contract.address,
             'bytecode': contract.bytecode,
@@ -42,3 +42,6 @@ class EthContractMapper(object):
             'is_erc20': contract.is_erc20,
             'is_erc721': contract.is_erc721
         }
+        for interface, is_implemented in contract.interfaces.items():
+            result['is_' + interface] = is_implemented
+        return result
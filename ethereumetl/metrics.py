@@ -0,0 +1,213 @@
+# MIT License
+#
+# Copyright (c) 2018 Evgeny Medvedev, evge.medvedev@gmail.com
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+
+
+import logging
+import sys
+import threading
+from http.server import HTTPServer
+from socketserver import ThreadingMixIn
+
+try:
+    import resource
+except ImportError:
+    # Not available on Windows
+    resource = None
+
+try:
+    import prometheus_client
+except ImportError:
+    # Optional, metrics are not collected without it
+    prometheus_client = None
+
+DEFAULT_BUCKETS = (.005, .01, .025, .05, .1, .25, .5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+logger = logging.getLogger('metrics')
+
+
+# Creates the metrics of all jobs in the process in a prometheus_client registry, they are exposed with
+# start_http_server or MetricsTextfileWriter. Metrics do nothing when prometheus_client is not installed.
+class MetricsRegistry(object):
+    def __init__(self, collector_registry=None):
+        if collector_registry is None and prometheus_client is not None:
+            collector_registry = prometheus_client.CollectorRegistry()
+        self.collector_registry = collector_registry
+        self._metrics = {}
+        self._lock = threading.Lock()
+
+    def counter(self, name, documentation, label_names=()):
+        return self._get_or_create('counter', name, documentation, label_names)
+
+    def gauge(self, name, documentation, label_names=()):
+        return self._get_or_create('gauge', name, documentation, label_names)
+
+    def histogram(self, name, documentation, label_names=(), buckets=DEFAULT_BUCKETS):
+        return self._get_or_create('histogram', name, documentation, label_names, buckets=buckets)
+
+    def get(self, name):
+        with self._lock:
+            return self._metrics.get(name)
+
+    def get_sample_value(self, name, labels=None):
+        """Returns the value of a sample, e.g. requests_total or duration_seconds_count. None if it's not found"""
+        if self.collector_registry is None:
+            return None
+        return self.collector_registry.get_sample_value(name, labels)
+
+    def generate_text(self):
+        _check_prometheus_client()
+        return prometheus_client.generate_latest(self.collector_registry).decode('utf-8')
+
+    def _get_or_create(self, metric_type, name, documentation, label_names, **kwargs):
+        with self._lock:
+            metric = self._metrics.get(name)
+            if metric is None:
+                metric = Metric(
+                    metric_type, name, documentation, tuple(label_names), self.collector_registry, **kwargs)
+                self._metrics[name] = metric
+            elif metric.type != metric_type or metric.label_names != tuple(label_names):
+                raise ValueError('Metric {} is already registered with a different type or labels'.format(name))
+            return metric
+
+
+class Metric(object):
+    def __init__(self, metric_type, name, documentation, label_names, collector_registry, **kwargs):
+        self.type = metric_type
+        self.name = name
+        self.label_names = label_names
+        if collector_registry is None:
+            self._metric = None
+        else:
+            metric_class = getattr(prometheus_client, metric_type.capitalize())
+            self._metric = metric_class(name, documentation, label_names, registry=collector_registry, **kwargs)
+
+    def labels(self, *label_values):
+        """Returns the child metric for the label values, metrics without labels are updated with labels().
+        Callers on hot paths should keep the returned child"""
+        if len(label_values) != len(self.label_names):
+            raise ValueError('Metric {} expects labels {}'.format(self.name, self.label_names))
+        if self._metric is None:
+            return _NOOP_METRIC
+        if len(label_values) == 0:
+            return self._metric
+        return self._metric.labels(*label_values)
+
+
+class _NoopMetric(object):
+    def inc(self, amount=1):
+        pass
+
+    def dec(self, amount=1):
+        pass
+
+    def set(self, value):
+        pass
+
+    def set_function(self, function):
+        pass
+
+    def observe(self, value):
+        pass
+
+    def time(self):
+        return self
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        pass
+
+
+_NOOP_METRIC = _NoopMetric()
+
+
+def _check_prometheus_client():
+    if prometheus_client is None:
+        raise ImportError('prometheus_client is required to expose metrics. Install it with '
+                          'pip install prometheus_client')
+
+
+registry = MetricsRegistry(prometheus_client.REGISTRY if prometheus_client is not None else None)
+
+
+def get_peak_rss_bytes():
+    """Returns the peak resident set size of the process, None if it's not available on the platform"""
+    if resource is None:
+        return None
+    max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in kilobytes on Linux and in bytes on macOS
+    return max_rss if sys.platform == 'darwin' else max_rss * 1024
+
+
+registry.gauge('ethereumetl_process_peak_rss_bytes', 'Peak resident set size of the process.').labels() \
+    .set_function(lambda: get_peak_rss_bytes() or 0)
+
+
+class _ThreadingHTTPServer(ThreadingMixIn, HTTPServer):
+    daemon_threads = True
+
+
+def start_http_server(port, addr='', metrics_registry=registry):
+    """Serves metrics on http://addr:port/metrics from a daemon thread. Returns the server"""
+    _check_prometheus_client()
+    handler_class = prometheus_client.MetricsHandler.factory(metrics_registry.collector_registry)
+    server = _ThreadingHTTPServer((addr, port), handler_class)
+    thread = threading.Thread(target=server.serve_forever, name='metrics-http-server')
+    thread.daemon = True
+    thread.start()
+    logger.info('Serving metrics on port {}'.format(server.server_address[1]))
+    return server
+
+
+# Writes metrics to a file for the node_exporter textfile collector every period_seconds and on close.
+# prometheus_client replaces the file atomically so the collector never reads a partially written file.
+class MetricsTextfileWriter(object):
+    def __init__(self, path, period_seconds=15, metrics_registry=registry):
+        _check_prometheus_client()
+        self.path = path
+        self.period_seconds = period_seconds
+        self.metrics_registry = metrics_registry
+        self._stopped = threading.Event()
+        self._thread = None
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name='metrics-textfile-writer')
+        self._thread.daemon = True
+        self._thread.start()
+
+    def write(self):
+        prometheus_client.write_to_textfile(self.path, self.metrics_registry.collector_registry)
+
+    def close(self):
+        self._stopped.set()
+        if self._thread is not None:
+            self._thread.join()
+        self.write()
+
+    def _run(self):
+        while not self._stopped.wait(self.period_seconds):
+            try:
+                self.write()
+            except OSError:
+                logger.exception('Failed to write metrics to {}'.format(self.path))
@@ -0,0 +1,254 @@
+# MIT License
+#
+# Copyright (c) 2018 Evgeny Medvedev, evge.medvedev@gmail.com
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+
+
+import ast
+import operator
+import sys
+
+# Predicates are Python expressions limited to fields, literals, comparisons, boolean operators and the helpers
+# below, e.g. "is_erc20 or item['is_erc721']" or "address(to_address) in {'0xabc...'} and value > 0".
+# They are compiled once into nested closures, so nothing is parsed per item and no other code can run.
+
+
+class PredicateError(Exception):
+    pass
+
+
+def _none_safe(function):
+    def wrapper(value):
+        return None if value is None else function(value)
+    return wrapper
+
+
+HELPERS = {
+    'address': _none_safe(lambda value: value.lower()),
+    'lower': _none_safe(lambda value: value.lower()),
+    'hex_to_int': _none_safe(lambda value: int(value, 16)),
+    'int': _none_safe(int),
+    'len': _none_safe(len),
+}
+
+ITEM_NAME = 'item'
+
+_CONSTANT_NAMES = {'True': True, 'False': False, 'None': None}
+
+_ORDERING_OPERATORS = {
+    ast.Lt: operator.lt,
+    ast.LtE: operator.le,
+    ast.Gt: operator.gt,
+    ast.GtE: operator.ge,
+}
+
+_EQUALITY_OPERATORS = {
+    ast.Eq: operator.eq,
+    ast.NotEq: operator.ne,
+    ast.In: lambda left, right: left in right,
+    ast.NotIn: lambda left, right: left not in right,
+}
+
+
+def get_json_item_field(field):
+    def get_field(item):
+        return item.get(field)
+    return get_field
+
+
+# Compiles the predicate into a function of an item that returns a bool.
+# get_field returns a function that gets the value of the field from an item, missing fields are None.
+def compile_predicate(predicate, get_field=get_json_item_field):
+    try:
+        tree = ast.parse(predicate.strip(), mode='eval')
+    except SyntaxError as e:
+        raise PredicateError('Invalid predicate {}: {}'.format(predicate, e.msg))
+    evaluate = _PredicateCompiler(get_field).compile(tree.body)
+
+    def matches(item):
+        return bool(evaluate(item))
+    return matches
+
+
+class _Constant(object):
+    def __init__(self, value):
+        self.value = value
+
+
+class _PredicateCompiler(object):
+    def __init__(self, get_field):
+        self.get_field = get_field
+
+    def compile(self, node):
+        compiled = self._compile(node)
+        if isinstance(compiled, _Constant):
+            return lambda item: compiled.value
+        return compiled
+
+    # Returns a _Constant for literals, so that they are bound into the closures of the enclosing nodes
+    def _compile(self, node):
+        if isinstance(node, ast.BoolOp):
+            return self._compile_bool_op(node)
+        if isinstance(node, ast.UnaryOp):
+            return self._compile_unary_op(node)
+        if isinstance(node, ast.Compare):
+            return self._compile_compare(node)
+        if isinstance(node, ast.Call):
+            return self._compile_call(node)
+        if isinstance(node, ast.Subscript):
+            return self.get_field(self._get_subscript_field(node))
+        if isinstance(node, ast.Name):
+            if node.id in _CONSTANT_NAMES:
+                return _Constant(_CONSTANT_NAMES[node.id])
+            if node.id == ITEM_NAME or node.id in HELPERS:
+                raise PredicateError('{} can only be used as item[\'field\'] or in a call'.format(node.id))
+            return self.get_field(node.id)
+        if isinstance(node, (ast.Set, ast.List, ast.Tuple)):
+            return self._compile_collection(node)
+        constant = _get_literal(node)
+        if constant is not None:
+            return constant
+        raise PredicateError('Unsupported expression {}'.format(type(node).__name__))
+
+    def _compile_bool_op(self, node):
+        operands = [self.compile(value) for value in node.values]
+        if isinstance(node.op, ast.And):
+            def evaluate_and(item):
+                for operand in operands:
+                    if not operand(item):
+                        return False
+                return True
+            return evaluate_and
+        else:
+            def evaluate_or(item):
+                for operand in operands:
+                    if operand(item):
+                        return True
+                return False
+            return evaluate_or
+
+    def _compile_unary_op(self, node):
+        operand = self._compile(node.operand)
+        if isinstance(node.op, ast.Not):
+            if isinstance(operand, _Constant):
+                return _Constant(not operand.value)
+            return lambda item: not operand(item)
+        if isinstance(node.op, ast.USub) and isinstance(operand, _Constant) and _is_number(operand.value):
+            return _Constant(-operand.value)
+        raise PredicateError('Unsupported operator {}'.format(type(node.op).__name__))
+
+    def _compile_compare(self, node):
+        comparisons = []
+        left = node.left
+        for op, right in zip(node.ops, node.comparators):
+            comparisons.append(self._compile_comparison(op, left, right))
+            left = right
+        if len(comparisons) == 1:
+            return comparisons[0]
+
+        def evaluate_chain(item):
+            for comparison in comparisons:
+                if not comparison(item):
+                    return False
+            return True
+        return evaluate_chain
+
+    def _compile_comparison(self, op, left_node, right_node):
+        if type(op) in _ORDERING_OPERATORS:
+            compare = _none_is_false(_ORDERING_OPERATORS[type(op)])
+        elif type(op) in _EQUALITY_OPERATORS:
+            compare = _EQUALITY_OPERATORS[type(op)]
+        else:
+            raise PredicateError('Unsupported comparison {}'.format(type(op).__name__))
+
+        left = self._compile(left_node)
+        right = self._compile(right_node)
+        if isinstance(left, _Constant) and isinstance(right, _Constant):
+            return lambda item: compare(left.value, right.value)
+        if isinstance(right, _Constant):
+            right_value = right.value
+            return lambda item: compare(left(item), right_value)
+        if isinstance(left, _Constant):
+            left_value = left.value
+            return lambda item: compare(left_value, right(item))
+        return lambda item: compare(left(item), right(item))
+
+    def _compile_call(self, node):
+        if not isinstance(node.func, ast.Name) or node.func.id not in HELPERS:
+            raise PredicateError('Unknown function, the supported functions are {}'.format(', '.join(sorted(HELPERS))))
+        if len(node.args) != 1 or len(node.keywords) > 0:
+            raise PredicateError('{} takes a single argument'.format(node.func.id))
+        helper = HELPERS[node.func.id]
+        argument = self._compile(node.args[0])
+        if isinstance(argument, _Constant):
+            return _Constant(helper(argument.value))
+        return lambda item: helper(argument(item))
+
+    def _compile_collection(self, node):
+        values = []
+        for element in node.elts:
+            element = self._compile(element)
+            if not isinstance(element, _Constant):
+                raise PredicateError('Sets, lists and tuples can only contain literals')
+            values.append(element.value)
+        try:
+            # Hashed for fast membership tests
+            return _Constant(frozenset(values))
+        except TypeError:
+            return _Constant(tuple(values))
+
+    def _get_subscript_field(self, node):
+        if not isinstance(node.value, ast.Name) or node.value.id != ITEM_NAME:
+            raise PredicateError('Only item[\'field\'] subscripts are supported')
+        # The slice is wrapped in ast.Index before Python 3.9
+        index = node.slice.value if isinstance(node.slice, getattr(ast, 'Index', ())) else node.slice
+        field = _get_literal(index)
+        if field is None or not isinstance(field.value, str):
+            raise PredicateError('Fields must be strings e.g. item[\'field\']')
+        return field.value
+
+
+def _get_literal(node):
+    # ast.Constant replaces ast.Str, ast.Num and ast.NameConstant from Python 3.8, they are removed in Python 3.14
+    if hasattr(ast, 'Constant') and isinstance(node, ast.Constant):
+        return _Constant(node.value)
+    if sys.version_info >= (3, 8):
+        return None
+    if isinstance(node, ast.Str):
+        return _Constant(node.s)
+    if isinstance(node, ast.Num):
+        return _Constant(node.n)
+    if isinstance(node, ast.NameConstant):
+        return _Constant(node.value)
+    return None
+
+
+def _is_number(value):
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+
+def _none_is_false(compare):
+    # Items without the field don't match ordering comparisons instead of raising an error
+    def compare_values(left, right):
+        if left is None or right is None:
+            return False
+        return compare(left, right)
+    return compare_values
@@ -0,0 +1,235 @@
+# MIT License
+#
+# Copyright (c) 2018 Evgeny Medvedev, evge.medvedev@gmail.com
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+
+
+import cProfile
+import json
+import logging
+import pstats
+import random
+import threading
+import time
+from collections import OrderedDict
+
+logger = logging.getLogger('profiler')
+
+
+# Measures where the time of jobs goes. Code is divided into stages with `with profiler.stage(name):`.
+# Stages can be nested, the time of a stage excludes the time of stages nested in it, so the times of all stages
+# add up to the time spent in them. Stages are measured per thread and summed up over worker threads.
+# With sample_rate < 1 only a fraction of outermost stages, e.g. batches, is measured together with their nested
+# stages, and the times are scaled up.
+# With cprofile_output every measured outermost stage is also run under cProfile in its thread.
+# The stats of all threads and all jobs so far are dumped to the file at the end of each job.
+# The profiler is disabled by default, stage() is then a no-op.
+class StageProfiler(object):
+    def __init__(self):
+        self.enabled = False
+        self.sample_rate = 1.0
+        self.output_format = 'table'
+        self.output_file = None
+        self.cprofile_output = None
+
+        self._stages = {}
+        self._job_stages = OrderedDict()
+        self._profiles = []
+        self._cprofile_stats = None
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+    def configure(self, enabled=True, sample_rate=1.0, output_format='table', output_file=None,
+                  cprofile_output=None):
+        if not 0 < sample_rate <= 1:
+            raise ValueError('sample_rate must be in (0, 1]')
+        if output_format not in ('table', 'json'):
+            raise ValueError('output_format must be table or json')
+        self.enabled = enabled
+        self.sample_rate = sample_rate
+        self.output_format = output_format
+        self.output_file = output_file
+        self.cprofile_output = cprofile_output
+        self._cprofile_stats = None
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self._stages = {}
+            self._job_stages = OrderedDict()
+            self._profiles = []
+
+    def stage(self, name):
+        if not self.enabled:
+            return NOOP_STAGE
+        stack = getattr(self._local, 'stack', None)
+        if stack is None:
+            stack = self._local.stack = []
+        if len(stack) == 0:
+            if self.sample_rate < 1 and random.random() >= self.sample_rate:
+                return _SkippedStage(stack)
+        elif stack[-1] is None:
+            # The outermost stage is not sampled
+            return NOOP_STAGE
+        return _Stage(self, stack, name)
+
+    def job_stage(self, name):
+        """Measures the wall time of a job stage, e.g. _export, not affected by sampling"""
+        if not self.enabled:
+            return NOOP_STAGE
+        return _JobStage(self, name)
+
+    def report(self, job_name):
+        """Logs or writes the breakdown of stages since the last report and resets the profiler"""
+        if not self.enabled:
+            return None
+        with self._lock:
+            stages = self._stages
+            job_stages = self._job_stages
+            profiles = self._profiles
+        self.reset()
+
+        breakdown = self._build_breakdown(job_name, stages, job_stages)
+        if self.output_format == 'json':
+            text = json.dumps(breakdown)
+        else:
+            text = format_breakdown_table(breakdown)
+        if self.output_file is not None:
+            with open(self.output_file, 'a') as output_file:
+                output_file.write(text + '\n')
+        else:
+            logger.info('Time breakdown for {}:\n{}'.format(job_name, text))
+
+        if self.cprofile_output is not None and len(profiles) > 0:
+            for profile in profiles:
+                if self._cprofile_stats is None:
+                    self._cprofile_stats = pstats.Stats(profile)
+                else:
+                    self._cprofile_stats.add(profile)
+            self._cprofile_stats.dump_stats(self.cprofile_output)
+        return breakdown
+
+    def _build_breakdown(self, job_name, stages, job_stages):
+        scale = 1 / self.sample_rate
+        total_seconds = sum(seconds for _, seconds in stages.values()) * scale
+        return {
+            'job': job_name,
+            'sample_rate': self.sample_rate,
+            'job_stages': [{'stage': name, 'seconds': round(seconds, 6)} for name, seconds in job_stages.items()],
+            'stages': [{
+                'stage': name,
+                'calls': int(round(calls * scale)),
+                'seconds': round(seconds * scale, 6),
+                'percentage': round(seconds * scale * 100 / total_seconds, 2) if total_seconds > 0 else 0.0,
+            } for name, (calls, seconds) in sorted(stages.items(), key=lambda stage: -stage[1][1])]
+        }
+
+    def _add(self, name, seconds):
+        with self._lock:
+            calls, total_seconds = self._stages.get(name, (0, 0.0))
+            self._stages[name] = (calls + 1, total_seconds + seconds)
+
+    def _add_job_stage(self, name, seconds):
+        with self._lock:
+            self._job_stages[name] = self._job_stages.get(name, 0.0) + seconds
+
+    def _add_profile(self, profile):
+        with self._lock:
+            self._profiles.append(profile)
+
+
+class _Stage(object):
+    def __init__(self, profiler, stack, name):
+        self._profiler = profiler
+        self._stack = stack
+        self._name = name
+        self._start_time = None
+        self._nested_seconds = 0.0
+        self._profile = None
+
+    def __enter__(self):
+        if len(self._stack) == 0 and self._profiler.cprofile_output is not None:
+            self._profile = cProfile.Profile()
+            self._profile.enable()
+        self._stack.append(self)
+        self._start_time = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        seconds = time.perf_counter() - self._start_time
+        self._stack.pop()
+        if len(self._stack) > 0:
+            self._stack[-1]._nested_seconds += seconds
+        self._profiler._add(self._name, seconds - self._nested_seconds)
+        if self._profile is not None:
+            self._profile.disable()
+            self._profiler._add_profile(self._profile)
+
+
+class _JobStage(object):
+    def __init__(self, profiler, name):
+        self._profiler = profiler
+        self._name = name
+        self._start_time = None
+
+    def __enter__(self):
+        self._start_time = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self._profiler._add_job_stage(self._name, time.perf_counter() - self._start_time)
+
+
+# Marks the stack so that stages nested in a stage that is not sampled are not measured either
+class _SkippedStage(object):
+    def __init__(self, stack):
+        self._stack = stack
+
+    def __enter__(self):
+        self._stack.append(None)
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self._stack.pop()
+
+
+class _NoopStage(object):
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        pass
+
+
+NOOP_STAGE = _NoopStage()
+
+
+def format_breakdown_table(breakdown):
+    lines = ['{:<28} {:>12} {:>12} {:>8}'.format('stage', 'calls', 'seconds', '%')]
+    for stage in breakdown['stages']:
+        lines.append('{:<28} {:>12} {:>12.3f} {:>8.2f}'.format(
+            stage['stage'], stage['calls'], stage['seconds'], stage['percentage']))
+    for stage in breakdown['job_stages']:
+        lines.append('{:<28} {:>12} {:>12.3f} {:>8}'.format('job.' + stage['stage'], '', stage['seconds'], ''))
+    return '\n'.join(lines)
+
+
+profiler = StageProfiler()
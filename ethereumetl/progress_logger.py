@@ -24,6 +24,7 @@ import logging
 from datetime import datetime
 
 from ethereumetl.atomic_counter import AtomicCounter
+from ethereumetl.metrics import get_peak_rss_bytes
 
 
 # Thread safe progress logger.
@@ -69,7 +70,7 @@ class ProgressLogger:
         if track_message is not None:
             self.logger.info(track_message)
 
-    def finish(self):
+    def finish(self, details=None):
         duration = None
         if self.start_time is not None:
             self.end_time = datetime.now()
@@ -78,5 +79,10 @@ class ProgressLogger:
         finish_message = 'Finished {}. Total items processed: {}.'.format(self.name, self.counter.increment() - 1)
         if duration is not None:
             finish_message = finish_message + ' Took {}.'.format(str(duration))
+        peak_rss_bytes = get_peak_rss_bytes()
+        if peak_rss_bytes is not None:
+            finish_message = finish_message + ' Peak memory {:.1f} MB.'.format(peak_rss_bytes / (1024 * 1024))
+        if details is not None:
+            finish_message = finish_message + ' ' + details
 
         self.logger.info(finish_message)
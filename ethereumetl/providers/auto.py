@@ -25,6 +25,7 @@ from urllib.parse import urlparse
 
 from web3 import IPCProvider, HTTPProvider
 
+from ethereumetl.providers.caching import CACHE_MODE, CachingBatchProvider
 from ethereumetl.providers.ipc import BatchIPCProvider
 from ethereumetl.providers.rpc import BatchHTTPProvider
 
@@ -32,18 +33,26 @@ DEFAULT_IPC_TIMEOUT = 60
 DEFAULT_HTTP_REQUEST_KWARGS = {'timeout': 60}
 
 
-def get_provider_from_uri(uri_string, batch=False):
+def get_provider_from_uri(uri_string, batch=False, response_store=None, cache_mode=CACHE_MODE):
+    """If response_store is provided batch providers cache responses in it, see CachingBatchProvider"""
     uri = urlparse(uri_string)
     if uri.scheme == 'file':
         if batch:
-            return BatchIPCProvider(uri.path, timeout=DEFAULT_IPC_TIMEOUT)
+            return _with_cache(BatchIPCProvider(uri.path, timeout=DEFAULT_IPC_TIMEOUT), response_store, cache_mode)
         else:
             return IPCProvider(uri.path, timeout=DEFAULT_IPC_TIMEOUT)
     elif uri.scheme == 'http' or uri.scheme == 'https':
         if batch:
-            return BatchHTTPProvider(uri_string, request_kwargs=DEFAULT_HTTP_REQUEST_KWARGS)
+            return _with_cache(BatchHTTPProvider(uri_string, request_kwargs=DEFAULT_HTTP_REQUEST_KWARGS),
+                               response_store, cache_mode)
         else:
             return HTTPProvider(uri_string, request_kwargs=DEFAULT_HTTP_REQUEST_KWARGS)
     else:
         raise ValueError('Unknown uri scheme {}'.format(uri_string))
 
+
+def _with_cache(batch_web3_provider, response_store, cache_mode):
+    if response_store is None:
+        return batch_web3_provider
+    return CachingBatchProvider(batch_web3_provider, response_store, cache_mode)
+
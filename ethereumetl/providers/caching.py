@@ -0,0 +1,207 @@
+# MIT License
+#
+# Copyright (c) 2018 Evgeny Medvedev, evge.medvedev@gmail.com
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+
+
+import hashlib
+import json
+import logging
+
+from ethereumetl.metrics import registry
+from ethereumetl.profiling import profiler
+from ethereumetl.providers.capabilities import BLOCK_RECEIPTS_METHODS, get_chain_id
+
+# cache: cached responses are returned, misses are fetched from the node and cached.
+# record: all requests are fetched from the node and cached, e.g. to refresh a cache.
+# replay: all requests are served from the cache, the node is never called. Misses raise ResponseNotCachedError
+CACHE_MODE = 'cache'
+RECORD_MODE = 'record'
+REPLAY_MODE = 'replay'
+CACHE_MODES = [CACHE_MODE, RECORD_MODE, REPLAY_MODE]
+
+# Responses are compressed, blocks with transactions and receipts compress well
+RPC_RESPONSES_TABLE_NAME = 'rpc_responses'
+# Cache keys have no chain namespace, the chain of the cached responses is stored under this key
+CHAIN_ID_KEY = 'chain_id'
+
+RPC_CACHE_HITS = registry.counter(
+    'ethereumetl_rpc_cache_hits_total', 'JSON RPC requests served from the response cache.', ['method'])
+RPC_CACHE_MISSES = registry.counter(
+    'ethereumetl_rpc_cache_misses_total', 'Cacheable JSON RPC requests not found in the response cache.', ['method'])
+
+
+logger = logging.getLogger('caching')
+
+
+class ResponseNotCachedError(Exception):
+    pass
+
+
+class ChainMismatchError(Exception):
+    pass
+
+
+# Wraps a batch provider and caches responses of requests for immutable historical data:
+# blocks by number, receipts by transaction hash, block receipts by block number, and code and calls at a block.
+# Batches are split into cache hits and misses and only the misses are sent to the node.
+# Requests for 'latest' or 'pending' and requests for other methods are never cached.
+# Cache only ranges deep enough not to be reorganised, e.g. don't use it for streaming near the head.
+# Check the chain of the store with check_response_store_chain before using it with a node.
+class CachingBatchProvider(object):
+    def __init__(self, batch_web3_provider, store, mode=CACHE_MODE):
+        if mode not in CACHE_MODES:
+            raise ValueError('mode must be one of {}'.format(', '.join(CACHE_MODES)))
+        self.batch_web3_provider = batch_web3_provider
+        self.store = store
+        self.mode = mode
+
+    def make_request(self, text):
+        batch = json.loads(text)
+        if not isinstance(batch, list):
+            return self._make_single_request(batch, text)
+
+        keys = [get_cache_key(request) for request in batch]
+        cached_results = {}
+        if self.mode != RECORD_MODE:
+            with profiler.stage('cache'):
+                cached_results = self.store.get_many(set(key for key in keys if key is not None))
+
+        response = [None] * len(batch)
+        miss_indexes = []
+        for index, (request, key) in enumerate(zip(batch, keys)):
+            if key is not None and key in cached_results:
+                RPC_CACHE_HITS.labels(request['method']).inc()
+                response[index] = _result_response(request, cached_results[key])
+            else:
+                if key is not None:
+                    RPC_CACHE_MISSES.labels(request['method']).inc()
+                miss_indexes.append(index)
+
+        if len(miss_indexes) > 0:
+            if self.mode == REPLAY_MODE:
+                raise ResponseNotCachedError('{} requests are not in the cache, e.g. {}'.format(
+                    len(miss_indexes), json.dumps(batch[miss_indexes[0]])))
+            misses = [batch[index] for index in miss_indexes]
+            miss_response = self.batch_web3_provider.make_request(json.dumps(misses))
+            if not isinstance(miss_response, list):
+                # An error for the whole batch, e.g. the batch is too large for the node.
+                # It is returned for every miss, cache hits are kept
+                for index in miss_indexes:
+                    response[index] = _error_response(batch[index], miss_response)
+                return response
+            items_to_cache = []
+            for index, response_item in zip(miss_indexes, _match_responses(misses, miss_response)):
+                response[index] = response_item
+                result = response_item.get('result')
+                if keys[index] is not None and result is not None and response_item.get('error') is None:
+                    items_to_cache.append((keys[index], result))
+            if len(items_to_cache) > 0:
+                with profiler.stage('cache'):
+                    self.store.put_many(items_to_cache)
+
+        return response
+
+    def _make_single_request(self, request, text):
+        key = get_cache_key(request)
+        if key is not None and self.mode != RECORD_MODE:
+            result = self.store.get(key)
+            if result is not None:
+                RPC_CACHE_HITS.labels(request['method']).inc()
+                return _result_response(request, result)
+            RPC_CACHE_MISSES.labels(request['method']).inc()
+        if self.mode == REPLAY_MODE:
+            raise ResponseNotCachedError('Request is not in the cache: {}'.format(text))
+        response = self.batch_web3_provider.make_request(text)
+        if key is not None and isinstance(response, dict) and response.get('result') is not None:
+            self.store.put(key, response['result'])
+        return response
+
+
+def check_response_store_chain(store, batch_web3_provider, mode=CACHE_MODE):
+    """Stores the chain id of the node in a new store, raises ChainMismatchError if the store has responses of
+    another chain. Skipped in replay mode, where the node is not called"""
+    if mode == REPLAY_MODE:
+        return
+    chain_id = get_chain_id(batch_web3_provider)
+    if chain_id is None:
+        logger.warning('The node returned no chain id, the chain of the response cache is not checked')
+        return
+    cached_chain_id = store.get(CHAIN_ID_KEY)
+    if cached_chain_id is None:
+        store.put(CHAIN_ID_KEY, chain_id)
+    elif cached_chain_id != chain_id:
+        raise ChainMismatchError('The response cache has responses of chain {}, but the node is on chain {}. '
+                                 'Use another cache file for this chain'.format(cached_chain_id, chain_id))
+
+
+def get_cache_key(request):
+    """Returns the cache key for requests of immutable data, None for requests that must not be cached"""
+    method = request.get('method')
+    params = request.get('params') or []
+    if method == 'eth_getBlockByNumber' and len(params) == 2 and _is_block_number(params[0]):
+        return 'block:{}:{}'.format(_normalize_block(params[0]), 'full' if params[1] else 'hashes')
+    elif method == 'eth_getTransactionReceipt' and len(params) == 1:
+        return 'receipt:{}'.format(params[0].lower())
+    elif method in BLOCK_RECEIPTS_METHODS and len(params) == 1 and _is_block_number(params[0]):
+        return '{}:{}'.format(method, _normalize_block(params[0]))
+    elif method == 'eth_getCode' and len(params) == 2 and _is_block_number(params[1]):
+        return 'code:{}:{}'.format(params[0].lower(), _normalize_block(params[1]))
+    elif method == 'eth_call' and len(params) == 2 and _is_block_number(params[1]):
+        # Call data can be long, e.g. for Multicall3 aggregates
+        call_hash = hashlib.sha256(json.dumps(params[0], sort_keys=True).lower().encode('utf-8')).hexdigest()
+        return 'call:{}:{}'.format(call_hash, _normalize_block(params[1]))
+    return None
+
+
+def _is_block_number(block):
+    return isinstance(block, str) and block.startswith('0x')
+
+
+def _normalize_block(block):
+    return str(int(block, 16))
+
+
+def _result_response(request, result):
+    return {'jsonrpc': '2.0', 'id': request.get('id'), 'result': result}
+
+
+def _error_response(request, batch_response):
+    error = batch_response.get('error') if isinstance(batch_response, dict) else None
+    if error is None:
+        error = {'code': -32603, 'message': 'Unexpected response to the batch: {}'.format(batch_response)}
+    return {'jsonrpc': '2.0', 'id': request.get('id'), 'error': error}
+
+
+def _match_responses(requests, response):
+    # Responses to a batch may come in any order, they are matched by id when ids are unique
+    if len(response) != len(requests):
+        raise ValueError('The node returned {} responses to a batch of {} requests'.format(
+            len(response), len(requests)))
+    request_ids = [request.get('id') for request in requests]
+    if len(set(request_ids)) < len(request_ids):
+        return response
+    response_by_id = {response_item.get('id'): response_item for response_item in response}
+    missing_ids = [request_id for request_id in request_ids if request_id not in response_by_id]
+    if len(missing_ids) > 0:
+        raise ValueError('The node returned no responses for request ids {}, response ids are {}'.format(
+            missing_ids, sorted(response_by_id.keys(), key=str)))
+    return [response_by_id[request_id] for request_id in request_ids]
@@ -0,0 +1,75 @@
+# MIT License
+#
+# Copyright (c) 2018 Evgeny Medvedev, evge.medvedev@gmail.com
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+
+
+import json
+import logging
+
+from ethereumetl.json_rpc_requests import generate_json_rpc
+
+# Methods returning all receipts of a block, in order of preference
+BLOCK_RECEIPTS_METHODS = ['eth_getBlockReceipts', 'parity_getBlockReceipts']
+# net_version returns the network id, which is the chain id on most chains, for nodes without eth_chainId
+CHAIN_ID_METHODS = ['eth_chainId', 'net_version']
+
+logger = logging.getLogger('capabilities')
+
+
+def detect_block_receipts_method(batch_web3_provider, block='latest'):
+    """Returns the first method in BLOCK_RECEIPTS_METHODS supported by the node, None if none of them is supported"""
+    for method in BLOCK_RECEIPTS_METHODS:
+        if is_method_supported(batch_web3_provider, method, [hex(block) if isinstance(block, int) else block]):
+            logger.info('The node supports {}, receipts will be requested per block'.format(method))
+            return method
+    logger.info('The node does not support any of {}, receipts will be requested per transaction'
+                .format(', '.join(BLOCK_RECEIPTS_METHODS)))
+    return None
+
+
+def is_method_supported(batch_web3_provider, method, params):
+    """Sends a batch with a single request, the method is supported if it returns a list"""
+    request = [generate_json_rpc(method=method, params=params)]
+    try:
+        response = batch_web3_provider.make_request(json.dumps(request))
+    except Exception as e:
+        # Some nodes and proxies respond to unknown methods with HTTP errors instead of JSON RPC errors
+        logger.debug('{} request failed: {}'.format(method, e))
+        return False
+    if not isinstance(response, list) or len(response) == 0:
+        return False
+    return isinstance(response[0].get('result', None), list)
+
+
+def get_chain_id(batch_web3_provider):
+    """Returns the chain id of the node, None if the node supports none of CHAIN_ID_METHODS"""
+    for method in CHAIN_ID_METHODS:
+        request = [generate_json_rpc(method=method, params=[])]
+        try:
+            response = batch_web3_provider.make_request(json.dumps(request))
+        except Exception as e:
+            logger.debug('{} request failed: {}'.format(method, e))
+            continue
+        if isinstance(response, list) and len(response) > 0 and response[0].get('result') is not None:
+            result = str(response[0]['result'])
+            return int(result, 16) if result.startswith('0x') else int(result)
+    return None
@@ -30,6 +30,9 @@ from web3.utils.threads import (
     Timeout,
 )
 
+from ethereumetl.profiling import profiler
+from ethereumetl.providers.request_metrics import record_response_bytes, track_batch_request
+
 try:
     from json import JSONDecodeError
 except ImportError:
@@ -52,9 +55,11 @@ class BatchIPCProvider:
         self._lock = threading.Lock()
         self._socket = PersistantSocket(self.ipc_path)
 
+    @track_batch_request
     def make_request(self, text):
         request = text.encode('utf-8')
-        with self._lock, self._socket as sock:
+        # Network time includes waiting for other threads using the socket
+        with profiler.stage('network'), self._lock, self._socket as sock:
             try:
                 sock.sendall(request)
             except BrokenPipeError:
@@ -74,11 +79,13 @@ class BatchIPCProvider:
                         timeout.sleep(0)
                     elif has_valid_json_rpc_ending(raw_response):
                         try:
-                            response = json.loads(raw_response.decode('utf-8'))
+                            with profiler.stage('json_decode'):
+                                response = json.loads(raw_response.decode('utf-8'))
                         except JSONDecodeError:
                             timeout.sleep(0)
                             continue
                         else:
+                            record_response_bytes(len(raw_response))
                             return response
                     else:
                         timeout.sleep(0)
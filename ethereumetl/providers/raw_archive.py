@@ -0,0 +1,115 @@
+# MIT License
+#
+# Copyright (c) 2018 Evgeny Medvedev, evge.medvedev@gmail.com
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+
+
+import gzip
+import json
+import os
+import pathlib
+import threading
+
+RAW_ARCHIVE_EXTENSION = '.jsonl.gz'
+RAW_ARCHIVE_REQUEST_PREFIX = '{"request": '
+
+_json_decoder = json.JSONDecoder()
+
+
+# Writes JSON RPC batches with their responses to a gzipped JSON lines file, one batch per line:
+# {"request": [...], "response": [...]}. Thread safe, so it can be shared by the providers of all worker threads.
+class RawArchiveWriter(object):
+    def __init__(self, path, compress_level=6):
+        dirname = os.path.dirname(path)
+        if dirname:
+            pathlib.Path(dirname).mkdir(parents=True, exist_ok=True)
+        self.path = path
+        self._lock = threading.Lock()
+        self._file = gzip.open(path, 'wt', compresslevel=compress_level, encoding='utf-8')
+
+    def write(self, request_text, response):
+        line = '{}{}, "response": {}}}\n'.format(RAW_ARCHIVE_REQUEST_PREFIX, request_text, json.dumps(response))
+        with self._lock:
+            self._file.write(line)
+
+    def close(self):
+        with self._lock:
+            self._file.close()
+
+
+# Wraps a batch provider and writes every batch with a complete response to the archive.
+# Batches with errors are not written, they fail and are requested again.
+# Requests of a batch that is retried by the batch work executor can be archived more than once,
+# duplicates are skipped on replay, see get_duplicate_request_ids
+class RawCaptureBatchProvider(object):
+    def __init__(self, batch_web3_provider, raw_archive_writer):
+        self.batch_web3_provider = batch_web3_provider
+        self.raw_archive_writer = raw_archive_writer
+
+    def make_request(self, text):
+        response = self.batch_web3_provider.make_request(text)
+        if isinstance(response, list) and all(response_item.get('result') is not None for response_item in response):
+            self.raw_archive_writer.write(text, response)
+        return response
+
+
+def read_raw_archive_lines(path):
+    """Yields the lines of the archive without parsing them, parse them with parse_raw_archive_line"""
+    with gzip.open(path, 'rt', encoding='utf-8') as raw_archive_file:
+        for line in raw_archive_file:
+            if line.strip():
+                yield line
+
+
+def parse_raw_archive_line(line):
+    """Returns the requests and the response of the batch"""
+    batch = json.loads(line)
+    return batch['request'], batch['response']
+
+
+def parse_raw_archive_requests(line):
+    """Returns the requests of the batch without parsing the response"""
+    if line.startswith(RAW_ARCHIVE_REQUEST_PREFIX):
+        requests, _ = _json_decoder.raw_decode(line, len(RAW_ARCHIVE_REQUEST_PREFIX))
+        return requests
+    return parse_raw_archive_line(line)[0]
+
+
+def get_request_key(request):
+    return request['method'] + json.dumps(request['params'])
+
+
+def get_duplicate_request_ids(line, seen_request_keys):
+    """Returns the ids of the requests in the batch that are in seen_request_keys and adds the other ones to it"""
+    duplicate_request_ids = set()
+    for request in parse_raw_archive_requests(line):
+        request_key = get_request_key(request)
+        if request_key in seen_request_keys:
+            duplicate_request_ids.add(request['id'])
+        else:
+            seen_request_keys.add(request_key)
+    return duplicate_request_ids
+
+
+def remove_requests(requests, response, request_ids):
+    """Removes the requests with the given ids and their responses from the batch"""
+    return ([request for request in requests if request['id'] not in request_ids],
+            [response_item for response_item in response if response_item.get('id') not in request_ids])
@@ -0,0 +1,86 @@
+# MIT License
+#
+# Copyright (c) 2018 Evgeny Medvedev, evge.medvedev@gmail.com
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+
+
+import functools
+import re
+import threading
+import time
+
+from ethereumetl.metrics import registry
+
+RPC_REQUEST_DURATION = registry.histogram(
+    'ethereumetl_rpc_request_duration_seconds', 'Duration of JSON RPC batch requests.', ['method'])
+RPC_REQUESTS = registry.counter(
+    'ethereumetl_rpc_requests_total', 'JSON RPC requests, every request in a batch is counted.', ['method'])
+RPC_ERRORS = registry.counter(
+    'ethereumetl_rpc_errors_total', 'JSON RPC error responses and failed batch requests.', ['method'])
+RPC_RESPONSE_BYTES = registry.counter(
+    'ethereumetl_rpc_response_bytes_total', 'Bytes of JSON RPC responses, before decoding.').labels()
+
+# Bytes received by each thread, executors use them to estimate the memory needed for batches
+_thread_state = threading.local()
+
+# Batches are generated with json.dumps, the method of the first request is used as the label
+METHOD_PATTERN = re.compile(r'"method":\s*"([^"]+)"')
+
+
+def get_batch_method(text):
+    match = METHOD_PATTERN.search(text)
+    return match.group(1) if match is not None else 'unknown'
+
+
+def track_batch_request(make_request):
+    """Decorates make_request(self, text) of batch providers to record request metrics"""
+    @functools.wraps(make_request)
+    def make_tracked_request(self, text):
+        method = get_batch_method(text)
+        start_time = time.time()
+        try:
+            response = make_request(self, text)
+        except Exception:
+            RPC_ERRORS.labels(method).inc()
+            raise
+        finally:
+            RPC_REQUEST_DURATION.labels(method).observe(time.time() - start_time)
+
+        if isinstance(response, list):
+            RPC_REQUESTS.labels(method).inc(len(response))
+            errors = sum(1 for response_item in response if response_item.get('error') is not None)
+            if errors > 0:
+                RPC_ERRORS.labels(method).inc(errors)
+        else:
+            RPC_REQUESTS.labels(method).inc()
+        return response
+
+    return make_tracked_request
+
+
+def record_response_bytes(byte_count):
+    RPC_RESPONSE_BYTES.inc(byte_count)
+    _thread_state.response_bytes = get_thread_response_bytes() + byte_count
+
+
+def get_thread_response_bytes():
+    """Returns the bytes of responses received by the current thread so far"""
+    return getattr(_thread_state, 'response_bytes', 0)
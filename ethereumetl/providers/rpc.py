@@ -24,21 +24,28 @@
 from web3 import HTTPProvider
 from web3.utils.request import make_post_request
 
+from ethereumetl.profiling import profiler
+from ethereumetl.providers.request_metrics import record_response_bytes, track_batch_request
+
 
 # Mostly copied from web3.py/providers/rpc.py. Supports batch requests.
 # Will be removed once batch feature is added to web3.py https://github.com/ethereum/web3.py/issues/832
 class BatchHTTPProvider(HTTPProvider):
 
+    @track_batch_request
     def make_request(self, text):
         self.logger.debug("Making request HTTP. URI: %s, Request: %s",
                           self.endpoint_uri, text)
         request_data = text.encode('utf-8')
-        raw_response = make_post_request(
-            self.endpoint_uri,
-            request_data,
-            **self.get_request_kwargs()
-        )
-        response = self.decode_rpc_response(raw_response)
+        with profiler.stage('network'):
+            raw_response = make_post_request(
+                self.endpoint_uri,
+                request_data,
+                **self.get_request_kwargs()
+            )
+        record_response_bytes(len(raw_response))
+        with profiler.stage('json_decode'):
+            response = self.decode_rpc_response(raw_response)
         self.logger.debug("Getting response HTTP. URI: %s, "
                           "Request: %s, Response: %s",
                           self.endpoint_uri, text, response)
@@ -0,0 +1,109 @@
+# MIT License
+#
+# Copyright (c) 2018 Evgeny Medvedev, evge.medvedev@gmail.com
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+
+from concurrent.futures import ProcessPoolExecutor
+
+from ethereumetl.cache.contract_analysis_cache import get_bytecode_hash
+from ethereumetl.service.eth_contract_interfaces import contract_interface_registry
+from ethereumetl.service.eth_contract_service import EthContractService, bytecode_to_bytes, clean_bytecode, \
+    scan_function_sighashes
+
+_contract_service = EthContractService()
+
+
+# Extracts function sighashes and detects ERC20 / ERC721 contracts.
+# The analysis is CPU bound so it can run in a process pool, away from the threads fetching the bytecode.
+# Identical bytecode is analysed once per batch, and once overall if contract_analysis_cache is given.
+# interfaces are names of additional interfaces from contract_interface_registry to check, e.g. erc1155.
+class EthContractAnalyzer(object):
+    def __init__(self, max_workers=None, contract_analysis_cache=None, interfaces=None):
+        self.max_workers = max_workers
+        self.contract_analysis_cache = contract_analysis_cache
+        self.interfaces = interfaces or []
+        # Fail fast for unknown interfaces
+        for interface in self.interfaces:
+            contract_interface_registry.get(interface)
+        self._executor = None
+        if max_workers is not None and max_workers > 0:
+            self._executor = ProcessPoolExecutor(max_workers=max_workers)
+            # Start the worker processes now, before the caller starts threads that are not safe to fork
+            self._executor.submit(int).result()
+
+    def analyze(self, bytecodes):
+        """Returns the analysis for each of the given bytecodes, in the same order"""
+        analysis_by_bytecode = {}
+        code_hashes = {}
+        for bytecode in set(bytecodes):
+            if self.contract_analysis_cache is not None and bytecode is not None:
+                code_hash = get_bytecode_hash(bytecode)
+                analysis = self.contract_analysis_cache.get(code_hash)
+                if analysis is not None:
+                    analysis_by_bytecode[bytecode] = analysis
+                    continue
+                code_hashes[bytecode] = code_hash
+            analysis_by_bytecode[bytecode] = None
+
+        bytecodes_to_analyze = [bytecode for bytecode, analysis in analysis_by_bytecode.items() if analysis is None]
+        # Bytes are half the size of hex strings when sent to the worker processes
+        codes = [bytecode_to_code(bytecode) for bytecode in bytecodes_to_analyze]
+        if self._executor is not None and len(codes) > 0:
+            analyses = self._executor.map(analyze_code, codes)
+        else:
+            analyses = map(analyze_code, codes)
+
+        for bytecode, analysis in zip(bytecodes_to_analyze, analyses):
+            analysis_by_bytecode[bytecode] = analysis
+            if bytecode in code_hashes:
+                self.contract_analysis_cache.put(code_hashes[bytecode], analysis)
+
+        if len(self.interfaces) > 0:
+            # Checking interfaces is cheap, so it's not cached. This way cached analysis can be reused
+            # when the interfaces change
+            for bytecode, analysis in analysis_by_bytecode.items():
+                analysis = dict(analysis)
+                analysis['interfaces'] = contract_interface_registry.get_implemented_interfaces(
+                    analysis['function_sighashes'], self.interfaces)
+                analysis_by_bytecode[bytecode] = analysis
+
+        return [analysis_by_bytecode[bytecode] for bytecode in bytecodes]
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+
+
+def bytecode_to_code(bytecode):
+    bytecode = clean_bytecode(bytecode)
+    if bytecode is None:
+        return b''
+    return bytecode_to_bytes(bytecode)
+
+
+# Top level function so that it can be pickled and executed in a worker process
+def analyze_code(code):
+    function_sighashes = sorted(scan_function_sighashes(code))
+    return {
+        'function_sighashes': function_sighashes,
+        'is_erc20': _contract_service.is_erc20_contract(function_sighashes),
+        'is_erc721': _contract_service.is_erc721_contract(function_sighashes)
+    }
@@ -0,0 +1,164 @@
+# MIT License
+#
+# Copyright (c) 2018 Evgeny Medvedev, evge.medvedev@gmail.com
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+
+import collections
+import threading
+
+from eth_utils import function_signature_to_4byte_selector
+
+
+# A set of functions identifying a contract standard, e.g. ERC20.
+# Function selectors are computed once when the interface is created,
+# so checking whether a contract implements the interface is a frozenset subset test.
+class ContractInterface(object):
+    def __init__(self, name, functions, any_of_functions=None):
+        """any_of_functions is a list of groups of functions, at least one function from every group is required"""
+        self.name = name
+        self.selectors = frozenset(get_function_sighash(function) for function in functions)
+        self.any_of_selectors = [frozenset(get_function_sighash(function) for function in group)
+                                 for group in (any_of_functions or [])]
+
+    def is_implemented_by(self, function_sighashes):
+        if not isinstance(function_sighashes, (set, frozenset)):
+            function_sighashes = frozenset(function_sighashes)
+        return self.selectors <= function_sighashes and \
+            all(not group.isdisjoint(function_sighashes) for group in self.any_of_selectors)
+
+
+class ContractInterfaceRegistry(object):
+    def __init__(self):
+        self._interfaces = collections.OrderedDict()
+        self._lock = threading.Lock()
+
+    def register(self, interface):
+        with self._lock:
+            self._interfaces[interface.name] = interface
+
+    def get(self, name):
+        interface = self._interfaces.get(name)
+        if interface is None:
+            raise ValueError('Contract interface {} is not registered. Registered interfaces: {}'
+                             .format(name, ', '.join(self.names())))
+        return interface
+
+    def names(self):
+        return list(self._interfaces.keys())
+
+    def get_implemented_interfaces(self, function_sighashes, names=None):
+        """Returns a dict of interface name to whether it's implemented by a contract with the given sighashes"""
+        function_sighashes = frozenset(function_sighashes)
+        if names is None:
+            names = self.names()
+        return collections.OrderedDict(
+            (name, self.get(name).is_implemented_by(function_sighashes)) for name in names)
+
+
+def get_function_sighash(signature):
+    return '0x' + function_signature_to_4byte_selector(signature).hex()
+
+
+def parse_contract_interface(definition):
+    """Parses interface definitions in the format name:function1;function2, e.g.
+    mintable:mint(address,uint256);finishMinting()"""
+    name, separator, functions = definition.partition(':')
+    functions = [function.strip() for function in functions.split(';') if function.strip()]
+    if not separator or not name.strip() or not functions:
+        raise ValueError('Contract interface definition {} must be in the format '
+                         'name:function1;function2'.format(definition))
+    return ContractInterface(name.strip(), functions)
+
+
+# https://github.com/ethereum/EIPs/blob/master/EIPS/eip-20.md
+# https://github.com/OpenZeppelin/openzeppelin-solidity/blob/master/contracts/token/ERC20/ERC20.sol
+ERC20_INTERFACE = ContractInterface('erc20', [
+    'totalSupply()',
+    'balanceOf(address)',
+    'transfer(address,uint256)',
+    'transferFrom(address,address,uint256)',
+    'approve(address,uint256)',
+    'allowance(address,address)'
+])
+
+# https://github.com/ethereum/EIPs/blob/master/EIPS/eip-721.md
+# https://github.com/OpenZeppelin/openzeppelin-solidity/blob/master/contracts/token/ERC721/ERC721Basic.sol
+# Doesn't check the below ERC721 methods to match CryptoKitties contract
+# getApproved(uint256)
+# setApprovalForAll(address,bool)
+# isApprovedForAll(address,address)
+# transferFrom(address,address,uint256)
+# safeTransferFrom(address,address,uint256)
+# safeTransferFrom(address,address,uint256,bytes)
+ERC721_INTERFACE = ContractInterface('erc721', [
+    'balanceOf(address)',
+    'ownerOf(uint256)',
+    'approve(address,uint256)'
+], any_of_functions=[
+    ['transfer(address,uint256)', 'transferFrom(address,address,uint256)']
+])
+
+# https://github.com/ethereum/EIPs/blob/master/EIPS/eip-1155.md
+ERC1155_INTERFACE = ContractInterface('erc1155', [
+    'safeTransferFrom(address,address,uint256,uint256,bytes)',
+    'safeBatchTransferFrom(address,address,uint256[],uint256[],bytes)',
+    'balanceOf(address,uint256)',
+    'balanceOfBatch(address[],uint256[])',
+    'setApprovalForAll(address,bool)',
+    'isApprovedForAll(address,address)'
+])
+
+# https://github.com/ethereum/EIPs/blob/master/EIPS/eip-165.md
+ERC165_INTERFACE = ContractInterface('erc165', [
+    'supportsInterface(bytes4)'
+])
+
+# https://github.com/ethereum/EIPs/blob/master/EIPS/eip-777.md
+ERC777_INTERFACE = ContractInterface('erc777', [
+    'granularity()',
+    'defaultOperators()',
+    'isOperatorFor(address,address)',
+    'authorizeOperator(address)',
+    'revokeOperator(address)',
+    'send(address,uint256,bytes)',
+    'operatorSend(address,address,uint256,bytes,bytes)'
+])
+
+# https://github.com/ethereum/EIPs/blob/master/EIPS/eip-897.md
+DELEGATE_PROXY_INTERFACE = ContractInterface('delegate_proxy', [
+    'implementation()',
+    'proxyType()'
+])
+
+# https://github.com/ethereum/EIPs/blob/master/EIPS/eip-1822.md
+# https://github.com/OpenZeppelin/openzeppelin-solidity/blob/master/contracts/proxy/UpgradeabilityProxy.sol
+UPGRADEABLE_PROXY_INTERFACE = ContractInterface('upgradeable_proxy', [], any_of_functions=[
+    ['upgradeTo(address)', 'upgradeToAndCall(address,bytes)', 'updateCodeAddress(address)']
+])
+
+contract_interface_registry = ContractInterfaceRegistry()
+for _interface in [ERC20_INTERFACE, ERC721_INTERFACE, ERC1155_INTERFACE, ERC165_INTERFACE, ERC777_INTERFACE,
+                   DELEGATE_PROXY_INTERFACE, UPGRADEABLE_PROXY_INTERFACE]:
+    contract_interface_registry.register(_interface)
+
+
+def register_contract_interface(interface):
+    contract_interface_registry.register(interface)
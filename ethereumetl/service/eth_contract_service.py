@@ -19,56 +19,29 @@
 # LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
 # OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
 # SOFTWARE.
-from eth_utils import function_signature_to_4byte_selector
+from ethereumetl.service.eth_contract_interfaces import ERC20_INTERFACE, ERC721_INTERFACE
 
-from ethereum_dasm.evmdasm import EVMCode
+# https://github.com/ethereum/go-ethereum/blob/master/core/vm/opcodes.go
+PUSH1 = 0x60
+PUSH4 = 0x63
+PUSH32 = 0x7f
+JUMPDEST = 0x5b
 
 
 class EthContractService:
 
     def get_function_sighashes(self, bytecode):
-        evm_dasm = EVMCode()
         bytecode = clean_bytecode(bytecode)
         if bytecode is not None:
-            disassembled_code = evm_dasm.disassemble(bytecode)
-
-            basic_blocks = list(evm_dasm.basicblocks(disassembled_code))
-            if basic_blocks and len(basic_blocks) > 0:
-                init_block = basic_blocks[0]
-                instructions = init_block.instructions
-                push4_instructions = [inst for inst in instructions if inst.name == 'PUSH4']
-                return sorted(list(set('0x' + inst.operand for inst in push4_instructions)))
-            else:
-                return []
+            return sorted(scan_function_sighashes(bytecode_to_bytes(bytecode)))
         else:
             return []
 
-    # https://github.com/ethereum/EIPs/blob/master/EIPS/eip-20.md
-    # https://github.com/OpenZeppelin/openzeppelin-solidity/blob/master/contracts/token/ERC20/ERC20.sol
     def is_erc20_contract(self, function_sighashes):
-        c = ContractWrapper(function_sighashes)
-        return c.implements('totalSupply()') and \
-               c.implements('balanceOf(address)') and \
-               c.implements('transfer(address,uint256)') and \
-               c.implements('transferFrom(address,address,uint256)') and \
-               c.implements('approve(address,uint256)') and \
-               c.implements('allowance(address,address)')
+        return ERC20_INTERFACE.is_implemented_by(function_sighashes)
 
-    # https://github.com/ethereum/EIPs/blob/master/EIPS/eip-721.md
-    # https://github.com/OpenZeppelin/openzeppelin-solidity/blob/master/contracts/token/ERC721/ERC721Basic.sol
-    # Doesn't check the below ERC721 methods to match CryptoKitties contract
-    # getApproved(uint256)
-    # setApprovalForAll(address,bool)
-    # isApprovedForAll(address,address)
-    # transferFrom(address,address,uint256)
-    # safeTransferFrom(address,address,uint256)
-    # safeTransferFrom(address,address,uint256,bytes)
     def is_erc721_contract(self, function_sighashes):
-        c = ContractWrapper(function_sighashes)
-        return c.implements('balanceOf(address)') and \
-               c.implements('ownerOf(uint256)') and \
-               c.implements_any_of('transfer(address,uint256)', 'transferFrom(address,address,uint256)') and \
-               c.implements('approve(address,uint256)')
+        return ERC721_INTERFACE.is_implemented_by(function_sighashes)
 
 
 def clean_bytecode(bytecode):
@@ -80,17 +53,33 @@ def clean_bytecode(bytecode):
         return bytecode
 
 
-def get_function_sighash(signature):
-    return '0x' + function_signature_to_4byte_selector(signature).hex()
+def bytecode_to_bytes(bytecode):
+    try:
+        return bytes.fromhex(bytecode)
+    except ValueError:
+        # Skip malformed characters and byte pairs the same way the disassembler does
+        chars = [char for char in bytecode if char in HEX_CHARS_AND_X]
+        pairs = (first + second for first, second in zip(chars[::2], chars[1::2]))
+        return bytes(int(pair, 16) for pair in pairs if 'x' not in pair)
 
 
-class ContractWrapper:
-    def __init__(self, sighashes):
-        self.sighashes = sighashes
+HEX_CHARS_AND_X = frozenset('1234567890abcdefABCDEFx')
 
-    def implements(self, function_signature):
-        sighash = get_function_sighash(function_signature)
-        return sighash in self.sighashes
 
-    def implements_any_of(self, *function_signatures):
-        return any(self.implements(function_signature) for function_signature in function_signatures)
+def scan_function_sighashes(code):
+    """Collects the operands of PUSH4 instructions in the first basic block, i.e. before the first JUMPDEST.
+    This is where the Solidity function dispatcher compares the function selector.
+    Walks the code once without disassembling it into instruction objects."""
+    sighashes = set()
+    code_length = len(code)
+    pc = 0
+    while pc < code_length:
+        opcode = code[pc]
+        if opcode == JUMPDEST:
+            break
+        if PUSH1 <= opcode <= PUSH32:
+            if opcode == PUSH4:
+                sighashes.add('0x' + code[pc + 1:pc + 5].hex())
+            pc += opcode - PUSH1 + 1
+        pc += 1
+    return sighashes
@@ -0,0 +1,97 @@
+# MIT License
+#
+# Copyright (c) 2018 Evgeny Medvedev, evge.medvedev@gmail.com
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+
+
+from eth_utils import decode_hex
+
+from ethereumetl.service.eth_contract_interfaces import get_function_sighash
+
+# https://github.com/mds1/multicall
+# Multicall3 is deployed at the same address on most EVM chains
+MULTICALL3_ADDRESS = '0xca11bde05977b3631167028862be2a173976ca11'
+# Ethereum mainnet block Multicall3 was deployed in. Calls pinned to earlier blocks can't use it
+MULTICALL3_DEPLOYMENT_BLOCK = 14353601
+
+# tryAggregate(bool requireSuccess, (address target, bytes callData)[] calls)
+#     returns ((bool success, bytes returnData)[] returnData)
+TRY_AGGREGATE_SELECTOR = get_function_sighash('tryAggregate(bool,(address,bytes)[])')
+
+WORD_SIZE = 32
+
+
+# eth_abi 1.x doesn't support tuple types, so tryAggregate input and output are encoded here
+def encode_try_aggregate(calls, require_success=False):
+    """calls is a list of (address, data) tuples with hex strings. Returns hex encoded call data"""
+    heads = []
+    tails = []
+    tails_size = 0
+    for address, data in calls:
+        # Tuple offsets are relative to the start of the array elements
+        heads.append(encode_uint(len(calls) * WORD_SIZE + tails_size))
+        call_data = decode_hex(data)
+        # Tuple (address, bytes): address, offset of bytes relative to the tuple start, bytes length, padded bytes
+        tail = encode_address(address) + encode_uint(2 * WORD_SIZE) + encode_uint(len(call_data)) + \
+            pad_right(call_data)
+        tails.append(tail)
+        tails_size += len(tail)
+
+    encoded = encode_uint(1 if require_success else 0) + encode_uint(2 * WORD_SIZE) + encode_uint(len(calls)) + \
+        b''.join(heads) + b''.join(tails)
+    return TRY_AGGREGATE_SELECTOR + encoded.hex()
+
+
+def decode_try_aggregate_result(data):
+    """Returns a list of (success, return_data) tuples. Raises ValueError if data is malformed"""
+    array_start = read_uint(data, 0)
+    length = read_uint(data, array_start)
+    elements_start = array_start + WORD_SIZE
+    results = []
+    for index in range(length):
+        tuple_start = elements_start + read_uint(data, elements_start + index * WORD_SIZE)
+        success = read_uint(data, tuple_start) != 0
+        bytes_start = tuple_start + read_uint(data, tuple_start + WORD_SIZE)
+        bytes_length = read_uint(data, bytes_start)
+        return_data = data[bytes_start + WORD_SIZE:bytes_start + WORD_SIZE + bytes_length]
+        if len(return_data) != bytes_length:
+            raise ValueError('Return data of call {} is out of bounds'.format(index))
+        results.append((success, return_data))
+    return results
+
+
+def encode_uint(value):
+    return value.to_bytes(WORD_SIZE, byteorder='big')
+
+
+def encode_address(address):
+    return bytes(WORD_SIZE - 20) + decode_hex(address)
+
+
+def pad_right(data):
+    return data + bytes(-len(data) % WORD_SIZE)
+
+
+def read_uint(data, offset):
+    word = data[offset:offset + WORD_SIZE]
+    if len(word) != WORD_SIZE:
+        raise ValueError('Offset {} is out of bounds, data length is {}'.format(offset, len(data)))
+    return int.from_bytes(word, byteorder='big')
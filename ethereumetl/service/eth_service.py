@@ -21,20 +21,42 @@
 # SOFTWARE.
 
 
+import json
 from datetime import datetime, timezone
 
+from ethereumetl.json_rpc_requests import generate_get_block_by_number_json_rpc
 from ethereumetl.service.graph_operations import GraphOperations, OutOfBoundsError, Point
+from ethereumetl.utils import hex_to_dec, rpc_response_batch_to_results
 
 
 class EthService(object):
-    def __init__(self, web3):
-        graph = BlockTimestampGraph(web3)
-        self._graph_operations = GraphOperations(graph)
+    def __init__(self, web3, block_timestamp_index=None, batch_web3_provider=None):
+        """block_timestamp_index is an optional BlockTimestampIndex shared across runs,
+        with it repeated lookups need few or no JSON RPC calls.
+        batch_web3_provider is used to retrieve blocks in batches in get_block_ranges_for_dates"""
+        graph = BlockTimestampGraph(web3, batch_web3_provider)
+        self._graph_operations = GraphOperations(graph, block_timestamp_index)
 
     def get_block_range_for_date(self, date):
-        start_datetime = datetime.combine(date, datetime.min.time(), tzinfo=timezone.utc)
-        end_datetime = datetime.combine(date, datetime.max.time(), tzinfo=timezone.utc)
-        return self.get_block_range_for_timestamps(start_datetime.timestamp(), end_datetime.timestamp())
+        start_timestamp, end_timestamp = get_timestamps_for_date(date)
+        return self.get_block_range_for_timestamps(start_timestamp, end_timestamp)
+
+    def get_block_ranges_for_dates(self, dates):
+        """Same as get_block_range_for_date for many dates, the block bounds for all dates are searched together"""
+        timestamp_ranges = [get_timestamps_for_date(date) for date in dates]
+        timestamps = [timestamp for timestamp_range in timestamp_ranges for timestamp in timestamp_range]
+        bounds = self._graph_operations.get_bounds_for_y_coordinates(timestamps)
+
+        block_ranges = []
+        for index in range(len(timestamp_ranges)):
+            start_block_bounds, end_block_bounds = bounds[2 * index], bounds[2 * index + 1]
+            # Timestamps before the 1st block are out of bounds
+            if start_block_bounds is None:
+                start_block_bounds = (0, 0)
+            if end_block_bounds is None:
+                raise OutOfBoundsError('The existing blocks do not completely cover the given time range')
+            block_ranges.append(bounds_to_block_range(start_block_bounds, end_block_bounds))
+        return block_ranges
 
     def get_block_range_for_timestamps(self, start_timestamp, end_timestamp):
         start_timestamp = int(start_timestamp)
@@ -52,22 +74,33 @@ class EthService(object):
         except OutOfBoundsError as e:
             raise OutOfBoundsError('The existing blocks do not completely cover the given time range') from e
 
-        if start_block_bounds == end_block_bounds and start_block_bounds[0] != start_block_bounds[1]:
-            raise ValueError('The given timestamp range does not cover any blocks')
+        return bounds_to_block_range(start_block_bounds, end_block_bounds)
 
-        start_block = start_block_bounds[1]
-        end_block = end_block_bounds[0]
 
-        # The genesis block has timestamp 0 but we include it with the 1st block.
-        if start_block == 1:
-            start_block = 0
+def get_timestamps_for_date(date):
+    start_datetime = datetime.combine(date, datetime.min.time(), tzinfo=timezone.utc)
+    end_datetime = datetime.combine(date, datetime.max.time(), tzinfo=timezone.utc)
+    return int(start_datetime.timestamp()), int(end_datetime.timestamp())
 
-        return start_block, end_block
+
+def bounds_to_block_range(start_block_bounds, end_block_bounds):
+    if start_block_bounds == end_block_bounds and start_block_bounds[0] != start_block_bounds[1]:
+        raise ValueError('The given timestamp range does not cover any blocks')
+
+    start_block = start_block_bounds[1]
+    end_block = end_block_bounds[0]
+
+    # The genesis block has timestamp 0 but we include it with the 1st block.
+    if start_block == 1:
+        start_block = 0
+
+    return start_block, end_block
 
 
 class BlockTimestampGraph(object):
-    def __init__(self, web3):
+    def __init__(self, web3, batch_web3_provider=None):
         self._web3 = web3
+        self._batch_web3_provider = batch_web3_provider
 
     def get_first_point(self):
         # Ignore the genesis block as its timestamp is 0
@@ -79,6 +112,15 @@ class BlockTimestampGraph(object):
     def get_point(self, x):
         return block_to_point(self._web3.eth.getBlock(x))
 
+    def get_points(self, xs):
+        if self._batch_web3_provider is None:
+            return [self.get_point(x) for x in xs]
+
+        blocks_rpc = list(generate_get_block_by_number_json_rpc(xs, False))
+        response = self._batch_web3_provider.make_request(json.dumps(blocks_rpc))
+        return [Point(hex_to_dec(block['number']), hex_to_dec(block['timestamp']))
+                for block in rpc_response_batch_to_results(response)]
+
 
 def block_to_point(block):
     return Point(block.number, block.timestamp)
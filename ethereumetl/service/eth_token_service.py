@@ -21,24 +21,44 @@
 # SOFTWARE.
 
 
+import codecs
+import json
+
+from eth_abi import decode_abi
+from eth_abi.exceptions import DecodingError
+from eth_utils import decode_hex
 from web3.exceptions import BadFunctionCallOutput
 
 from ethereumetl.domain.token import EthToken
 from ethereumetl.erc20_abi import ERC20_ABI
+from ethereumetl.json_rpc_requests import generate_eth_call_json_rpc
+from ethereumetl.service.eth_contract_interfaces import get_function_sighash
+from ethereumetl.service.eth_multicall import MULTICALL3_ADDRESS, MULTICALL3_DEPLOYMENT_BLOCK, \
+    decode_try_aggregate_result, encode_try_aggregate
 
 
+# If token_cache is given, symbol, name and decimals found in the cache are not fetched.
+# total_supply is always fetched as calls are made at the latest block
 class EthTokenService(object):
-    def __init__(self, web3, function_call_result_transformer=None):
+    def __init__(self, web3, function_call_result_transformer=None, token_cache=None):
         self._web3 = web3
         self._function_call_result_transformer = function_call_result_transformer
+        self._token_cache = token_cache
 
     def get_token(self, token_address):
+        cached_fields = self._token_cache.get(token_address) if self._token_cache is not None else {}
+
         checksum_address = self._web3.toChecksumAddress(token_address)
         contract = self._web3.eth.contract(address=checksum_address, abi=ERC20_ABI)
 
-        symbol = self._call_contract_function(contract.functions.symbol())
-        name = self._call_contract_function(contract.functions.name())
-        decimals = self._call_contract_function(contract.functions.decimals())
+        if len(cached_fields) > 0:
+            symbol = cached_fields['symbol']
+            name = cached_fields['name']
+            decimals = cached_fields['decimals']
+        else:
+            symbol = self._call_contract_function(contract.functions.symbol())
+            name = self._call_contract_function(contract.functions.name())
+            decimals = self._call_contract_function(contract.functions.decimals())
         total_supply = self._call_contract_function(contract.functions.totalSupply())
 
         token = EthToken()
@@ -48,6 +68,9 @@ class EthTokenService(object):
         token.decimals = decimals
         token.total_supply = total_supply
 
+        if self._token_cache is not None:
+            self._token_cache.put(token)
+
         return token
 
     def _call_contract_function(self, func):
@@ -74,3 +97,169 @@ def call_contract_function(func, ignore_errors, default_value=None):
             return default_value
         else:
             raise ex
+
+
+# Token field, function selector and the return type of the function
+TOKEN_FUNCTIONS = [
+    ('symbol', get_function_sighash('symbol()'), 'string'),
+    ('name', get_function_sighash('name()'), 'string'),
+    ('decimals', get_function_sighash('decimals()'), 'uint8'),
+    ('total_supply', get_function_sighash('totalSupply()'), 'uint256'),
+]
+
+
+# Same as EthTokenService but calls the token functions for many tokens in a single JSON RPC batch.
+# block is the block number calls are pinned to, for reproducible results
+class EthBatchTokenService(object):
+    def __init__(self, batch_web3_provider, function_call_result_transformer=None, block='latest', token_cache=None):
+        self._batch_web3_provider = batch_web3_provider
+        self._function_call_result_transformer = function_call_result_transformer
+        self._block = block
+        self._token_cache = token_cache
+
+    def get_tokens(self, token_addresses):
+        tokens = []
+        fetched_tokens = []
+        calls = []
+        # token, field and return type for every call
+        call_fields = []
+        for token_address in token_addresses:
+            cached_fields = self._token_cache.get(token_address, self._block) if self._token_cache is not None else {}
+            token = token_from_fields(token_address, cached_fields)
+            for field, selector, return_type in TOKEN_FUNCTIONS:
+                if field not in cached_fields:
+                    calls.append({'to': token_address, 'data': selector})
+                    call_fields.append((token, field, return_type))
+            if len(cached_fields) < len(TOKEN_FUNCTIONS):
+                fetched_tokens.append(token)
+            tokens.append(token)
+
+        results = self._call(calls)
+        for (token, field, return_type), result in zip(call_fields, results):
+            value = decode_call_result(result, return_type)
+            if self._function_call_result_transformer is not None:
+                value = self._function_call_result_transformer(value)
+            setattr(token, field, value)
+
+        if self._token_cache is not None:
+            for token in fetched_tokens:
+                self._token_cache.put(token, self._block)
+
+        return tokens
+
+    def _call(self, calls):
+        """Returns the result of every call in the same order, None for calls that failed in the EVM"""
+        if len(calls) == 0:
+            return []
+        calls_rpc = list(generate_eth_call_json_rpc(calls, self._block))
+        response_batch = self._batch_web3_provider.make_request(json.dumps(calls_rpc))
+        if not isinstance(response_batch, list):
+            raise ValueError('Unexpected response to batch request {}'.format(response_batch))
+
+        results = [None] * len(calls)
+        for response in response_batch:
+            # request id is the index of the call in calls list
+            request_id = response['id']
+            error = response.get('error')
+            if error is not None:
+                if not is_call_execution_error(error):
+                    raise ValueError('Error in response {}'.format(response))
+            else:
+                results[request_id] = response.get('result')
+        return results
+
+
+# Packs calls_per_aggregate token function calls into a single call to Multicall3 tryAggregate,
+# so thousands of tokens take a handful of eth_calls.
+# Falls back to EthBatchTokenService calls for blocks before Multicall3 deployment
+# and for aggregates that fail as a whole, e.g. when there is no Multicall3 contract on the chain.
+class EthMulticallTokenService(EthBatchTokenService):
+    def __init__(
+            self,
+            batch_web3_provider,
+            function_call_result_transformer=None,
+            block='latest',
+            calls_per_aggregate=500,
+            multicall_address=MULTICALL3_ADDRESS,
+            multicall_deployment_block=MULTICALL3_DEPLOYMENT_BLOCK,
+            token_cache=None):
+        super().__init__(batch_web3_provider, function_call_result_transformer, block, token_cache)
+        self._calls_per_aggregate = calls_per_aggregate
+        self._multicall_address = multicall_address
+        self._multicall_deployment_block = multicall_deployment_block
+
+    def _call(self, calls):
+        if len(calls) == 0:
+            return []
+        if isinstance(self._block, int) and self._block < self._multicall_deployment_block:
+            return super()._call(calls)
+
+        call_chunks = [calls[start:start + self._calls_per_aggregate]
+                       for start in range(0, len(calls), self._calls_per_aggregate)]
+        aggregate_calls = [{
+            'to': self._multicall_address,
+            'data': encode_try_aggregate([(call['to'], call['data']) for call in call_chunk])
+        } for call_chunk in call_chunks]
+        aggregate_results = super()._call(aggregate_calls)
+
+        results = []
+        for call_chunk, aggregate_result in zip(call_chunks, aggregate_results):
+            chunk_results = self._decode_aggregate_result(aggregate_result, len(call_chunk))
+            if chunk_results is None:
+                chunk_results = super()._call(call_chunk)
+            results.extend(chunk_results)
+        return results
+
+    def _decode_aggregate_result(self, aggregate_result, number_of_calls):
+        """Returns None if the aggregate call failed as a whole"""
+        if aggregate_result is None:
+            return None
+        try:
+            call_results = decode_try_aggregate_result(decode_hex(aggregate_result))
+        except ValueError:
+            return None
+        if len(call_results) != number_of_calls:
+            return None
+        return ['0x' + return_data.hex() if success else None for success, return_data in call_results]
+
+
+def token_from_fields(token_address, fields):
+    token = EthToken()
+    token.address = token_address
+    for field, value in fields.items():
+        setattr(token, field, value)
+    return token
+
+
+def is_call_execution_error(error):
+    # Newer nodes return an error instead of empty output if the call reverted. Other errors, e.g. rate limits,
+    # are not specific to the call, so they are raised and the batch is retried
+    message = str(error.get('message', '')).lower() if isinstance(error, dict) else str(error).lower()
+    return 'revert' in message or 'invalid opcode' in message or 'out of gas' in message or \
+        'invalid jump' in message or 'stack underflow' in message
+
+
+def decode_call_result(result, return_type):
+    if result is None:
+        return None
+    try:
+        data = decode_hex(result)
+    except (ValueError, TypeError):
+        return None
+
+    # The same errors are ignored in EthTokenService: the function is missing or returns a different type
+    try:
+        value = decode_abi([return_type], data)[0]
+    except (DecodingError, OverflowError):
+        # Some tokens e.g. MKR and EOS return bytes32 instead of string
+        if return_type == 'string' and len(data) == 32:
+            return decode_bytes32_string(data)
+        return None
+
+    if return_type == 'string':
+        return codecs.decode(value, 'utf8', 'backslashreplace')
+    return value
+
+
+def decode_bytes32_string(data):
+    return codecs.decode(data.rstrip(b'\x00'), 'utf8', 'backslashreplace')
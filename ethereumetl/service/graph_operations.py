@@ -21,19 +21,37 @@
 # SOFTWARE.
 
 
+import bisect
+import collections
+import threading
+
 from ethereumetl.utils import pairwise
 
+DEFAULT_CACHE_CAPACITY = 100000
+
+# When the bounds are this close all points between them are retrieved
+FETCH_ALL_POINTS_THRESHOLD = 32
+# Besides the interpolated x, points at this fraction of the bounds range on both sides of it are retrieved
+PROBE_SPREAD_DIVISOR = 64
+
 
 class GraphOperations(object):
-    def __init__(self, graph):
-        """x axis on the graph must be integers, y value must increase strictly monotonically with increase of x"""
+    def __init__(self, graph, point_index=None, cache_capacity=DEFAULT_CACHE_CAPACITY):
+        """x axis on the graph must be integers, y value must increase strictly monotonically with increase of x.
+        point_index is an optional persistent index of known points, e.g. BlockTimestampIndex.
+        It's used for the initial bounds and points retrieved from the graph are added to it.
+        cache_capacity is the maximum number of retrieved points kept in memory.
+        GraphOperations is thread safe if the graph is thread safe"""
         self._graph = graph
-        self._cached_points = []
+        self._point_index = point_index
+        self._cached_points = SortedPointCache(cache_capacity)
 
     def get_bounds_for_y_coordinate(self, y):
         """given the y coordinate, outputs a pair of x coordinates for closest points that bound the y coordinate.
         Left and right bounds are equal in case given y is equal to one of the points y coordinate"""
-        initial_bounds = find_best_bounds(y, self._cached_points)
+        initial_bounds = self._cached_points.find_bounds(y)
+        if initial_bounds is None and self._point_index is not None:
+            initial_bounds = self._get_initial_bounds_from_index(y)
         if initial_bounds is None:
             initial_bounds = self._get_first_point(), self._get_last_point()
 
@@ -86,22 +104,153 @@ class GraphOperations(object):
 
             return self._get_bounds_for_y_coordinate_recursive(y, *bounds)
 
+    def get_bounds_for_y_coordinates(self, ys):
+        """Same as get_bounds_for_y_coordinate for many y coordinates. The searches for all y coordinates share
+        the retrieved points and the points for each search round are retrieved together with graph.get_points.
+        Returns the list of bounds in the same order as ys, None for the y coordinates that are out of bounds"""
+        known_points = SortedPointCache()
+        for point in self._cached_points.points():
+            known_points.add(point)
+        pending_ys = sorted(set(ys))
+
+        if self._point_index is not None:
+            for y in pending_ys:
+                for point in self._point_index.find_bounds(y):
+                    if point is not None:
+                        known_points.add(Point(*point))
+        if any(known_points.find_bounds(y) is None for y in pending_ys):
+            known_points.add(self._get_first_point())
+            known_points.add(self._get_last_point())
+
+        bounds_by_y = {}
+        while len(pending_ys) > 0:
+            xs_to_retrieve = set()
+            next_pending_ys = []
+            for y in pending_ys:
+                bounds = known_points.find_bounds(y)
+                if bounds is None:
+                    bounds_by_y[y] = None
+                    continue
+                start, end = bounds
+                if y == start.y:
+                    bounds_by_y[y] = (start.x, start.x)
+                elif y == end.y:
+                    bounds_by_y[y] = (end.x, end.x)
+                elif (end.x - start.x) <= 1:
+                    bounds_by_y[y] = (start.x, end.x)
+                else:
+                    next_pending_ys.append(y)
+                    xs_to_retrieve.update(get_probe_xs(start, end, y))
+
+            if len(xs_to_retrieve) > 0:
+                for point in self._get_points(sorted(xs_to_retrieve)):
+                    known_points.add(point)
+            pending_ys = next_pending_ys
+
+        return [bounds_by_y[y] for y in ys]
+
+    def _get_points(self, xs):
+        get_points = getattr(self._graph, 'get_points', None)
+        if get_points is not None:
+            points = get_points(xs)
+        else:
+            points = [self._graph.get_point(x) for x in xs]
+        for point in points:
+            self._cache_point(point)
+        return points
+
+    def _get_initial_bounds_from_index(self, y):
+        lower, upper = self._point_index.find_bounds(y)
+        if lower is None and upper is None:
+            return None
+        start = Point(*lower) if lower is not None else self._get_first_point()
+        # The last point is not indexed so y coordinates above the indexed ones need it
+        end = Point(*upper) if upper is not None else self._get_last_point()
+        self._cached_points.add(start)
+        self._cached_points.add(end)
+        return start, end
+
     def _get_point(self, x):
         point = self._graph.get_point(x)
-        self._cached_points.append(point)
+        self._cache_point(point)
         return point
 
     def _get_first_point(self):
         point = self._graph.get_first_point()
-        self._cached_points.append(point)
+        self._cache_point(point)
         return point
 
+    def _cache_point(self, point):
+        self._cached_points.add(point)
+        if self._point_index is not None:
+            self._point_index.add(point.x, point.y)
+
     def _get_last_point(self):
         point = self._graph.get_last_point()
-        self._cached_points.append(point)
+        # The last point is not added to the point index as it can change, e.g. in chain reorganisations
+        self._cached_points.add(point)
         return point
 
 
+def get_probe_xs(start, end, y):
+    if (end.x - start.x) <= FETCH_ALL_POINTS_THRESHOLD:
+        return range(start.x + 1, end.x)
+
+    x = bound(interpolate(start, end, y), (start.x, end.x))
+    # Interpolation rarely hits the exact x, the points around it are likely to bound y closely
+    spread = max((end.x - start.x) // PROBE_SPREAD_DIVISOR, 1)
+    return {bound(x - spread, (start.x, end.x)), x, bound(x + spread, (start.x, end.x))}
+
+
+# Thread safe store of points sorted by x, which are also sorted by y as y increases with x.
+# Bounds for y are found with binary search. If capacity is given, the points added earliest are evicted first
+class SortedPointCache(object):
+    def __init__(self, capacity=None):
+        self.capacity = capacity
+        self._xs = []
+        self._ys = []
+        self._points = []
+        self._insertion_order = collections.deque()
+        self._lock = threading.Lock()
+
+    def add(self, point):
+        with self._lock:
+            index = bisect.bisect_left(self._xs, point.x)
+            if index < len(self._xs) and self._xs[index] == point.x:
+                return
+            self._xs.insert(index, point.x)
+            self._ys.insert(index, point.y)
+            self._points.insert(index, point)
+            self._insertion_order.append(point.x)
+
+            if self.capacity is not None and len(self._xs) > self.capacity:
+                self._remove(self._insertion_order.popleft())
+
+    def find_bounds(self, y):
+        """Returns the closest points bounding y, or None if y is out of the range of the points"""
+        with self._lock:
+            index = bisect.bisect_left(self._ys, y)
+            if index < len(self._ys) and self._ys[index] == y:
+                return self._points[index], self._points[index]
+            if index == 0 or index == len(self._ys):
+                return None
+            return self._points[index - 1], self._points[index]
+
+    def points(self):
+        with self._lock:
+            return list(self._points)
+
+    def __len__(self):
+        with self._lock:
+            return len(self._points)
+
+    def _remove(self, x):
+        index = bisect.bisect_left(self._xs, x)
+        del self._xs[index]
+        del self._ys[index]
+        del self._points[index]
+
+
 def find_best_bounds(y, points):
     sorted_points = sorted(points, key=lambda point: point.y)
     for point1, point2 in pairwise(sorted_points):
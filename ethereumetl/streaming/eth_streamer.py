@@ -0,0 +1,225 @@
+# MIT License
+#
+# Copyright (c) 2018 Evgeny Medvedev, evge.medvedev@gmail.com
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+
+
+import logging
+import os
+import time
+
+from ethereumetl.jobs.export_blocks_and_receipts_job import ExportBlocksAndReceiptsJob
+from ethereumetl.jobs.exporters.in_memory_item_exporter import InMemoryItemExporter
+from ethereumetl.metrics import registry
+from ethereumetl.providers.capabilities import detect_block_receipts_method
+from ethereumetl.streaming.reorg_handler import DEFAULT_REORG_WINDOW_SIZE, ReorgHandler, ReorgTooDeepError
+
+STREAM_ITEM_TYPES = ['block', 'transaction', 'receipt', 'log', 'token_transfer', 'retracted_block']
+
+logger = logging.getLogger('EthStreamer')
+
+BLOCK_HASHES_FILE_SUFFIX = '.block_hashes'
+
+HEAD_BLOCK = registry.gauge('ethereumetl_stream_head_block', 'The latest block number reported by the node.').labels()
+LAST_SYNCED_BLOCK = registry.gauge('ethereumetl_stream_last_synced_block', 'The last exported block number.').labels()
+REORGS = registry.counter('ethereumetl_stream_reorgs_total', 'Chain reorganisations detected by the streamer.').labels()
+
+
+# Follows the chain head and exports blocks, transactions, receipts, logs and token transfers as they appear.
+# Only blocks at least lag blocks behind the head are exported, so they are unlikely to be reorganised.
+# The hashes of the last reorg_window_size exported blocks are kept. When new blocks don't extend them
+# the streamer goes back to the common ancestor, exports a retracted_block item for every block after it
+# and exports the blocks from the new chain in the next cycle. reorg_window_size 0 disables the check.
+# The last exported block is saved in last_synced_block_file after each sync cycle, a restarted streamer
+# continues from it. The hashes in the reorg window are saved next to it, in last_synced_block_file + '.block_hashes'.
+# Items are exported at least once: the blocks of a cycle interrupted after the items were written are exported again.
+# item_types is the list of item types to export, the item exporter must support all of them.
+class EthStreamer(object):
+    def __init__(
+            self,
+            web3,
+            batch_web3_provider,
+            item_exporter,
+            last_synced_block_file='last_synced_block.txt',
+            lag=0,
+            start_block=None,
+            end_block=None,
+            period_seconds=10,
+            block_batch_size=10,
+            batch_size=100,
+            max_workers=5,
+            item_types=STREAM_ITEM_TYPES,
+            reorg_window_size=DEFAULT_REORG_WINDOW_SIZE):
+        self.web3 = web3
+        self.batch_web3_provider = batch_web3_provider
+        self.item_exporter = item_exporter
+        self.last_synced_block_file = last_synced_block_file
+        self.lag = lag
+        self.start_block = start_block
+        self.end_block = end_block
+        self.period_seconds = period_seconds
+        self.block_batch_size = block_batch_size
+        self.batch_size = batch_size
+        self.max_workers = max_workers
+        self.item_types = item_types
+        for item_type in item_types:
+            if item_type not in STREAM_ITEM_TYPES:
+                raise ValueError('Item type {} is not supported. Supported item types: {}'
+                                 .format(item_type, ', '.join(STREAM_ITEM_TYPES)))
+        self.reorg_handler = ReorgHandler(batch_web3_provider, reorg_window_size) if reorg_window_size > 0 else None
+        self.block_hashes_file = last_synced_block_file + BLOCK_HASHES_FILE_SUFFIX
+
+        self.last_synced_block = None
+        self.block_receipts_method = None
+
+    def stream(self):
+        restarted = os.path.isfile(self.last_synced_block_file)
+        self.last_synced_block = self._get_initial_last_synced_block()
+        if self.reorg_handler is not None and restarted:
+            self.reorg_handler.load(self.block_hashes_file, self.last_synced_block)
+        if any(item_type in ('receipt', 'log', 'token_transfer') for item_type in self.item_types):
+            self.block_receipts_method = detect_block_receipts_method(self.batch_web3_provider)
+        self.item_exporter.open()
+        try:
+            while self.end_block is None or self.last_synced_block < self.end_block:
+                synced_blocks = 0
+                try:
+                    synced_blocks = self._sync_cycle()
+                except ReorgTooDeepError:
+                    raise
+                except Exception:
+                    # Errors are usually caused by the node, e.g. it's restarting or not fully synced
+                    logger.exception('An exception occurred while syncing block data.')
+                if synced_blocks <= 0:
+                    logger.info('Nothing to sync. Sleeping for {} seconds...'.format(self.period_seconds))
+                    time.sleep(self.period_seconds)
+        finally:
+            self.item_exporter.close()
+
+    def _sync_cycle(self):
+        current_block = self.web3.eth.blockNumber
+        HEAD_BLOCK.set(current_block)
+        target_block = current_block - self.lag
+        target_block = min(target_block, self.last_synced_block + self.block_batch_size)
+        if self.end_block is not None:
+            target_block = min(target_block, self.end_block)
+        blocks_to_sync = max(target_block - self.last_synced_block, 0)
+        logger.info('Current block {}, target block {}, last synced block {}, blocks to sync {}'.format(
+            current_block, target_block, self.last_synced_block, blocks_to_sync))
+
+        if blocks_to_sync > 0:
+            items = self.get_items_for_block_range(self.last_synced_block + 1, target_block)
+            if self.reorg_handler is not None:
+                common_ancestor = self.reorg_handler.find_common_ancestor(items['block'])
+                if common_ancestor is not None:
+                    return self._rollback(common_ancestor)
+            self._export_items(items)
+            if self.reorg_handler is not None:
+                self.reorg_handler.add_blocks(items['block'])
+                # Hashes after the checkpoint are ignored when they are loaded, so they are saved first
+                self.reorg_handler.save(self.block_hashes_file)
+            write_last_synced_block(self.last_synced_block_file, target_block)
+            self.last_synced_block = target_block
+            LAST_SYNCED_BLOCK.set(target_block)
+
+        return blocks_to_sync
+
+    def export_block_range(self, start_block, end_block):
+        self._export_items(self.get_items_for_block_range(start_block, end_block))
+
+    def _export_items(self, items):
+        for item_type in self.item_types:
+            for item in items.get(item_type, []):
+                self.item_exporter.export_item(item)
+        # Items must be written before the checkpoint
+        flush = getattr(self.item_exporter, 'flush', None)
+        if flush is not None:
+            flush()
+
+    def _rollback(self, common_ancestor):
+        retracted_blocks = self.reorg_handler.rollback(common_ancestor)
+        REORGS.inc()
+        logger.warning('Chain reorganisation detected. Retracting blocks {} to {}'.format(
+            common_ancestor + 1, self.last_synced_block))
+        # The checkpoint is moved back before the retractions are written. If the streamer stops in between
+        # the new blocks are still exported, the stale ones are left in the output but there is no gap
+        write_last_synced_block(self.last_synced_block_file, common_ancestor)
+        self.reorg_handler.save(self.block_hashes_file)
+        self.last_synced_block = common_ancestor
+        LAST_SYNCED_BLOCK.set(common_ancestor)
+        self._export_items({'retracted_block': retracted_blocks})
+        return len(retracted_blocks)
+
+    def get_items_for_block_range(self, start_block, end_block):
+        """Returns a dict from item type to the list of items, sorted by block number and index in the block"""
+        export_receipts = any(item_type in ('receipt', 'log', 'token_transfer') for item_type in self.item_types)
+        exporter = InMemoryItemExporter(item_types=['block', 'transaction', 'receipt', 'log', 'token_transfer'])
+        # Blocks are always exported, their hashes are used to detect reorganisations
+        job = ExportBlocksAndReceiptsJob(
+            start_block=start_block,
+            end_block=end_block,
+            batch_size=self.batch_size,
+            batch_web3_provider=self.batch_web3_provider,
+            max_workers=self.max_workers,
+            item_exporter=exporter,
+            export_blocks=True,
+            export_transactions=any(item_type != 'block' for item_type in self.item_types),
+            export_receipts=export_receipts,
+            export_logs=export_receipts,
+            export_token_transfers='token_transfer' in self.item_types,
+            block_receipts_method=self.block_receipts_method)
+        job.run()
+
+        return {
+            'block': sort_by(exporter.get_items('block'), 'number'),
+            'transaction': sort_by(exporter.get_items('transaction'), 'block_number', 'transaction_index'),
+            'receipt': sort_by(exporter.get_items('receipt'), 'block_number', 'transaction_index'),
+            'log': sort_by(exporter.get_items('log'), 'block_number', 'log_index'),
+            'token_transfer': sort_by(exporter.get_items('token_transfer'), 'block_number', 'log_index'),
+        }
+
+    def _get_initial_last_synced_block(self):
+        if os.path.isfile(self.last_synced_block_file):
+            if self.start_block is not None:
+                raise ValueError('{} exists, the streamer continues from the block in it. '
+                                 'Remove the file or don\'t provide start_block'.format(self.last_synced_block_file))
+            return read_last_synced_block(self.last_synced_block_file)
+        if self.start_block is not None:
+            return self.start_block - 1
+        # Start from the head
+        return self.web3.eth.blockNumber - self.lag
+
+
+def sort_by(items, *fields):
+    return sorted(items, key=lambda item: tuple(item.get(field) for field in fields))
+
+
+def read_last_synced_block(file):
+    with open(file, 'r') as last_synced_block_file:
+        return int(last_synced_block_file.read().strip())
+
+
+def write_last_synced_block(file, last_synced_block):
+    # Written to a temporary file first so the checkpoint is never partially written
+    tmp_file = file + '.tmp'
+    with open(tmp_file, 'w') as last_synced_block_file:
+        last_synced_block_file.write(str(last_synced_block) + '\n')
+    os.replace(tmp_file, file)
@@ -0,0 +1,160 @@
+# MIT License
+#
+# Copyright (c) 2018 Evgeny Medvedev, evge.medvedev@gmail.com
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+
+
+import json
+import os
+from collections import OrderedDict
+
+from ethereumetl.json_rpc_requests import generate_get_block_by_number_json_rpc
+from ethereumetl.utils import hex_to_dec, rpc_response_batch_to_results
+
+DEFAULT_REORG_WINDOW_SIZE = 64
+
+
+class ReorgTooDeepError(Exception):
+    pass
+
+
+# Hashes of the most recent blocks, oldest blocks are evicted first
+class BlockHashWindow(object):
+    def __init__(self, size):
+        if size <= 0:
+            raise ValueError('size must be greater than 0')
+        self.size = size
+        self._hashes = OrderedDict()
+
+    def add(self, block_number, block_hash):
+        # Blocks must be added in increasing order of block number
+        if len(self._hashes) > 0 and block_number <= next(reversed(self._hashes)):
+            raise ValueError('Block {} is not after the last block in the window'.format(block_number))
+        self._hashes[block_number] = block_hash
+        while len(self._hashes) > self.size:
+            self._hashes.popitem(last=False)
+
+    def get(self, block_number):
+        return self._hashes.get(block_number)
+
+    def remove_after(self, block_number):
+        """Removes and returns (block_number, block_hash) tuples for blocks after block_number, in increasing order"""
+        removed = []
+        while len(self._hashes) > 0 and next(reversed(self._hashes)) > block_number:
+            removed.append(self._hashes.popitem(last=True))
+        return list(reversed(removed))
+
+    def block_numbers(self):
+        return list(self._hashes.keys())
+
+    def __len__(self):
+        return len(self._hashes)
+
+
+# Verifies that exported blocks extend the chain of previously exported blocks using their parent hashes.
+# When they don't, the node switched to another chain and the blocks after the common ancestor must be retracted.
+# The window is saved to a file with save and restored with load, so blocks exported before a restart are verified.
+class ReorgHandler(object):
+    def __init__(self, batch_web3_provider, window_size=DEFAULT_REORG_WINDOW_SIZE):
+        self.batch_web3_provider = batch_web3_provider
+        self.window = BlockHashWindow(window_size)
+
+    def find_common_ancestor(self, blocks):
+        """blocks are block items sorted by number, following the last added block.
+        Returns None if they extend the chain in the window, otherwise the number of the last block in the window
+        that is still in the chain"""
+        if len(blocks) == 0:
+            return None
+        parent_hash = self.window.get(blocks[0]['number'] - 1)
+        if parent_hash is not None and blocks[0]['parent_hash'] != parent_hash:
+            return self._find_common_ancestor_in_window()
+
+        for previous_block, block in zip(blocks, blocks[1:]):
+            if block['parent_hash'] != previous_block['hash']:
+                # Batches were returned from different chains, the range should be exported again
+                raise ValueError('Parent hash of block {} does not match the hash of block {}. '
+                                 'The chain was reorganised during export'
+                                 .format(block['number'], previous_block['number']))
+        return None
+
+    def add_blocks(self, blocks):
+        for block in blocks:
+            self.window.add(block['number'], block['hash'])
+
+    def rollback(self, common_ancestor):
+        """Returns retracted_block items for the blocks after common_ancestor and removes them from the window"""
+        return [retracted_block_item(block_number, block_hash)
+                for block_number, block_hash in self.window.remove_after(common_ancestor)]
+
+    def save(self, file):
+        write_block_hashes(file, self.window)
+
+    def load(self, file, last_synced_block):
+        """Restores the window saved with save. Blocks after last_synced_block were not checkpointed,
+        they are exported again so they are removed from the window"""
+        if os.path.isfile(file):
+            for block_number, block_hash in read_block_hashes(file):
+                if block_number <= last_synced_block:
+                    self.window.add(block_number, block_hash)
+
+    def _find_common_ancestor_in_window(self):
+        block_numbers = self.window.block_numbers()
+        chain_hashes = self._get_block_hashes(block_numbers)
+        for block_number in reversed(block_numbers):
+            if chain_hashes.get(block_number) == self.window.get(block_number):
+                return block_number
+        raise ReorgTooDeepError('No block between {} and {} is in the chain. The reorganisation is deeper than '
+                                'the window of {} blocks'.format(block_numbers[0], block_numbers[-1],
+                                                                  self.window.size))
+
+    def _get_block_hashes(self, block_numbers):
+        blocks_rpc = list(generate_get_block_by_number_json_rpc(block_numbers, include_transactions=False))
+        response = self.batch_web3_provider.make_request(json.dumps(blocks_rpc))
+        return {hex_to_dec(result['number']): result['hash'] for result in rpc_response_batch_to_results(response)}
+
+
+def read_block_hashes(file):
+    """Returns (block_number, block_hash) tuples written by write_block_hashes, in increasing order"""
+    block_hashes = []
+    with open(file, 'r') as block_hashes_file:
+        for line in block_hashes_file:
+            line = line.strip()
+            if len(line) > 0:
+                block_number, block_hash = line.split(',')
+                block_hashes.append((int(block_number), block_hash))
+    return block_hashes
+
+
+def write_block_hashes(file, window):
+    # Written to a temporary file first so the file is never partially written
+    tmp_file = file + '.tmp'
+    with open(tmp_file, 'w') as block_hashes_file:
+        for block_number in window.block_numbers():
+            block_hashes_file.write('{},{}\n'.format(block_number, window.get(block_number)))
+    os.replace(tmp_file, file)
+
+
+def retracted_block_item(block_number, block_hash):
+    return {
+        'type': 'retracted_block',
+        'block_number': block_number,
+        'block_hash': block_hash,
+    }
@@ -0,0 +1,134 @@
+# MIT License
+#
+# Copyright (c) 2018 Evgeny Medvedev, evge.medvedev@gmail.com
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+
+
+import heapq
+import os
+import re
+import struct
+import sys
+import tempfile
+
+DEFAULT_MAX_MEMORY_BYTES = 512 * 1024 * 1024
+
+# Addresses and hashes are stored as 20 and 32 byte binary keys, other values as UTF-8 text.
+# The first byte tells them apart
+TEXT_KEY = b'\x00'
+BINARY_KEY = b'\x01'
+HEX_VALUE_PATTERN = re.compile('^0x(?:[0-9a-f]{40}|[0-9a-f]{64})$')
+
+# Approximate memory per key besides the key itself: the bytes object header and the hash table slots of the set
+KEY_OVERHEAD_BYTES = sys.getsizeof(b'') + 40
+
+RUN_RECORD_LENGTH_FORMAT = '<I'
+RUN_RECORD_LENGTH_SIZE = struct.calcsize(RUN_RECORD_LENGTH_FORMAT)
+
+
+def value_to_key(value):
+    if HEX_VALUE_PATTERN.match(value):
+        return BINARY_KEY + bytes.fromhex(value[2:])
+    return TEXT_KEY + value.encode('utf-8')
+
+
+def key_to_value(key):
+    if key[:1] == BINARY_KEY:
+        return '0x' + key[1:].hex()
+    return key[1:].decode('utf-8')
+
+
+# Writes each distinct value once, one per line. Values are kept in a set of compact binary keys.
+# When the set exceeds max_memory_bytes it is sorted and spilled to a run file in spill_dir, and the distinct
+# values of the remaining runs are found with a merge of the sorted runs at the end.
+# Values seen before the first spill are written in the order they are first seen, the rest in sorted order.
+class UniqueValuesWriter(object):
+    def __init__(self, output_file, max_memory_bytes=DEFAULT_MAX_MEMORY_BYTES, spill_dir=None):
+        self.output_file = output_file
+        self.max_memory_bytes = max_memory_bytes
+        self.spill_dir = spill_dir
+
+        self._keys = set()
+        self._memory_bytes = 0
+        self._temp_dir = None
+        self._run_paths = []
+
+    def write(self, value):
+        key = value_to_key(value)
+        if key in self._keys:
+            return
+        self._keys.add(key)
+        self._memory_bytes += len(key) + KEY_OVERHEAD_BYTES
+        if len(self._run_paths) == 0:
+            # The first run is written as it comes, later runs only after the merge
+            self.output_file.write(value + '\n')
+        if self._memory_bytes > self.max_memory_bytes:
+            self._spill()
+
+    def write_all(self, values):
+        for value in values:
+            self.write(value)
+
+    def close(self):
+        if len(self._run_paths) > 0:
+            self._spill()
+            self._merge_runs()
+            self._temp_dir.cleanup()
+        self._keys = set()
+
+    def _spill(self):
+        if self._temp_dir is None:
+            self._temp_dir = tempfile.TemporaryDirectory(prefix='unique-values-', dir=self.spill_dir)
+        path = os.path.join(self._temp_dir.name, 'run_{}'.format(len(self._run_paths)))
+        with open(path, 'wb') as run_file:
+            for key in sorted(self._keys):
+                run_file.write(struct.pack(RUN_RECORD_LENGTH_FORMAT, len(key)))
+                run_file.write(key)
+        self._run_paths.append(path)
+        self._keys = set()
+        self._memory_bytes = 0
+
+    def _merge_runs(self):
+        # Keys of the first run are already written. Runs are sorted and distinct, so equal keys are adjacent
+        # in the merge, and a key from the first run comes before equal keys from later runs
+        runs = [_tag_keys(run_index, _read_run(path)) for run_index, path in enumerate(self._run_paths)]
+        previous_key = None
+        for key, run_index in heapq.merge(*runs):
+            if key == previous_key:
+                continue
+            previous_key = key
+            if run_index > 0:
+                self.output_file.write(key_to_value(key) + '\n')
+
+
+def _read_run(path):
+    with open(path, 'rb') as run_file:
+        while True:
+            length_bytes = run_file.read(RUN_RECORD_LENGTH_SIZE)
+            if len(length_bytes) < RUN_RECORD_LENGTH_SIZE:
+                return
+            length, = struct.unpack(RUN_RECORD_LENGTH_FORMAT, length_bytes)
+            yield run_file.read(length)
+
+
+def _tag_keys(run_index, keys):
+    for key in keys:
+        yield key, run_index
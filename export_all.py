@@ -28,7 +28,13 @@ from datetime import datetime, timedelta
 from export_all_common import export_all
 from web3 import Web3
 
+from ethereumetl.cache.block_timestamp_index import BlockTimestampIndex
+from ethereumetl.executors.backpressure import default_backpressure_limits
+from ethereumetl.metrics import MetricsTextfileWriter, start_http_server
+from ethereumetl.profiling import profiler
 from ethereumetl.providers.auto import get_provider_from_uri
+from ethereumetl.providers.caching import CACHE_MODES
+from ethereumetl.service.eth_contract_interfaces import parse_contract_interface, register_contract_interface
 from ethereumetl.service.eth_service import EthService
 
 parser = argparse.ArgumentParser(description='Export all for a range of blocks.',
@@ -46,9 +52,84 @@ parser.add_argument('-o', '--output-dir', default='output', type=str,
 parser.add_argument('-w', '--max-workers', default=5, type=int, help='The maximum number of workers.')
 parser.add_argument('-B', '--export-batch-size', default=100, type=int,
                     help='The number of rows to write concurrently.')
+parser.add_argument('--contract-analysis-cache', default=None, type=str,
+                    help='The SQLite file for caching bytecode analysis results across partitions and runs. '
+                         'If not provided results are cached in memory only.')
+parser.add_argument('--analysis-max-workers', default=None, type=int,
+                    help='The number of processes for contract bytecode analysis.')
+parser.add_argument('--interfaces', default=None, type=str,
+                    help='Comma separated names of additional interfaces to detect in contracts e.g. erc1155,erc165. '
+                         'Each one is exported in is_<name> field.')
+parser.add_argument('--custom-interface', default=[], type=str, action='append',
+                    help='Additional interface to register, in the format '
+                         'name:functionSignature1;functionSignature2 e.g. '
+                         'ownable:owner();transferOwnership(address). Can be specified multiple times.')
+parser.add_argument('--token-batch-calls', action='store_true',
+                    help='Call token functions for --batch-size tokens in a single JSON RPC batch. '
+                         'symbol and name returned as bytes32 are decoded, so they can differ from the default.')
+parser.add_argument('--token-multicall', action='store_true',
+                    help='Fetch token metadata with Multicall3 aggregate calls pinned to the partition end block. '
+                         'Requires an archive node for past partitions.')
+parser.add_argument('--token-cache', default=None, type=str,
+                    help='The SQLite file for caching token metadata across partitions and runs. '
+                         'If not provided tokens are cached in memory only.')
+parser.add_argument('--token-cache-total-supply-max-age', default=None, type=int,
+                    help='The number of blocks cached token total_supply is reused for. '
+                         'Only used with --token-multicall. If not provided total_supply is always fetched.')
+parser.add_argument('--single-pass', action='store_true',
+                    help='Export blocks, transactions, receipts, logs and token transfers in one pass over the blocks. '
+                         'Token transfers are extracted from receipt logs, so they are exported with any provider.')
+parser.add_argument('--rpc-cache', default=None, type=str,
+                    help='The SQLite file for caching node responses for historical blocks, receipts, code and calls '
+                         'across runs. Responses for "latest" are not cached.')
+parser.add_argument('--rpc-cache-mode', default='cache', choices=CACHE_MODES,
+                    help='cache: fetch only responses missing from --rpc-cache. record: fetch all responses and '
+                         'update the cache. replay: serve all responses from the cache without calling the node.')
+parser.add_argument('--capture-raw', action='store_true',
+                    help='Write the raw JSON RPC responses of each partition to a gzipped archive in the raw directory. '
+                         'Use export_from_raw_archive.py to export them again without the node.')
+parser.add_argument('--block-timestamp-index', default=None, type=str,
+                    help='The file for caching block timestamps across runs, used to find block ranges for dates. '
+                         'Use a separate file for each chain.')
+parser.add_argument('--max-buffered-items', default=None, type=int,
+                    help='The maximum number of items in batches being processed by all workers. Submitting more '
+                         'batches waits until some finish. If not provided only the number of batches is limited.')
+parser.add_argument('--max-buffered-bytes', default=None, type=int,
+                    help='The maximum estimated size in bytes of node responses for batches being processed by all '
+                         'workers. Use it to bound memory with many workers or large batches.')
+parser.add_argument('--metrics-port', default=None, type=int,
+                    help='The port to serve Prometheus metrics on, at /metrics. '
+                         'If not provided metrics are not served.')
+parser.add_argument('--metrics-textfile', default=None, type=str,
+                    help='The file to write Prometheus metrics to periodically, e.g. for the node_exporter '
+                         'textfile collector. The file name must end with .prom for the collector.')
+parser.add_argument('--profile', default=None, choices=['table', 'json'],
+                    help='Report how the time of each job is split between stages: request building, network, '
+                         'JSON decoding, mapping, serialization and writing. The report is logged as a table '
+                         'or written as JSON.')
+parser.add_argument('--profile-output', default=None, type=str,
+                    help='The file to append profiling reports to. If not provided reports are logged.')
+parser.add_argument('--profile-sample-rate', default=1.0, type=float,
+                    help='The fraction of batches to measure, between 0 and 1. Times are scaled up.')
+parser.add_argument('--cprofile-output', default=None, type=str,
+                    help='The file to dump cProfile stats of measured batches to, for pstats or snakeviz.')
 
 args = parser.parse_args()
 
+for custom_interface in args.custom_interface:
+    register_contract_interface(parse_contract_interface(custom_interface))
+
+interfaces = [interface.strip() for interface in args.interfaces.split(',')] if args.interfaces else []
+
+default_backpressure_limits.configure(max_items=args.max_buffered_items, max_bytes=args.max_buffered_bytes)
+
+if args.profile is not None or args.cprofile_output is not None:
+    profiler.configure(
+        output_format=args.profile or 'table',
+        output_file=args.profile_output,
+        sample_rate=args.profile_sample_rate,
+        cprofile_output=args.cprofile_output)
+
 
 def is_date_range(start, end):
     """Checks for YYYY-MM-DD date format."""
@@ -87,14 +168,26 @@ def get_partitions():
 
         provider = get_provider_from_uri(args.provider_uri)
         web3 = Web3(provider)
-        eth_service = EthService(web3)
+        block_timestamp_index = None
+        if args.block_timestamp_index is not None:
+            block_timestamp_index = BlockTimestampIndex(args.block_timestamp_index)
+        batch_web3_provider = get_provider_from_uri(args.provider_uri, batch=True)
+        eth_service = EthService(web3, block_timestamp_index, batch_web3_provider)
 
+        dates = []
         while start_date <= end_date:
-            batch_start_block, batch_end_block = eth_service.get_block_range_for_date(start_date)
-            partition_dir = '/date=' + str(start_date)
-            yield batch_start_block, batch_end_block, partition_dir
+            dates.append(start_date)
             start_date += day
 
+        # Block ranges for all dates are resolved together, in a few batch JSON RPC requests
+        block_ranges = eth_service.get_block_ranges_for_dates(dates)
+        if block_timestamp_index is not None:
+            block_timestamp_index.close()
+
+        for date, (batch_start_block, batch_end_block) in zip(dates, block_ranges):
+            partition_dir = '/date=' + str(date)
+            yield batch_start_block, batch_end_block, partition_dir
+
     elif is_block_range(args.start, args.end):
         start_block = int(args.start)
         end_block = int(args.end)
@@ -113,4 +206,26 @@ def get_partitions():
         raise ValueError('start and end must be either block numbers or ISO dates or Unix times')
 
 
-export_all(get_partitions(), args.output_dir, args.provider_uri, args.max_workers, args.export_batch_size)
+if args.metrics_port is not None:
+    start_http_server(args.metrics_port)
+metrics_textfile_writer = None
+if args.metrics_textfile is not None:
+    metrics_textfile_writer = MetricsTextfileWriter(args.metrics_textfile)
+    metrics_textfile_writer.start()
+
+try:
+    export_all(get_partitions(), args.output_dir, args.provider_uri, args.max_workers, args.export_batch_size,
+               contract_analysis_cache_path=args.contract_analysis_cache,
+               analysis_max_workers=args.analysis_max_workers,
+               interfaces=interfaces,
+               token_batch_calls=args.token_batch_calls,
+               token_multicall=args.token_multicall,
+               token_cache_path=args.token_cache,
+               token_cache_total_supply_max_age=args.token_cache_total_supply_max_age,
+               single_pass=args.single_pass,
+               rpc_cache_path=args.rpc_cache,
+               rpc_cache_mode=args.rpc_cache_mode,
+               capture_raw=args.capture_raw)
+finally:
+    if metrics_textfile_writer is not None:
+        metrics_textfile_writer.close()
@@ -21,20 +21,24 @@
 # SOFTWARE.
 
 
-import csv
 import logging
 import os
 from time import time
 
 from web3 import Web3
 
-from ethereumetl.csv_utils import set_max_field_size_limit
+from ethereumetl.cache.contract_analysis_cache import ContractAnalysisCache
+from ethereumetl.cache.sqlite_store import SqliteKeyValueStore
+from ethereumetl.cache.token_cache import TokenCache
+from ethereumetl.csv_utils import read_csv_column, set_max_field_size_limit
 from ethereumetl.file_utils import smart_open
+from ethereumetl.jobs.export_blocks_and_receipts_job import ExportBlocksAndReceiptsJob
 from ethereumetl.jobs.export_blocks_job import ExportBlocksJob
 from ethereumetl.jobs.export_contracts_job import ExportContractsJob
 from ethereumetl.jobs.export_receipts_job import ExportReceiptsJob
 from ethereumetl.jobs.export_token_transfers_job import ExportTokenTransfersJob
 from ethereumetl.jobs.export_tokens_job import ExportTokensJob
+from ethereumetl.jobs.exporters.blocks_and_receipts_item_exporter import blocks_and_receipts_item_exporter
 from ethereumetl.jobs.exporters.blocks_and_transactions_item_exporter import blocks_and_transactions_item_exporter
 from ethereumetl.jobs.exporters.contracts_item_exporter import contracts_item_exporter
 from ethereumetl.jobs.exporters.receipts_and_logs_item_exporter import receipts_and_logs_item_exporter
@@ -42,7 +46,12 @@ from ethereumetl.jobs.exporters.token_transfers_item_exporter import token_trans
 from ethereumetl.jobs.exporters.tokens_item_exporter import tokens_item_exporter
 from ethereumetl.logging_utils import logging_basic_config
 from ethereumetl.providers.auto import get_provider_from_uri
+from ethereumetl.providers.caching import CACHE_MODE, RPC_RESPONSES_TABLE_NAME, check_response_store_chain
+from ethereumetl.providers.capabilities import detect_block_receipts_method
+from ethereumetl.providers.raw_archive import RAW_ARCHIVE_EXTENSION, RawArchiveWriter, RawCaptureBatchProvider
+from ethereumetl.service.eth_contract_analyzer import EthContractAnalyzer
 from ethereumetl.thread_local_proxy import ThreadLocalProxy
+from ethereumetl.unique_values import DEFAULT_MAX_MEMORY_BYTES, UniqueValuesWriter
 
 logging_basic_config()
 logger = logging.getLogger('export_all')
@@ -52,21 +61,70 @@ def is_log_filter_supported(provider_uri):
     return 'infura' not in provider_uri
 
 
-def extract_csv_column_unique(input, output, column):
+def extract_csv_column_unique(input, output, column, max_memory_bytes=DEFAULT_MAX_MEMORY_BYTES):
     set_max_field_size_limit()
 
     with smart_open(input, 'r') as input_file, smart_open(output, 'w') as output_file:
-        reader = csv.DictReader(input_file)
-        seen = set()  # set for fast O(1) amortized lookup
-        for row in reader:
-            if row[column] in seen:
-                continue
-            seen.add(row[column])
-            output_file.write(row[column] + '\n')
-
-
-def export_all(partitions, output_dir, provider_uri, max_workers, batch_size):
-
+        # Values beyond max_memory_bytes are spilled to sorted runs next to the output file
+        writer = UniqueValuesWriter(output_file, max_memory_bytes, spill_dir=os.path.dirname(output) or None)
+        writer.write_all(read_csv_column(input_file, column))
+        writer.close()
+
+
+def export_all(partitions, output_dir, provider_uri, max_workers, batch_size, contract_analysis_cache_path=None,
+               analysis_max_workers=None, interfaces=None, token_batch_calls=False, token_multicall=False,
+               token_cache_path=None, token_cache_total_supply_max_age=None, single_pass=False, rpc_cache_path=None,
+               rpc_cache_mode=CACHE_MODE, capture_raw=False):
+    # Identical bytecode is analysed once for all partitions
+    contract_analysis_store = None
+    if contract_analysis_cache_path is not None:
+        contract_analysis_store = SqliteKeyValueStore(contract_analysis_cache_path)
+    contract_analysis_cache = ContractAnalysisCache(store=contract_analysis_store)
+
+    # Popular tokens are fetched once for all partitions
+    token_store = None
+    if token_cache_path is not None:
+        token_store = SqliteKeyValueStore(token_cache_path, table_name='tokens')
+    token_cache = TokenCache(store=token_store, total_supply_max_age=token_cache_total_supply_max_age)
+
+    # Responses for historical blocks are fetched from the node once for all runs
+    rpc_response_store = None
+    if rpc_cache_path is not None:
+        rpc_response_store = SqliteKeyValueStore(rpc_cache_path, table_name=RPC_RESPONSES_TABLE_NAME, compress=True)
+        check_response_store_chain(rpc_response_store, get_provider_from_uri(provider_uri, batch=True), rpc_cache_mode)
+
+    def get_batch_provider():
+        return get_provider_from_uri(
+            provider_uri, batch=True, response_store=rpc_response_store, cache_mode=rpc_cache_mode)
+
+    # Receipts are requested per block if the node supports it. The first exported block is probed,
+    # so that the probe response can be cached and replayed
+    partitions = list(partitions)
+    probe_block = partitions[0][0] if len(partitions) > 0 else 'latest'
+    block_receipts_method = detect_block_receipts_method(get_batch_provider(), probe_block)
+
+    # The analysis process pool is started once for all partitions
+    contract_analyzer = EthContractAnalyzer(analysis_max_workers, contract_analysis_cache, interfaces)
+
+    # Raw archives are closed even if a partition fails, so that they can be read
+    raw_archive_writers = []
+    try:
+        _export_all(partitions, output_dir, provider_uri, max_workers, batch_size, contract_analyzer,
+                    token_batch_calls, token_multicall, token_cache, single_pass, block_receipts_method,
+                    get_batch_provider, capture_raw, raw_archive_writers)
+    finally:
+        for raw_archive_writer in raw_archive_writers:
+            raw_archive_writer.close()
+        contract_analyzer.shutdown()
+        contract_analysis_cache.close()
+        token_cache.close()
+        if rpc_response_store is not None:
+            rpc_response_store.close()
+
+
+def _export_all(partitions, output_dir, provider_uri, max_workers, batch_size, contract_analyzer,
+                token_batch_calls, token_multicall, token_cache, single_pass, block_receipts_method,
+                get_batch_provider, capture_raw, raw_archive_writers):
     for batch_start_block, batch_end_block, partition_dir in partitions:
         # # # start # # #
 
@@ -77,7 +135,19 @@ def export_all(partitions, output_dir, provider_uri, max_workers, batch_size):
         block_range = f'{padded_batch_start_block}-{padded_batch_end_block}'
         file_name_suffix = f'{padded_batch_start_block}_{padded_batch_end_block}'
 
-        # # # blocks_and_transactions # # #
+        # # # raw responses # # #
+
+        # Batch responses of the partition are archived, so that it can be exported again without the node
+        raw_archive_writer = None
+        if capture_raw:
+            raw_archive_file = f'{output_dir}/raw{partition_dir}/raw_{file_name_suffix}{RAW_ARCHIVE_EXTENSION}'
+            logger.info(f'Capturing raw responses for blocks {block_range} to {raw_archive_file}')
+            raw_archive_writer = RawArchiveWriter(raw_archive_file)
+            raw_archive_writers.append(raw_archive_writer)
+        partition_batch_provider = (lambda: RawCaptureBatchProvider(get_batch_provider(), raw_archive_writer)) \
+            if capture_raw else get_batch_provider
+
+        # # # output files # # #
 
         blocks_output_dir = f'{output_dir}/blocks{partition_dir}'
         os.makedirs(os.path.dirname(blocks_output_dir), exist_ok=True)
@@ -87,47 +157,14 @@ def export_all(partitions, output_dir, provider_uri, max_workers, batch_size):
 
         blocks_file = f'{blocks_output_dir}/blocks_{file_name_suffix}.csv'
         transactions_file = f'{transactions_output_dir}/transactions_{file_name_suffix}.csv'
-        logger.info(f'Exporting blocks {block_range} to {blocks_file}')
-        logger.info(f'Exporting transactions from blocks {block_range} to {transactions_file}')
-
-        job = ExportBlocksJob(
-            start_block=batch_start_block,
-            end_block=batch_end_block,
-            batch_size=batch_size,
-            batch_web3_provider=ThreadLocalProxy(lambda: get_provider_from_uri(provider_uri, batch=True)),
-            max_workers=max_workers,
-            item_exporter=blocks_and_transactions_item_exporter(blocks_file, transactions_file),
-            export_blocks=blocks_file is not None,
-            export_transactions=transactions_file is not None)
-        job.run()
-
-        # # # token_transfers # # #
 
+        # Token transfers are extracted from receipt logs in a single pass, no log filter is needed
         token_transfers_file = None
-        if is_log_filter_supported(provider_uri):
+        if single_pass or is_log_filter_supported(provider_uri):
             token_transfers_output_dir = f'{output_dir}/token_transfers{partition_dir}'
             os.makedirs(os.path.dirname(token_transfers_output_dir), exist_ok=True)
 
             token_transfers_file = f'{token_transfers_output_dir}/token_transfers_{file_name_suffix}.csv'
-            logger.info(f'Exporting ERC20 transfers from blocks {block_range} to {token_transfers_file}')
-
-            job = ExportTokenTransfersJob(
-                start_block=batch_start_block,
-                end_block=batch_end_block,
-                batch_size=batch_size,
-                web3=ThreadLocalProxy(lambda: Web3(get_provider_from_uri(provider_uri))),
-                item_exporter=token_transfers_item_exporter(token_transfers_file),
-                max_workers=max_workers)
-            job.run()
-
-        # # # receipts_and_logs # # #
-
-        transaction_hashes_output_dir = f'{output_dir}/transaction_hashes{partition_dir}'
-        os.makedirs(os.path.dirname(transaction_hashes_output_dir), exist_ok=True)
-
-        transaction_hashes_file = f'{transaction_hashes_output_dir}/transaction_hashes_{file_name_suffix}.csv'
-        logger.info(f'Extracting hash column from transaction file {transactions_file}')
-        extract_csv_column_unique(transactions_file, transaction_hashes_file, 'hash')
 
         receipts_output_dir = f'{output_dir}/receipts{partition_dir}'
         os.makedirs(os.path.dirname(receipts_output_dir), exist_ok=True)
@@ -137,19 +174,94 @@ def export_all(partitions, output_dir, provider_uri, max_workers, batch_size):
 
         receipts_file = f'{receipts_output_dir}/receipts_{file_name_suffix}.csv'
         logs_file = f'{logs_output_dir}/logs_{file_name_suffix}.csv'
-        logger.info(f'Exporting receipts and logs from blocks {block_range} to {receipts_file} and {logs_file}')
 
-        with smart_open(transaction_hashes_file, 'r') as transaction_hashes:
-            job = ExportReceiptsJob(
-                transaction_hashes_iterable=(transaction_hash.strip() for transaction_hash in transaction_hashes),
+        if single_pass:
+
+            # # # blocks_transactions_receipts_logs_and_token_transfers # # #
+
+            logger.info(f'Exporting blocks, transactions, receipts, logs and ERC20 transfers from blocks '
+                        f'{block_range} in a single pass')
+
+            job = ExportBlocksAndReceiptsJob(
+                start_block=batch_start_block,
+                end_block=batch_end_block,
+                batch_size=batch_size,
+                batch_web3_provider=ThreadLocalProxy(partition_batch_provider),
+                max_workers=max_workers,
+                item_exporter=blocks_and_receipts_item_exporter(
+                    blocks_file, transactions_file, receipts_file, logs_file, token_transfers_file),
+                block_receipts_method=block_receipts_method)
+            job.run()
+
+        else:
+
+            # # # blocks_and_transactions # # #
+
+            logger.info(f'Exporting blocks {block_range} to {blocks_file}')
+            logger.info(f'Exporting transactions from blocks {block_range} to {transactions_file}')
+
+            job = ExportBlocksJob(
+                start_block=batch_start_block,
+                end_block=batch_end_block,
                 batch_size=batch_size,
-                batch_web3_provider=ThreadLocalProxy(lambda: get_provider_from_uri(provider_uri, batch=True)),
+                batch_web3_provider=ThreadLocalProxy(partition_batch_provider),
                 max_workers=max_workers,
-                item_exporter=receipts_and_logs_item_exporter(receipts_file, logs_file),
-                export_receipts=receipts_file is not None,
-                export_logs=logs_file is not None)
+                item_exporter=blocks_and_transactions_item_exporter(blocks_file, transactions_file),
+                export_blocks=blocks_file is not None,
+                export_transactions=transactions_file is not None)
             job.run()
 
+            # # # token_transfers # # #
+
+            if token_transfers_file is not None:
+                logger.info(f'Exporting ERC20 transfers from blocks {block_range} to {token_transfers_file}')
+
+                job = ExportTokenTransfersJob(
+                    start_block=batch_start_block,
+                    end_block=batch_end_block,
+                    batch_size=batch_size,
+                    web3=ThreadLocalProxy(lambda: Web3(get_provider_from_uri(provider_uri))),
+                    item_exporter=token_transfers_item_exporter(token_transfers_file),
+                    max_workers=max_workers)
+                job.run()
+
+            # # # receipts_and_logs # # #
+
+            if block_receipts_method is not None:
+                # Receipts are requested per block, only for blocks with transactions
+                block_numbers_output_dir = f'{output_dir}/transaction_block_numbers{partition_dir}'
+                os.makedirs(os.path.dirname(block_numbers_output_dir), exist_ok=True)
+
+                block_numbers_file = f'{block_numbers_output_dir}/transaction_block_numbers_{file_name_suffix}.csv'
+                logger.info(f'Extracting block_number column from transaction file {transactions_file}')
+                extract_csv_column_unique(transactions_file, block_numbers_file, 'block_number')
+                receipts_input_file = block_numbers_file
+            else:
+                transaction_hashes_output_dir = f'{output_dir}/transaction_hashes{partition_dir}'
+                os.makedirs(os.path.dirname(transaction_hashes_output_dir), exist_ok=True)
+
+                transaction_hashes_file = f'{transaction_hashes_output_dir}/transaction_hashes_{file_name_suffix}.csv'
+                logger.info(f'Extracting hash column from transaction file {transactions_file}')
+                extract_csv_column_unique(transactions_file, transaction_hashes_file, 'hash')
+                receipts_input_file = transaction_hashes_file
+
+            logger.info(f'Exporting receipts and logs from blocks {block_range} to {receipts_file} and {logs_file}')
+
+            with smart_open(receipts_input_file, 'r') as receipts_input:
+                receipts_input = (line.strip() for line in receipts_input)
+                job = ExportReceiptsJob(
+                    transaction_hashes_iterable=receipts_input if block_receipts_method is None else None,
+                    block_numbers_iterable=(int(block_number) for block_number in receipts_input)
+                    if block_receipts_method is not None else None,
+                    block_receipts_method=block_receipts_method,
+                    batch_size=batch_size,
+                    batch_web3_provider=ThreadLocalProxy(partition_batch_provider),
+                    max_workers=max_workers,
+                    item_exporter=receipts_and_logs_item_exporter(receipts_file, logs_file),
+                    export_receipts=receipts_file is not None,
+                    export_logs=logs_file is not None)
+                job.run()
+
         # # # contracts # # #
 
         contract_addresses_output_dir = f'{output_dir}/contract_addresses{partition_dir}'
@@ -171,9 +283,10 @@ def export_all(partitions, output_dir, provider_uri, max_workers, batch_size):
             job = ExportContractsJob(
                 contract_addresses_iterable=contract_addresses,
                 batch_size=batch_size,
-                batch_web3_provider=ThreadLocalProxy(lambda: get_provider_from_uri(provider_uri, batch=True)),
-                item_exporter=contracts_item_exporter(contracts_file),
-                max_workers=max_workers)
+                batch_web3_provider=ThreadLocalProxy(partition_batch_provider),
+                item_exporter=contracts_item_exporter(contracts_file, contract_analyzer.interfaces),
+                max_workers=max_workers,
+                contract_analyzer=contract_analyzer)
             job.run()
 
         # # # tokens # # #
@@ -196,12 +309,24 @@ def export_all(partitions, output_dir, provider_uri, max_workers, batch_size):
                 job = ExportTokensJob(
                     token_addresses_iterable=(token_address.strip() for token_address in token_addresses),
                     web3=ThreadLocalProxy(lambda: Web3(get_provider_from_uri(provider_uri))),
+                    # Multicall implies batch calls
+                    batch_web3_provider=ThreadLocalProxy(partition_batch_provider)
+                    if token_batch_calls or token_multicall else None,
                     item_exporter=tokens_item_exporter(tokens_file),
-                    max_workers=max_workers)
+                    max_workers=max_workers,
+                    batch_size=batch_size,
+                    multicall=token_multicall,
+                    # Token metadata as of the end of the partition makes the export reproducible
+                    block=batch_end_block if token_multicall else 'latest',
+                    token_cache=token_cache)
                 job.run()
 
         # # # finish # # #
 
+        if raw_archive_writer is not None:
+            raw_archive_writer.close()
+            raw_archive_writers.remove(raw_archive_writer)
+
         end_time = time()
         time_diff = round(end_time - start_time, 5)
         logger.info(f'Exporting blocks {block_range} took {time_diff} seconds')
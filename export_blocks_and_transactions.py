@@ -23,10 +23,13 @@
 
 import argparse
 
+from ethereumetl.cache.sqlite_store import SqliteKeyValueStore
 from ethereumetl.jobs.export_blocks_job import ExportBlocksJob
 from ethereumetl.jobs.exporters.blocks_and_transactions_item_exporter import blocks_and_transactions_item_exporter
 from ethereumetl.logging_utils import logging_basic_config
+from ethereumetl.profiling import profiler
 from ethereumetl.providers.auto import get_provider_from_uri
+from ethereumetl.providers.caching import CACHE_MODES, RPC_RESPONSES_TABLE_NAME, check_response_store_chain
 from ethereumetl.thread_local_proxy import ThreadLocalProxy
 
 logging_basic_config()
@@ -45,17 +48,56 @@ parser.add_argument('--blocks-output', default=None, type=str,
 parser.add_argument('--transactions-output', default=None, type=str,
                     help='The output file for transactions. If not provided transactions will not be exported. '
                          'Use "-" for stdout')
+parser.add_argument('--rpc-cache', default=None, type=str,
+                    help='The SQLite file for caching node responses for historical blocks, receipts, code and calls '
+                         'across runs. Responses for "latest" are not cached.')
+parser.add_argument('--rpc-cache-mode', default='cache', choices=CACHE_MODES,
+                    help='cache: fetch only responses missing from --rpc-cache. record: fetch all responses and '
+                         'update the cache. replay: serve all responses from the cache without calling the node.')
+parser.add_argument('--profile', default=None, choices=['table', 'json'],
+                    help='Report how the time of each job is split between stages: request building, network, '
+                         'JSON decoding, mapping, serialization and writing. The report is logged as a table '
+                         'or written as JSON.')
+parser.add_argument('--profile-output', default=None, type=str,
+                    help='The file to append profiling reports to. If not provided reports are logged.')
+parser.add_argument('--profile-sample-rate', default=1.0, type=float,
+                    help='The fraction of batches to measure, between 0 and 1. Times are scaled up.')
+parser.add_argument('--cprofile-output', default=None, type=str,
+                    help='The file to dump cProfile stats of measured batches to, for pstats or snakeviz.')
 
 args = parser.parse_args()
 
+if args.profile is not None or args.cprofile_output is not None:
+    profiler.configure(
+        output_format=args.profile or 'table',
+        output_file=args.profile_output,
+        sample_rate=args.profile_sample_rate,
+        cprofile_output=args.cprofile_output)
+
+rpc_response_store = None
+if args.rpc_cache is not None:
+    rpc_response_store = SqliteKeyValueStore(args.rpc_cache, table_name=RPC_RESPONSES_TABLE_NAME, compress=True)
+    check_response_store_chain(
+        rpc_response_store, get_provider_from_uri(args.provider_uri, batch=True), args.rpc_cache_mode)
+
+
+def get_batch_provider():
+    return get_provider_from_uri(
+        args.provider_uri, batch=True, response_store=rpc_response_store, cache_mode=args.rpc_cache_mode)
+
+
 job = ExportBlocksJob(
     start_block=args.start_block,
     end_block=args.end_block,
     batch_size=args.batch_size,
-    batch_web3_provider=ThreadLocalProxy(lambda: get_provider_from_uri(args.provider_uri, batch=True)),
+    batch_web3_provider=ThreadLocalProxy(get_batch_provider),
     max_workers=args.max_workers,
     item_exporter=blocks_and_transactions_item_exporter(args.blocks_output, args.transactions_output),
     export_blocks=args.blocks_output is not None,
     export_transactions=args.transactions_output is not None)
 
-job.run()
+try:
+    job.run()
+finally:
+    if rpc_response_store is not None:
+        rpc_response_store.close()
@@ -23,10 +23,13 @@
 
 import argparse
 
+from ethereumetl.cache.contract_analysis_cache import ContractAnalysisCache
+from ethereumetl.cache.sqlite_store import SqliteKeyValueStore
 from ethereumetl.file_utils import smart_open
 from ethereumetl.jobs.export_contracts_job import ExportContractsJob
 from ethereumetl.jobs.exporters.contracts_item_exporter import contracts_item_exporter
 from ethereumetl.logging_utils import logging_basic_config
+from ethereumetl.service.eth_contract_interfaces import parse_contract_interface, register_contract_interface
 from ethereumetl.thread_local_proxy import ThreadLocalProxy
 from ethereumetl.providers.auto import get_provider_from_uri
 
@@ -42,9 +45,34 @@ parser.add_argument('-w', '--max-workers', default=5, type=int, help='The maximu
 parser.add_argument('-p', '--provider-uri', default='https://mainnet.infura.io', type=str,
                     help='The URI of the web3 provider e.g. '
                          'file://$HOME/Library/Ethereum/geth.ipc or https://mainnet.infura.io')
+parser.add_argument('--contract-analysis-cache', default=None, type=str,
+                    help='The SQLite file for caching bytecode analysis results across runs. '
+                         'If not provided results are cached in memory only.')
+parser.add_argument('--contract-analysis-cache-size', default=100000, type=int,
+                    help='The maximum number of bytecode analysis results to keep in memory.')
+parser.add_argument('--analysis-max-workers', default=None, type=int,
+                    help='The number of processes for bytecode analysis. '
+                         'If not provided bytecode is analysed in the threads fetching it.')
+parser.add_argument('--interfaces', default=None, type=str,
+                    help='Comma separated names of additional interfaces to detect e.g. erc1155,erc165. '
+                         'Each one is exported in is_<name> field.')
+parser.add_argument('--custom-interface', default=[], type=str, action='append',
+                    help='Additional interface to register, in the format '
+                         'name:functionSignature1;functionSignature2 e.g. '
+                         'ownable:owner();transferOwnership(address). Can be specified multiple times.')
 
 args = parser.parse_args()
 
+for custom_interface in args.custom_interface:
+    register_contract_interface(parse_contract_interface(custom_interface))
+
+interfaces = [interface.strip() for interface in args.interfaces.split(',')] if args.interfaces else []
+
+contract_analysis_store = None
+if args.contract_analysis_cache is not None:
+    contract_analysis_store = SqliteKeyValueStore(args.contract_analysis_cache)
+contract_analysis_cache = ContractAnalysisCache(args.contract_analysis_cache_size, contract_analysis_store)
+
 with smart_open(args.contract_addresses, 'r') as contract_addresses_file:
     contract_addresses = (contract_address.strip() for contract_address in contract_addresses_file
                           if contract_address.strip())
@@ -52,7 +80,12 @@ with smart_open(args.contract_addresses, 'r') as contract_addresses_file:
         contract_addresses_iterable=contract_addresses,
         batch_size=args.batch_size,
         batch_web3_provider=ThreadLocalProxy(lambda: get_provider_from_uri(args.provider_uri, batch=True)),
-        item_exporter=contracts_item_exporter(args.output),
-        max_workers=args.max_workers)
+        item_exporter=contracts_item_exporter(args.output, interfaces),
+        max_workers=args.max_workers,
+        contract_analysis_cache=contract_analysis_cache,
+        analysis_max_workers=args.analysis_max_workers,
+        interfaces=interfaces)
 
     job.run()
+
+contract_analysis_cache.close()
@@ -0,0 +1,91 @@
+# MIT License
+#
+# Copyright (c) 2018 Evgeny Medvedev, evge.medvedev@gmail.com
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+
+
+import argparse
+
+from ethereumetl.jobs.export_blocks_job import BlockResponseMapper
+from ethereumetl.jobs.export_contracts_job import ContractResponseMapper
+from ethereumetl.jobs.export_receipts_job import ReceiptResponseMapper
+from ethereumetl.jobs.exporters.raw_archive_item_exporter import raw_archive_item_exporter
+from ethereumetl.jobs.replay_raw_archive_job import DEFAULT_LINES_PER_TASK, ReplayRawArchiveJob
+from ethereumetl.logging_utils import logging_basic_config
+
+logging_basic_config()
+
+parser = argparse.ArgumentParser(
+    description='Export blocks, transactions, receipts, logs, token transfers and contracts from raw archives '
+                'written by export_all.py --capture-raw, without calling the node.')
+parser.add_argument('-i', '--raw-archives', required=True, nargs='+', type=str,
+                    help='The raw archive files, exported in the given order.')
+parser.add_argument('-w', '--max-workers', default=None, type=int,
+                    help='The number of processes for parsing and mapping. If not provided everything runs '
+                         'in the main process.')
+parser.add_argument('--lines-per-task', default=DEFAULT_LINES_PER_TASK, type=int,
+                    help='The number of archived batches sent to a worker process at a time.')
+parser.add_argument('--blocks-output', default=None, type=str,
+                    help='The output file for blocks. If not provided blocks will not be exported. '
+                         'Use "-" for stdout')
+parser.add_argument('--transactions-output', default=None, type=str,
+                    help='The output file for transactions. If not provided transactions will not be exported. '
+                         'Use "-" for stdout')
+parser.add_argument('--receipts-output', default=None, type=str,
+                    help='The output file for receipts. If not provided receipts will not be exported. '
+                         'Use "-" for stdout')
+parser.add_argument('--logs-output', default=None, type=str,
+                    help='The output file for receipt logs. If not provided receipt logs will not be exported. '
+                         'Use "-" for stdout')
+parser.add_argument('--token-transfers-output', default=None, type=str,
+                    help='The output file for ERC20 and ERC721 transfers, extracted from receipt logs. '
+                         'If not provided token transfers will not be exported. Use "-" for stdout')
+parser.add_argument('--contracts-output', default=None, type=str,
+                    help='The output file for contracts. If not provided contracts will not be exported. '
+                         'Use "-" for stdout')
+
+args = parser.parse_args()
+
+response_mappers = []
+if args.blocks_output is not None or args.transactions_output is not None:
+    response_mappers.append(BlockResponseMapper(
+        export_blocks=args.blocks_output is not None,
+        export_transactions=args.transactions_output is not None))
+if args.receipts_output is not None or args.logs_output is not None or args.token_transfers_output is not None:
+    response_mappers.append(ReceiptResponseMapper(
+        export_receipts=args.receipts_output is not None,
+        export_logs=args.logs_output is not None,
+        export_token_transfers=args.token_transfers_output is not None))
+if args.contracts_output is not None:
+    response_mappers.append(ContractResponseMapper())
+if len(response_mappers) == 0:
+    raise ValueError('At least one output must be provided')
+
+job = ReplayRawArchiveJob(
+    raw_archive_paths=args.raw_archives,
+    response_mappers=response_mappers,
+    item_exporter=raw_archive_item_exporter(
+        args.blocks_output, args.transactions_output, args.receipts_output, args.logs_output, args.contracts_output,
+        args.token_transfers_output),
+    max_workers=args.max_workers,
+    lines_per_task=args.lines_per_task)
+
+job.run()
@@ -23,18 +23,26 @@
 
 import argparse
 
+from ethereumetl.cache.sqlite_store import SqliteKeyValueStore
 from ethereumetl.file_utils import smart_open
 from ethereumetl.jobs.export_receipts_job import ExportReceiptsJob
 from ethereumetl.jobs.exporters.receipts_and_logs_item_exporter import receipts_and_logs_item_exporter
 from ethereumetl.logging_utils import logging_basic_config
+from ethereumetl.profiling import profiler
 from ethereumetl.thread_local_proxy import ThreadLocalProxy
 from ethereumetl.providers.auto import get_provider_from_uri
+from ethereumetl.providers.caching import CACHE_MODES, RPC_RESPONSES_TABLE_NAME, check_response_store_chain
+from ethereumetl.providers.capabilities import BLOCK_RECEIPTS_METHODS, detect_block_receipts_method
 
 logging_basic_config()
 
 parser = argparse.ArgumentParser(description='Export receipts and logs.')
 parser.add_argument('-b', '--batch-size', default=100, type=int, help='The number of receipts to export at a time.')
 parser.add_argument('-t', '--transaction-hashes', type=str, help='The file containing transaction hashes, one per line.')
+parser.add_argument('--block-numbers', type=str,
+                    help='The file containing block numbers, one per line. Exports all receipts of the blocks. '
+                         'Requires a node supporting eth_getBlockReceipts or parity_getBlockReceipts. '
+                         'Use instead of --transaction-hashes.')
 parser.add_argument('-p', '--provider-uri', default='https://mainnet.infura.io', type=str,
                     help='The URI of the web3 provider e.g. '
                          'file://$HOME/Library/Ethereum/geth.ipc or https://mainnet.infura.io')
@@ -45,17 +53,73 @@ parser.add_argument('--receipts-output', default=None, type=str,
 parser.add_argument('--logs-output', default=None, type=str,
                     help='The output file for receipt logs. If not provided receipt logs will not be exported. '
                          'Use "-" for stdout')
+parser.add_argument('--rpc-cache', default=None, type=str,
+                    help='The SQLite file for caching node responses for historical blocks, receipts, code and calls '
+                         'across runs. Responses for "latest" are not cached.')
+parser.add_argument('--rpc-cache-mode', default='cache', choices=CACHE_MODES,
+                    help='cache: fetch only responses missing from --rpc-cache. record: fetch all responses and '
+                         'update the cache. replay: serve all responses from the cache without calling the node.')
+parser.add_argument('--profile', default=None, choices=['table', 'json'],
+                    help='Report how the time of each job is split between stages: request building, network, '
+                         'JSON decoding, mapping, serialization and writing. The report is logged as a table '
+                         'or written as JSON.')
+parser.add_argument('--profile-output', default=None, type=str,
+                    help='The file to append profiling reports to. If not provided reports are logged.')
+parser.add_argument('--profile-sample-rate', default=1.0, type=float,
+                    help='The fraction of batches to measure, between 0 and 1. Times are scaled up.')
+parser.add_argument('--cprofile-output', default=None, type=str,
+                    help='The file to dump cProfile stats of measured batches to, for pstats or snakeviz.')
 
 args = parser.parse_args()
 
-with smart_open(args.transaction_hashes, 'r') as transaction_hashes_file:
-    job = ExportReceiptsJob(
-        transaction_hashes_iterable=(transaction_hash.strip() for transaction_hash in transaction_hashes_file),
-        batch_size=args.batch_size,
-        batch_web3_provider=ThreadLocalProxy(lambda: get_provider_from_uri(args.provider_uri, batch=True)),
-        max_workers=args.max_workers,
-        item_exporter=receipts_and_logs_item_exporter(args.receipts_output, args.logs_output),
-        export_receipts=args.receipts_output is not None,
-        export_logs=args.logs_output is not None)
-
-    job.run()
+if args.profile is not None or args.cprofile_output is not None:
+    profiler.configure(
+        output_format=args.profile or 'table',
+        output_file=args.profile_output,
+        sample_rate=args.profile_sample_rate,
+        cprofile_output=args.cprofile_output)
+
+rpc_response_store = None
+if args.rpc_cache is not None:
+    rpc_response_store = SqliteKeyValueStore(args.rpc_cache, table_name=RPC_RESPONSES_TABLE_NAME, compress=True)
+    check_response_store_chain(
+        rpc_response_store, get_provider_from_uri(args.provider_uri, batch=True), args.rpc_cache_mode)
+
+
+def get_batch_provider():
+    return get_provider_from_uri(
+        args.provider_uri, batch=True, response_store=rpc_response_store, cache_mode=args.rpc_cache_mode)
+
+
+if (args.transaction_hashes is None) == (args.block_numbers is None):
+    raise ValueError('Exactly one of --transaction-hashes or --block-numbers must be provided')
+
+block_receipts_method = None
+if args.block_numbers is not None:
+    # The first block is probed rather than the latest, so that the probe response can be cached and replayed
+    with smart_open(args.block_numbers, 'r') as block_numbers_file:
+        probe_block = next((int(line) for line in block_numbers_file if line.strip()), 'latest')
+    block_receipts_method = detect_block_receipts_method(get_batch_provider(), probe_block)
+    if block_receipts_method is None:
+        raise ValueError('The node does not support any of {}, use --transaction-hashes'
+                         .format(', '.join(BLOCK_RECEIPTS_METHODS)))
+
+try:
+    with smart_open(args.transaction_hashes or args.block_numbers, 'r') as input_file:
+        input_lines = (line.strip() for line in input_file)
+        job = ExportReceiptsJob(
+            transaction_hashes_iterable=input_lines if block_receipts_method is None else None,
+            block_numbers_iterable=(int(block_number) for block_number in input_lines if block_number)
+            if block_receipts_method is not None else None,
+            block_receipts_method=block_receipts_method,
+            batch_size=args.batch_size,
+            batch_web3_provider=ThreadLocalProxy(get_batch_provider),
+            max_workers=args.max_workers,
+            item_exporter=receipts_and_logs_item_exporter(args.receipts_output, args.logs_output),
+            export_receipts=args.receipts_output is not None,
+            export_logs=args.logs_output is not None)
+
+        job.run()
+finally:
+    if rpc_response_store is not None:
+        rpc_response_store.close()
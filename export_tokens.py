@@ -25,6 +25,8 @@ import argparse
 
 from web3 import Web3
 
+from ethereumetl.cache.sqlite_store import SqliteKeyValueStore
+from ethereumetl.cache.token_cache import TokenCache
 from ethereumetl.file_utils import smart_open
 from ethereumetl.jobs.export_tokens_job import ExportTokensJob
 from ethereumetl.jobs.exporters.tokens_item_exporter import tokens_item_exporter
@@ -36,19 +38,53 @@ logging_basic_config()
 
 parser = argparse.ArgumentParser(description='Exports ERC20 tokens.')
 parser.add_argument('-t', '--token-addresses', type=str, help='The file containing token addresses, one per line.')
+parser.add_argument('-b', '--batch-size', default=100, type=int,
+                    help='The number of tokens to export in a single JSON RPC batch.')
+parser.add_argument('--batch-calls', action='store_true',
+                    help='Call token functions for --batch-size tokens in a single JSON RPC batch. '
+                         'symbol and name returned as bytes32 are decoded, so they can differ from the default.')
 parser.add_argument('-o', '--output', default='-', type=str, help='The output file. If not specified stdout is used.')
 parser.add_argument('-w', '--max-workers', default=5, type=int, help='The maximum number of workers.')
 parser.add_argument('-p', '--provider-uri', default='https://mainnet.infura.io', type=str,
                     help='The URI of the web3 provider e.g. '
                          'file://$HOME/Library/Ethereum/geth.ipc or https://mainnet.infura.io')
+parser.add_argument('--multicall', action='store_true',
+                    help='Aggregate token function calls into Multicall3 calls, implies --batch-calls. '
+                         'Use a bigger --batch-size, e.g. 1000, with this option.')
+parser.add_argument('--block-number', default=None, type=int,
+                    help='The block number to call token functions at, requires --batch-calls or --multicall. '
+                         'If not provided the latest block is used.')
+parser.add_argument('--token-cache', default=None, type=str,
+                    help='The SQLite file for caching token metadata across runs.')
+parser.add_argument('--token-cache-total-supply-max-age', default=None, type=int,
+                    help='The number of blocks cached token total_supply is reused for. '
+                         'Only used with --block-number. If not provided total_supply is always fetched.')
 
 args = parser.parse_args()
 
+batch_calls = args.batch_calls or args.multicall
+if args.block_number is not None and not batch_calls:
+    parser.error('--block-number requires --batch-calls or --multicall')
+
+token_cache = None
+if args.token_cache is not None:
+    token_cache = TokenCache(store=SqliteKeyValueStore(args.token_cache, table_name='tokens'),
+                             total_supply_max_age=args.token_cache_total_supply_max_age)
+
 with smart_open(args.token_addresses, 'r') as token_addresses_file:
     job = ExportTokensJob(
         token_addresses_iterable=(token_address.strip() for token_address in token_addresses_file),
         web3=ThreadLocalProxy(lambda: Web3(get_provider_from_uri(args.provider_uri))),
+        batch_web3_provider=ThreadLocalProxy(lambda: get_provider_from_uri(args.provider_uri, batch=True))
+        if batch_calls else None,
         item_exporter=tokens_item_exporter(args.output),
-        max_workers=args.max_workers)
+        max_workers=args.max_workers,
+        batch_size=args.batch_size,
+        multicall=args.multicall,
+        block=args.block_number if args.block_number is not None else 'latest',
+        token_cache=token_cache)
 
     job.run()
+
+if token_cache is not None:
+    token_cache.close()
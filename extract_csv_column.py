@@ -22,21 +22,21 @@
 
 
 import argparse
-import csv
 
-from ethereumetl.csv_utils import set_max_field_size_limit
-from ethereumetl.file_utils import smart_open
+from ethereumetl.chunked_reader import DEFAULT_CHUNK_SIZE
+from ethereumetl.column_extractor import extract_csv_column
 
 parser = argparse.ArgumentParser(description='Extracts a single column from a given csv file.')
 parser.add_argument('-i', '--input', default='-', type=str, help='The input file. If not specified stdin is used.')
 parser.add_argument('-o', '--output', default='-', type=str, help='The output file. If not specified stdout is used.')
 parser.add_argument('-c', '--column', required=True, type=str, help='The csv column name to extract.')
+parser.add_argument('-w', '--max-workers', default=None, type=int,
+                    help='The number of processes for parsing chunks of the input file. If not provided everything '
+                         'runs in the main process.')
+parser.add_argument('--chunk-size', default=DEFAULT_CHUNK_SIZE, type=int,
+                    help='The size of the input file chunks in bytes.')
 
-args = parser.parse_args()
-
-set_max_field_size_limit()
-
-with smart_open(args.input, 'r') as input_file, smart_open(args.output, 'w') as output_file:
-    reader = csv.DictReader(input_file)
-    for row in reader:
-        output_file.write(row[args.column] + '\n')
+# Worker processes import the main module again on platforms that spawn them, so nothing may run on import
+if __name__ == '__main__':
+    args = parser.parse_args()
+    extract_csv_column(args.input, args.output, args.column, max_workers=args.max_workers, chunk_size=args.chunk_size)
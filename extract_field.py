@@ -22,19 +22,22 @@
 
 
 import argparse
-import json
 
-from ethereumetl.file_utils import smart_open
+from ethereumetl.chunked_reader import DEFAULT_CHUNK_SIZE
+from ethereumetl.column_extractor import extract_json_field
 
 parser = argparse.ArgumentParser(description='Extracts a single field from a given file.')
 parser.add_argument('-i', '--input', default='-', type=str, help='The input file. If not specified stdin is used.')
 parser.add_argument('-o', '--output', default='-', type=str, help='The output file. If not specified stdout is used.')
 parser.add_argument('-f', '--field', required=True, type=str, help='The field name to extract.')
+parser.add_argument('-w', '--max-workers', default=None, type=int,
+                    help='The number of processes for parsing chunks of the input file. If not provided everything '
+                         'runs in the main process.')
+parser.add_argument('--chunk-size', default=DEFAULT_CHUNK_SIZE, type=int,
+                    help='The size of the input file chunks in bytes.')
 
-args = parser.parse_args()
-
-# TODO: Add support for CSV
-with smart_open(args.input, 'r') as input_file, smart_open(args.output, 'w') as output_file:
-    for line in input_file:
-        item = json.loads(line)
-        output_file.write(item[args.field] + '\n')
+# Worker processes import the main module again on platforms that spawn them, so nothing may run on import
+if __name__ == '__main__':
+    args = parser.parse_args()
+    # TODO: Add support for CSV
+    extract_json_field(args.input, args.output, args.field, max_workers=args.max_workers, chunk_size=args.chunk_size)
@@ -22,10 +22,8 @@
 
 
 import argparse
-import csv
-import json
 
-from ethereumetl.file_utils import smart_open
+from ethereumetl.chunked_reader import CSV_FORMAT, DEFAULT_CHUNK_SIZE, JSON_FORMAT, ChunkedItemReader
 from ethereumetl.jobs.exporters.token_transfers_item_exporter import token_transfers_item_exporter
 from ethereumetl.jobs.extract_token_transfers_job import ExtractTokenTransfersJob
 from ethereumetl.logging_utils import logging_basic_config
@@ -38,14 +36,22 @@ parser.add_argument('-l', '--logs', type=str, required=True, help='The CSV file
 parser.add_argument('-b', '--batch-size', default=100, type=int, help='The number of blocks to filter at a time.')
 parser.add_argument('-o', '--output', default='-', type=str, help='The output file. If not specified stdout is used.')
 parser.add_argument('-w', '--max-workers', default=5, type=int, help='The maximum number of workers.')
-
-args = parser.parse_args()
-
-with smart_open(args.logs, 'r') as logs_file:
-    if args.logs.endswith('.json'):
-        logs_reader = (json.loads(line) for line in logs_file)
-    else:
-        logs_reader = csv.DictReader(logs_file)
+parser.add_argument('-p', '--processes', default=None, type=int,
+                    help='The number of processes for parsing chunks of the logs file and extracting transfers. '
+                         'If not provided logs are parsed in the main process and transfers are extracted '
+                         'by --max-workers threads.')
+parser.add_argument('--chunk-size', default=DEFAULT_CHUNK_SIZE, type=int,
+                    help='The size of the logs file chunks in bytes.')
+
+# Worker processes import the main module again on platforms that spawn them, so nothing may run on import
+if __name__ == '__main__':
+    args = parser.parse_args()
+
+    logs_reader = ChunkedItemReader(
+        args.logs,
+        item_format=JSON_FORMAT if args.logs.endswith('.json') else CSV_FORMAT,
+        max_workers=args.processes,
+        chunk_size=args.chunk_size)
     job = ExtractTokenTransfersJob(
         logs_iterable=logs_reader,
         batch_size=args.batch_size,
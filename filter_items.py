@@ -22,21 +22,26 @@
 
 
 import argparse
-import json
 
-from ethereumetl.file_utils import smart_open
+from ethereumetl.chunked_reader import DEFAULT_CHUNK_SIZE, ITEM_FORMATS
+from ethereumetl.item_filter import filter_items
 
-parser = argparse.ArgumentParser(description='Extracts a single column from a given csv file.')
+parser = argparse.ArgumentParser(description='Filters items in a given csv or json lines file.')
 parser.add_argument('-i', '--input', default='-', type=str, help='The input file. If not specified stdin is used.')
 parser.add_argument('-o', '--output', default='-', type=str, help='The output file. If not specified stdout is used.')
 parser.add_argument('-p', '--predicate', required=True, type=str,
-                    help='Predicate in Python code e.g. "item[\'is_erc20\']".')
+                    help='Predicate on item fields e.g. "item[\'is_erc20\'] or is_erc721" or '
+                         '"address(token_address) in {\'0x...\'} and value > 0".')
+parser.add_argument('-f', '--format', default=None, type=str, choices=ITEM_FORMATS,
+                    help='The format of the input file. If not provided it is csv for .csv files and json otherwise.')
+parser.add_argument('-w', '--max-workers', default=None, type=int,
+                    help='The number of processes for filtering chunks of the input file. If not provided everything '
+                         'runs in the main process.')
+parser.add_argument('--chunk-size', default=DEFAULT_CHUNK_SIZE, type=int,
+                    help='The size of the input file chunks in bytes.')
 
-args = parser.parse_args()
-
-# TODO: Add support for CSV
-with smart_open(args.input, 'r') as input_file, smart_open(args.output, 'w') as output_file:
-    for line in input_file:
-        item = json.loads(line)
-        if eval(args.predicate, globals(), {'item': item}):
-            output_file.write(json.dumps(item) + '\n')
+# Worker processes import the main module again on platforms that spawn them, so nothing may run on import
+if __name__ == '__main__':
+    args = parser.parse_args()
+    filter_items(args.input, args.output, args.predicate, item_format=args.format, max_workers=args.max_workers,
+                 chunk_size=args.chunk_size)
@@ -26,6 +26,7 @@ from datetime import datetime
 
 from web3 import Web3
 
+from ethereumetl.cache.block_timestamp_index import BlockTimestampIndex
 from ethereumetl.file_utils import smart_open
 from ethereumetl.logging_utils import logging_basic_config
 from ethereumetl.service.eth_service import EthService
@@ -40,14 +41,23 @@ parser.add_argument('-p', '--provider-uri', default='https://mainnet.infura.io',
 parser.add_argument('-d', '--date', required=True, type=lambda d: datetime.strptime(d, '%Y-%m-%d'),
                     help='The date e.g. 2018-01-01.')
 parser.add_argument('-o', '--output', default='-', type=str, help='The output file. If not specified stdout is used.')
+parser.add_argument('--block-timestamp-index', default=None, type=str,
+                    help='The file for caching block timestamps across runs, '
+                         'which makes repeated lookups much faster. Use a separate file for each chain.')
 
 args = parser.parse_args()
 
 provider = get_provider_from_uri(args.provider_uri)
 web3 = Web3(provider)
-eth_service = EthService(web3)
+block_timestamp_index = None
+if args.block_timestamp_index is not None:
+    block_timestamp_index = BlockTimestampIndex(args.block_timestamp_index)
+eth_service = EthService(web3, block_timestamp_index)
 
 start_block, end_block = eth_service.get_block_range_for_date(args.date)
 
 with smart_open(args.output, 'w') as output_file:
     output_file.write('{},{}\n'.format(start_block, end_block))
+
+if block_timestamp_index is not None:
+    block_timestamp_index.close()
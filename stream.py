@@ -0,0 +1,132 @@
+# MIT License
+#
+# Copyright (c) 2018 Evgeny Medvedev, evge.medvedev@gmail.com
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+
+
+import argparse
+
+from web3 import Web3
+
+from ethereumetl.executors.backpressure import default_backpressure_limits
+from ethereumetl.jobs.exporters.stream_item_exporter import stream_item_exporter
+from ethereumetl.logging_utils import logging_basic_config
+from ethereumetl.metrics import MetricsTextfileWriter, start_http_server
+from ethereumetl.providers.auto import get_provider_from_uri
+from ethereumetl.streaming.eth_streamer import EthStreamer
+from ethereumetl.thread_local_proxy import ThreadLocalProxy
+
+logging_basic_config()
+
+parser = argparse.ArgumentParser(
+    description='Streams blocks, transactions, receipts, logs and token transfers as new blocks appear.')
+parser.add_argument('-l', '--last-synced-block-file', default='last_synced_block.txt', type=str,
+                    help='The file with the last synced block number. The streamer continues from it after restarts.')
+parser.add_argument('--lag', default=0, type=int,
+                    help='The number of blocks to lag behind the chain head, to avoid exporting blocks '
+                         'that may be reorganised.')
+parser.add_argument('--reorg-window-size', default=64, type=int,
+                    help='The number of recent block hashes kept to detect chain reorganisations, saved next to '
+                         'the last synced block file. Use 0 to disable the check.')
+parser.add_argument('-s', '--start-block', default=None, type=int,
+                    help='Start block. If not provided and the last synced block file doesn\'t exist, '
+                         'the streamer starts from the current head.')
+parser.add_argument('-e', '--end-block', default=None, type=int,
+                    help='End block. If not provided the streamer runs forever.')
+parser.add_argument('-p', '--provider-uri', default='https://mainnet.infura.io', type=str,
+                    help='The URI of the web3 provider e.g. '
+                         'file://$HOME/Library/Ethereum/geth.ipc or https://mainnet.infura.io')
+parser.add_argument('--period-seconds', default=10, type=int,
+                    help='How many seconds to sleep when there are no new blocks.')
+parser.add_argument('--block-batch-size', default=10, type=int,
+                    help='The maximum number of blocks to export in one sync cycle.')
+parser.add_argument('-b', '--batch-size', default=100, type=int,
+                    help='The number of blocks or receipts to request in a single JSON RPC batch.')
+parser.add_argument('-w', '--max-workers', default=5, type=int, help='The maximum number of workers.')
+parser.add_argument('--blocks-output', default=None, type=str,
+                    help='The output file for blocks. If not provided blocks will not be exported. '
+                         'Use "-" for stdout')
+parser.add_argument('--transactions-output', default=None, type=str,
+                    help='The output file for transactions. If not provided transactions will not be exported.')
+parser.add_argument('--receipts-output', default=None, type=str,
+                    help='The output file for receipts. If not provided receipts will not be exported.')
+parser.add_argument('--logs-output', default=None, type=str,
+                    help='The output file for logs. If not provided logs will not be exported.')
+parser.add_argument('--token-transfers-output', default=None, type=str,
+                    help='The output file for token transfers. If not provided token transfers will not be exported.')
+parser.add_argument('--retracted-blocks-output', default=None, type=str,
+                    help='The output file for blocks removed from the chain by reorganisations. Items exported '
+                         'earlier for these block numbers and hashes are stale.')
+parser.add_argument('--max-buffered-items', default=None, type=int,
+                    help='The maximum number of items in batches being processed by all workers. Submitting more '
+                         'batches waits until some finish. If not provided only the number of batches is limited.')
+parser.add_argument('--max-buffered-bytes', default=None, type=int,
+                    help='The maximum estimated size in bytes of node responses for batches being processed by all '
+                         'workers. Use it to bound memory with many workers or large batches.')
+parser.add_argument('--metrics-port', default=None, type=int,
+                    help='The port to serve Prometheus metrics on, at /metrics. '
+                         'If not provided metrics are not served.')
+parser.add_argument('--metrics-textfile', default=None, type=str,
+                    help='The file to write Prometheus metrics to periodically, e.g. for the node_exporter '
+                         'textfile collector. The file name must end with .prom for the collector.')
+
+args = parser.parse_args()
+
+default_backpressure_limits.configure(max_items=args.max_buffered_items, max_bytes=args.max_buffered_bytes)
+
+item_exporter = stream_item_exporter(
+    blocks_output=args.blocks_output,
+    transactions_output=args.transactions_output,
+    receipts_output=args.receipts_output,
+    logs_output=args.logs_output,
+    token_transfers_output=args.token_transfers_output,
+    retracted_blocks_output=args.retracted_blocks_output)
+
+if len(item_exporter.filename_mapping) == 0:
+    raise ValueError('At least one output must be provided')
+
+streamer = EthStreamer(
+    web3=ThreadLocalProxy(lambda: Web3(get_provider_from_uri(args.provider_uri))),
+    batch_web3_provider=ThreadLocalProxy(lambda: get_provider_from_uri(args.provider_uri, batch=True)),
+    item_exporter=item_exporter,
+    last_synced_block_file=args.last_synced_block_file,
+    lag=args.lag,
+    start_block=args.start_block,
+    end_block=args.end_block,
+    period_seconds=args.period_seconds,
+    block_batch_size=args.block_batch_size,
+    batch_size=args.batch_size,
+    max_workers=args.max_workers,
+    item_types=list(item_exporter.filename_mapping.keys()),
+    reorg_window_size=args.reorg_window_size)
+
+if args.metrics_port is not None:
+    start_http_server(args.metrics_port)
+metrics_textfile_writer = None
+if args.metrics_textfile is not None:
+    metrics_textfile_writer = MetricsTextfileWriter(args.metrics_textfile)
+    metrics_textfile_writer.start()
+
+try:
+    streamer.stream()
+finally:
+    if metrics_textfile_writer is not None:
+        metrics_textfile_writer.close()
@@ -0,0 +1,98 @@
+# MIT License
+#
+# Copyright (c) 2018 Evgeny Medvedev, evge.medvedev@gmail.com
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+
+
+import json
+
+import pytest
+
+from benchmarks.corpus import generate_corpus, load_corpus, record_corpus, save_corpus
+from benchmarks.replay_node import ReplayNode, ReplayNodeServer
+from benchmarks.runner import compare_to_baseline, run_benchmarks
+from benchmarks.scenarios import DEFAULT_SCENARIOS
+from ethereumetl.json_rpc_requests import generate_get_block_by_number_json_rpc
+from ethereumetl.providers.rpc import BatchHTTPProvider
+from ethereumetl.utils import rpc_response_batch_to_results
+
+
+def test_generate_corpus_is_deterministic():
+    corpus1 = generate_corpus(start_block=100, block_count=5, transactions_per_block=10, seed=1)
+    corpus2 = generate_corpus(start_block=100, block_count=5, transactions_per_block=10, seed=1)
+    assert corpus1.blocks == corpus2.blocks
+    assert corpus1.block_receipts == corpus2.block_receipts
+    assert (corpus1.start_block, corpus1.end_block) == (100, 104)
+
+
+def test_save_and_load_corpus(tmpdir):
+    corpus = generate_corpus(block_count=3, transactions_per_block=5)
+    path = str(tmpdir.join('corpus.json'))
+    save_corpus(corpus, path)
+    loaded_corpus = load_corpus(path)
+    assert loaded_corpus.blocks == corpus.blocks
+    assert loaded_corpus.receipts == corpus.receipts
+
+
+def test_record_corpus_from_replay_node():
+    corpus = generate_corpus(start_block=10, block_count=4, transactions_per_block=5)
+    recorded_corpus = record_corpus(ReplayNode(corpus), 10, 13, batch_size=3)
+    assert recorded_corpus.blocks == corpus.blocks
+    assert recorded_corpus.block_receipts == corpus.block_receipts
+
+
+def test_replay_node_server():
+    corpus = generate_corpus(start_block=10, block_count=3, transactions_per_block=5)
+    with ReplayNodeServer(ReplayNode(corpus, latency_seconds=0.01, jitter_seconds=0.005)) as server:
+        provider = BatchHTTPProvider(server.uri)
+        request = list(generate_get_block_by_number_json_rpc([10, 12], False))
+        blocks = list(rpc_response_batch_to_results(provider.make_request(json.dumps(request))))
+    assert [block['hash'] for block in blocks] == [corpus.blocks[10]['hash'], corpus.blocks[12]['hash']]
+    assert blocks[0]['transactions'] == [tx['hash'] for tx in corpus.blocks[10]['transactions']]
+
+
+def test_run_benchmarks():
+    corpus = generate_corpus(block_count=5, transactions_per_block=5)
+    results = run_benchmarks(corpus, DEFAULT_SCENARIOS, batch_size=2, max_workers=2, in_process=True)
+    assert sorted(results) == sorted(DEFAULT_SCENARIOS)
+    assert results['blocks_csv']['row_count'] == len(corpus.blocks) + corpus.transaction_count()
+    assert results['receipts_csv']['row_count'] == corpus.transaction_count() + corpus.log_count()
+    assert results['block_receipts_csv']['row_count'] == results['receipts_csv']['row_count']
+    for result in results.values():
+        assert result['blocks_per_second'] > 0
+        assert result['peak_rss_mb'] > 0
+
+
+def test_run_benchmarks_unknown_scenario():
+    with pytest.raises(ValueError):
+        run_benchmarks(generate_corpus(block_count=1), ['unknown'])
+
+
+def test_compare_to_baseline():
+    baseline = {
+        'blocks_csv': {'blocks_per_second': 100, 'rows_per_second': 1000, 'peak_rss_mb': 50, 'cpu_seconds': 1.0}}
+    results = {
+        'blocks_csv': {'blocks_per_second': 95, 'rows_per_second': 800, 'peak_rss_mb': 60, 'cpu_seconds': 1.05},
+        'receipts_csv': {'blocks_per_second': 1, 'rows_per_second': 1, 'peak_rss_mb': 1, 'cpu_seconds': 1}}
+    regressions = compare_to_baseline(results, baseline, tolerance=0.1)
+    assert len(regressions) == 2
+    assert regressions[0].startswith('blocks_csv rows_per_second')
+    assert regressions[1].startswith('blocks_csv peak_rss_mb')
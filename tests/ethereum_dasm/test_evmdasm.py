@@ -0,0 +1,65 @@
+# MIT License
+#
+# Copyright (c) 2018 Evgeny Medvedev, evge.medvedev@gmail.com
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+
+import pytest
+
+from ethereum_dasm.evmdasm import EVMDisAssembler, hex_to_bytes
+
+
+def test_disassemble_compact():
+    # PUSH1 0x60, PUSH1 0x40, MSTORE, PUSH4 0x06fdde03, JUMPDEST, STOP
+    compact_code = EVMDisAssembler().disassemble_compact('0x60606040526306fdde035b00')
+
+    records = [(opcode, pc, operand.hex()) for opcode, pc, operand in compact_code]
+    assert records == [(0x60, 0, '60'), (0x60, 2, '40'), (0x52, 4, ''), (0x63, 5, '06fdde03'), (0x5b, 10, ''),
+                       (0x00, 11, '')]
+
+
+def test_disassemble_builds_linked_instructions():
+    instructions = list(EVMDisAssembler().disassemble('60606040526306fdde035b00'))
+
+    assert [str(instruction) for instruction in instructions] == \
+        ['PUSH1 0x60', 'PUSH1 0x40', 'MSTORE ', 'PUSH4 0x06fdde03', 'JUMPDEST ', 'STOP ']
+    assert [instruction.address for instruction in instructions] == [0, 2, 4, 5, 10, 11]
+    assert instructions[0].previous is None
+    assert instructions[1].previous is instructions[0]
+    assert instructions[0].next is instructions[1]
+
+
+def test_disassemble_unknown_opcode_and_truncated_operand():
+    disassembler = EVMDisAssembler()
+    instructions = list(disassembler.disassemble('0c6306fd'))
+
+    assert [(instruction.name, instruction.operand) for instruction in instructions] == \
+        [('UNKNOWN_0xc', ''), ('PUSH4', '06fd')]
+    assert len(disassembler.errors) == 1
+
+
+@pytest.mark.parametrize("bytecode,expected_bytes", [
+    ('0x6060', b'\x60\x60'),
+    ('6060', b'\x60\x60'),
+    ('0x0x6060', b'\x60\x60'),
+    ('60 z60', b'\x60\x60'),
+])
+def test_hex_to_bytes(bytecode, expected_bytes):
+    assert hex_to_bytes(bytecode) == expected_bytes
@@ -0,0 +1,82 @@
+# MIT License
+#
+# Copyright (c) 2018 Evgeny Medvedev, evge.medvedev@gmail.com
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+
+
+from ethereumetl.cache.block_timestamp_index import BlockTimestampIndex
+from ethereumetl.service.graph_operations import GraphOperations, Point
+
+
+def test_block_timestamp_index_find_bounds(tmpdir):
+    path = str(tmpdir.join('block_timestamps.bin'))
+    index = BlockTimestampIndex(path)
+    assert index.find_bounds(100) == (None, None)
+
+    index.add(10, 100)
+    index.add(30, 300)
+    index.flush()
+    index.add(20, 200)
+    assert index.find_bounds(150) == ((10, 100), (20, 200))
+    assert index.find_bounds(200) == ((20, 200), (20, 200))
+    assert index.find_bounds(250) == ((20, 200), (30, 300))
+    assert index.find_bounds(50) == (None, (10, 100))
+    assert index.find_bounds(350) == ((30, 300), None)
+    index.close()
+
+    index = BlockTimestampIndex(path)
+    assert len(index) == 3
+    assert index.find_bounds(150) == ((10, 100), (20, 200))
+    assert index.find_bounds(300) == ((30, 300), (30, 300))
+    index.close()
+
+
+class CountingGraph(object):
+    """Graph with y = 10 * x + 5 for x from 1 to 1000"""
+
+    def __init__(self):
+        self.calls = 0
+
+    def get_first_point(self):
+        return self.get_point(1)
+
+    def get_last_point(self):
+        return self.get_point(1000)
+
+    def get_point(self, x):
+        self.calls += 1
+        return Point(x, 10 * x + 5)
+
+
+def test_graph_operations_reuses_block_timestamp_index(tmpdir):
+    path = str(tmpdir.join('block_timestamps.bin'))
+
+    graph = CountingGraph()
+    index = BlockTimestampIndex(path)
+    assert GraphOperations(graph, index).get_bounds_for_y_coordinate(4321) == (431, 432)
+    assert graph.calls > 0
+    index.close()
+
+    graph = CountingGraph()
+    index = BlockTimestampIndex(path)
+    assert GraphOperations(graph, index).get_bounds_for_y_coordinate(4321) == (431, 432)
+    assert graph.calls == 0
+    index.close()
@@ -0,0 +1,60 @@
+# MIT License
+#
+# Copyright (c) 2018 Evgeny Medvedev, evge.medvedev@gmail.com
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+
+from ethereumetl.cache.contract_analysis_cache import ContractAnalysisCache, get_bytecode_hash
+from ethereumetl.cache.lru_cache import LRUCache
+from ethereumetl.cache.sqlite_store import SqliteKeyValueStore
+
+ANALYSIS = {'function_sighashes': ['0x06fdde03', '0x095ea7b3'], 'is_erc20': False, 'is_erc721': False}
+
+
+def test_lru_cache_evicts_least_recently_used():
+    cache = LRUCache(2)
+    cache.put('a', 1)
+    cache.put('b', 2)
+    assert cache.get('a') == 1
+    cache.put('c', 3)
+
+    assert 'b' not in cache
+    assert cache.get('a') == 1
+    assert cache.get('c') == 3
+    assert len(cache) == 2
+
+
+def test_contract_analysis_cache_shares_persistent_store(tmpdir):
+    path = str(tmpdir.join('contract_analysis.db'))
+    code_hash = get_bytecode_hash('0x6060604052')
+
+    cache = ContractAnalysisCache(store=SqliteKeyValueStore(path))
+    assert cache.get(code_hash) is None
+    cache.put(code_hash, ANALYSIS)
+    cache.close()
+
+    another_cache = ContractAnalysisCache(store=SqliteKeyValueStore(path))
+    assert another_cache.get(code_hash) == ANALYSIS
+    another_cache.close()
+
+
+def test_get_bytecode_hash():
+    assert get_bytecode_hash('0x6060') == '0xd3afbc7f9204e1dca2abac64b78fe8f020334a5dc46a3ecd86dd1d83d6cc271f'
+    assert get_bytecode_hash('0x0x6060') != get_bytecode_hash('0x6060')
@@ -0,0 +1,82 @@
+# MIT License
+#
+# Copyright (c) 2018 Evgeny Medvedev, evge.medvedev@gmail.com
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+
+
+import tests.resources
+from ethereumetl.cache.sqlite_store import SqliteKeyValueStore
+from ethereumetl.cache.token_cache import TokenCache
+from ethereumetl.service.eth_token_service import EthBatchTokenService, token_from_fields
+from tests.ethereumetl.job.mock_batch_web3_provider import MockBatchWeb3Provider
+
+TOKEN_ADDRESS = '0x86fa049857e0209aa7d9e616f7eb3b3b78ecfdb0'
+TOKEN_FIELDS = {'symbol': 'EOS', 'name': 'EOS', 'decimals': 18, 'total_supply': 1000000000000000000000000000}
+
+
+def test_token_cache_total_supply_max_age(tmpdir):
+    path = str(tmpdir.join('tokens.db'))
+    cache = TokenCache(store=SqliteKeyValueStore(path, table_name='tokens'), total_supply_max_age=100)
+    assert cache.get(TOKEN_ADDRESS, 1000) == {}
+    cache.put(token_from_fields(TOKEN_ADDRESS, TOKEN_FIELDS), 1000)
+    cache.close()
+
+    cache = TokenCache(store=SqliteKeyValueStore(path, table_name='tokens'), total_supply_max_age=100)
+    assert cache.get(TOKEN_ADDRESS, 1100) == TOKEN_FIELDS
+    # total_supply is not valid before the block it was fetched at, or too long after it
+    immutable_fields = {'symbol': 'EOS', 'name': 'EOS', 'decimals': 18}
+    assert cache.get(TOKEN_ADDRESS, 999) == immutable_fields
+    assert cache.get(TOKEN_ADDRESS, 1101) == immutable_fields
+    assert cache.get(TOKEN_ADDRESS, 'latest') == immutable_fields
+    cache.close()
+
+
+def test_token_cache_skips_empty_tokens():
+    cache = TokenCache()
+    cache.put(token_from_fields(TOKEN_ADDRESS, {}), 1000)
+    assert cache.get(TOKEN_ADDRESS, 1000) == {}
+
+
+class FailingBatchWeb3Provider(object):
+    def make_request(self, text):
+        raise AssertionError('Token should be read from the cache')
+
+
+def test_batch_token_service_reads_cache():
+    cache = TokenCache(total_supply_max_age=100)
+    cache.put(token_from_fields(TOKEN_ADDRESS, TOKEN_FIELDS), 1000)
+
+    token_service = EthBatchTokenService(FailingBatchWeb3Provider(), block=1050, token_cache=cache)
+    token = token_service.get_tokens([TOKEN_ADDRESS])[0]
+    assert token.address == TOKEN_ADDRESS
+    assert {field: getattr(token, field) for field in TOKEN_FIELDS} == TOKEN_FIELDS
+
+
+def test_batch_token_service_fetches_expired_total_supply():
+    cache = TokenCache(total_supply_max_age=100)
+    cache.put(token_from_fields(TOKEN_ADDRESS, dict(TOKEN_FIELDS, total_supply=1)), 1000)
+
+    provider = MockBatchWeb3Provider(lambda file: tests.resources.read_resource(
+        ['test_export_tokens_job', 'token_with_alternative_return_type'], file))
+    token_service = EthBatchTokenService(provider, block=1200, token_cache=cache)
+    token = token_service.get_tokens([TOKEN_ADDRESS])[0]
+    assert {field: getattr(token, field) for field in TOKEN_FIELDS} == TOKEN_FIELDS
+    assert cache.get(TOKEN_ADDRESS, 1200) == TOKEN_FIELDS
@@ -0,0 +1,122 @@
+# MIT License
+#
+# Copyright (c) 2018 Evgeny Medvedev, evge.medvedev@gmail.com
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+
+
+import threading
+import time
+
+import pytest
+
+from ethereumetl.executors.backpressure import Backpressure, default_backpressure_limits
+from ethereumetl.executors.batch_work_executor import BatchWorkExecutor
+from ethereumetl.providers.request_metrics import record_response_bytes
+
+
+def test_backpressure_limits_items_in_flight():
+    backpressure = Backpressure(max_items=4)
+    executor = BatchWorkExecutor(2, 8, backpressure=backpressure)
+    lock = threading.Lock()
+    processed = []
+
+    def handler(batch):
+        time.sleep(0.01)
+        with lock:
+            processed.extend(batch)
+
+    executor.execute(range(40), handler)
+    executor.shutdown()
+    assert sorted(processed) == list(range(40))
+    assert backpressure.peak_items_in_flight == 4
+    assert backpressure.items_in_flight == 0
+
+
+def test_backpressure_admits_large_batch_when_idle():
+    backpressure = Backpressure(max_items=1, max_bytes=1)
+    backpressure.acquire(10, 100)
+    backpressure.release(10, 100)
+    assert backpressure.peak_items_in_flight == 10
+
+
+def test_backpressure_limits_bytes_in_flight():
+    backpressure = Backpressure(max_bytes=1000)
+    executor = BatchWorkExecutor(1, 8, backpressure=backpressure)
+
+    def handler(batch):
+        record_response_bytes(400)
+        time.sleep(0.01)
+
+    executor.execute(range(20), handler)
+    executor.shutdown()
+    assert executor.bytes_per_item == 400
+    assert backpressure.peak_bytes_in_flight <= 1000
+    assert backpressure.bytes_in_flight == 0
+
+
+def test_backpressure_admits_one_batch_until_bytes_are_measured():
+    backpressure = Backpressure(max_bytes=1000)
+    executor = BatchWorkExecutor(1, 8, backpressure=backpressure)
+    batches_in_flight = []
+
+    def handler(batch):
+        batches_in_flight.append(backpressure.items_in_flight)
+        time.sleep(0.01)
+
+    executor.execute(range(3), handler)
+    executor.shutdown()
+    assert batches_in_flight[0] == 1
+    assert executor.bytes_per_item == 0
+
+
+def test_executors_have_separate_backpressure():
+    default_backpressure_limits.configure(max_items=1)
+    try:
+        outer = BatchWorkExecutor(1, 2)
+        inner = BatchWorkExecutor(1, 2)
+    finally:
+        default_backpressure_limits.configure()
+    assert outer.backpressure is not inner.backpressure
+    assert outer.backpressure.max_items == 1
+
+    def handler(batch):
+        # Would block forever with a budget shared with the outer executor
+        inner.execute(range(2), lambda inner_batch: None)
+
+    outer.execute(range(1), handler)
+    outer.shutdown()
+    inner.shutdown()
+    assert outer.backpressure.items_in_flight == 0
+
+
+def test_batch_work_executor_fails_fast():
+    executor = BatchWorkExecutor(1, 2, retry_exceptions=(), backpressure=Backpressure())
+
+    def handler(batch):
+        if batch[0] == 0:
+            raise ValueError('Failed batch')
+        time.sleep(0.01)
+
+    with pytest.raises(ValueError):
+        executor.execute(range(100), handler)
+    # The remaining batches finish and release their items
+    executor.shutdown()
+    assert executor.backpressure.items_in_flight == 0
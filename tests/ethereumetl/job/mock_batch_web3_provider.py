@@ -23,6 +23,10 @@
 
 import json
 
+from eth_utils import decode_hex
+
+from ethereumetl.service.eth_multicall import MULTICALL3_ADDRESS, TRY_AGGREGATE_SELECTOR, WORD_SIZE, encode_uint, \
+    pad_right, read_uint
 from ethereumetl.utils import hex_to_dec
 
 
@@ -37,14 +41,65 @@ class MockBatchWeb3Provider(object):
             if req['method'] == 'eth_getBlockByNumber':
                 block_number = hex_to_dec(req['params'][0])
                 file_name = 'web3_response.block.' + str(block_number) + '.json'
+            elif req['method'] in ('eth_getBlockReceipts', 'parity_getBlockReceipts'):
+                block = req['params'][0]
+                block = str(hex_to_dec(block)) if block.startswith('0x') else block
+                file_name = 'web3_response.{}.{}.json'.format(req['method'], block)
             elif req['method'] == 'eth_getCode':
                 contract_address = req['params'][0]
                 file_name = 'web3_response.code.' + str(contract_address) + '.json'
             elif req['method'] == 'eth_getTransactionReceipt':
                 transaction_hash = req['params'][0]
                 file_name = 'web3_response.receipt.' + str(transaction_hash) + '.json'
+            elif req['method'] == 'eth_call' and req['params'][0]['to'].lower() == MULTICALL3_ADDRESS:
+                web3_response.append(self._multicall(req))
+                continue
+            elif req['method'] == 'eth_call':
+                to = req['params'][0]['to'].lower()
+                data = req['params'][0]['data']
+                file_name = 'eth_call_{}_{}.json'.format(to, data)
             else:
                 raise ValueError('Request method {} is unexpected'.format(req['method']))
             file_content = self.read_resource(file_name)
-            web3_response.append(json.loads(file_content))
-        return web3_response
\ No newline at end of file
+            response = json.loads(file_content)
+            # Responses are matched to requests by id
+            response['id'] = req['id']
+            web3_response.append(response)
+        return web3_response
+
+    # Emulates Multicall3 tryAggregate using eth_call resources for individual calls
+    def _multicall(self, req):
+        data = req['params'][0]['data']
+        if not data.startswith(TRY_AGGREGATE_SELECTOR):
+            raise ValueError('Multicall function {} is unexpected'.format(data[:10]))
+        input_data = decode_hex(data)[4:]
+
+        array_start = read_uint(input_data, WORD_SIZE)
+        length = read_uint(input_data, array_start)
+        elements_start = array_start + WORD_SIZE
+        results = []
+        for index in range(length):
+            tuple_start = elements_start + read_uint(input_data, elements_start + index * WORD_SIZE)
+            to = '0x' + input_data[tuple_start + 12:tuple_start + WORD_SIZE].hex()
+            bytes_start = tuple_start + read_uint(input_data, tuple_start + WORD_SIZE)
+            bytes_length = read_uint(input_data, bytes_start)
+            call_data = '0x' + input_data[bytes_start + WORD_SIZE:bytes_start + WORD_SIZE + bytes_length].hex()
+
+            response = json.loads(self.read_resource('eth_call_{}_{}.json'.format(to, call_data)))
+            if response.get('error') is not None:
+                results.append((False, b''))
+            else:
+                results.append((True, decode_hex(response['result'])))
+
+        heads = []
+        tails = []
+        tails_size = 0
+        for success, return_data in results:
+            heads.append(encode_uint(len(results) * WORD_SIZE + tails_size))
+            tail = encode_uint(1 if success else 0) + encode_uint(2 * WORD_SIZE) + \
+                encode_uint(len(return_data)) + pad_right(return_data)
+            tails.append(tail)
+            tails_size += len(tail)
+        output = encode_uint(WORD_SIZE) + encode_uint(len(results)) + b''.join(heads) + b''.join(tails)
+
+        return {'jsonrpc': '2.0', 'id': req['id'], 'result': '0x' + output.hex()}
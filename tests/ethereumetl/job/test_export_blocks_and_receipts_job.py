@@ -0,0 +1,112 @@
+# MIT License
+#
+# Copyright (c) 2018 Evgeny Medvedev, evge.medvedev@gmail.com
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+
+
+import json
+
+import pytest
+from requests.exceptions import Timeout
+
+import tests.resources
+from ethereumetl.jobs.export_blocks_and_receipts_job import ExportBlocksAndReceiptsJob
+from ethereumetl.jobs.exporters.blocks_and_receipts_item_exporter import blocks_and_receipts_item_exporter
+from ethereumetl.thread_local_proxy import ThreadLocalProxy
+from tests.ethereumetl.job.helpers import get_web3_provider
+from tests.ethereumetl.job.mock_batch_web3_provider import MockBatchWeb3Provider
+from tests.helpers import compare_lines_ignore_order, read_file, skip_if_slow_tests_disabled
+
+RESOURCE_GROUP = 'test_export_blocks_and_receipts_job'
+ENTITIES = ['blocks', 'transactions', 'receipts', 'logs', 'token_transfers']
+
+
+def read_resource(resource_group, file_name):
+    return tests.resources.read_resource([RESOURCE_GROUP, resource_group], file_name)
+
+
+@pytest.mark.parametrize(
+    "start_block,end_block,batch_size,block_receipts_method,resource_group,web3_provider_type", [
+        (483920, 483920, 1, None, 'block_with_logs', 'mock'),
+        (483920, 483920, 1, 'eth_getBlockReceipts', 'block_with_logs', 'mock'),
+        skip_if_slow_tests_disabled((483920, 483920, 1, None, 'block_with_logs', 'infura'))
+    ])
+def test_export_blocks_and_receipts_job(tmpdir, start_block, end_block, batch_size, block_receipts_method,
+                                        resource_group, web3_provider_type):
+    output_files = {entity: tmpdir.join('actual_{}.csv'.format(entity)) for entity in ENTITIES}
+
+    job = ExportBlocksAndReceiptsJob(
+        start_block=start_block, end_block=end_block, batch_size=batch_size,
+        batch_web3_provider=ThreadLocalProxy(
+            lambda: get_web3_provider(web3_provider_type, lambda file: read_resource(resource_group, file), batch=True)
+        ),
+        max_workers=5,
+        item_exporter=blocks_and_receipts_item_exporter(
+            output_files['blocks'], output_files['transactions'], output_files['receipts'], output_files['logs'],
+            output_files['token_transfers']),
+        block_receipts_method=block_receipts_method
+    )
+    job.run()
+
+    for entity in ENTITIES:
+        compare_lines_ignore_order(
+            read_resource(resource_group, 'expected_{}.csv'.format(entity)), read_file(output_files[entity])
+        )
+
+
+# Fails the first request with the given method, like a node that times out once
+class FlakyBatchWeb3Provider(object):
+    def __init__(self, batch_web3_provider, failing_method):
+        self.batch_web3_provider = batch_web3_provider
+        self.failing_method = failing_method
+        self.failed = False
+
+    def make_request(self, text):
+        if not self.failed and any(req['method'] == self.failing_method for req in json.loads(text)):
+            self.failed = True
+            raise Timeout('Request timed out')
+        return self.batch_web3_provider.make_request(text)
+
+
+@pytest.mark.parametrize('block_receipts_method, failing_method', [
+    (None, 'eth_getTransactionReceipt'),
+    ('eth_getBlockReceipts', 'eth_getBlockReceipts'),
+])
+def test_export_blocks_and_receipts_job_retried_batch(tmpdir, block_receipts_method, failing_method):
+    resource_group = 'block_with_logs'
+    output_files = {entity: tmpdir.join('actual_{}.csv'.format(entity)) for entity in ENTITIES}
+
+    job = ExportBlocksAndReceiptsJob(
+        start_block=483920, end_block=483920, batch_size=1,
+        batch_web3_provider=FlakyBatchWeb3Provider(
+            MockBatchWeb3Provider(lambda file: read_resource(resource_group, file)), failing_method),
+        max_workers=1,
+        item_exporter=blocks_and_receipts_item_exporter(
+            output_files['blocks'], output_files['transactions'], output_files['receipts'], output_files['logs'],
+            output_files['token_transfers']),
+        block_receipts_method=block_receipts_method
+    )
+    job.run()
+
+    for entity in ENTITIES:
+        compare_lines_ignore_order(
+            read_resource(resource_group, 'expected_{}.csv'.format(entity)), read_file(output_files[entity])
+        )
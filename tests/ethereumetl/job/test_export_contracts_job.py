@@ -24,8 +24,10 @@
 import pytest
 
 import tests.resources
+from ethereumetl.cache.contract_analysis_cache import ContractAnalysisCache
 from ethereumetl.jobs.export_contracts_job import ExportContractsJob
 from ethereumetl.jobs.exporters.contracts_item_exporter import contracts_item_exporter
+from ethereumetl.service.eth_contract_analyzer import EthContractAnalyzer
 from ethereumetl.thread_local_proxy import ThreadLocalProxy
 from tests.ethereumetl.job.helpers import get_web3_provider
 from tests.helpers import compare_lines_ignore_order, read_file, skip_if_slow_tests_disabled
@@ -40,12 +42,16 @@ def read_resource(resource_group, file_name):
 CONTRACT_ADDRESSES_UNDER_TEST = ['0x06012c8cf97bead5deae237070f9587f8e7a266d']
 
 
-@pytest.mark.parametrize("batch_size,contract_addresses,output_format,resource_group,web3_provider_type", [
-    (1, CONTRACT_ADDRESSES_UNDER_TEST, 'json', 'erc721_contract', 'mock'),
-    skip_if_slow_tests_disabled((1, CONTRACT_ADDRESSES_UNDER_TEST, 'json', 'erc721_contract', 'infura'))
-])
+@pytest.mark.parametrize(
+    "batch_size,contract_addresses,output_format,resource_group,web3_provider_type,cache,analysis_max_workers", [
+        (1, CONTRACT_ADDRESSES_UNDER_TEST, 'json', 'erc721_contract', 'mock', False, None),
+        (1, CONTRACT_ADDRESSES_UNDER_TEST * 2, 'json', 'erc721_contract', 'mock', True, None),
+        (2, CONTRACT_ADDRESSES_UNDER_TEST * 3, 'json', 'erc721_contract', 'mock', False, 2),
+        skip_if_slow_tests_disabled(
+            (1, CONTRACT_ADDRESSES_UNDER_TEST, 'json', 'erc721_contract', 'infura', False, None))
+    ])
 def test_export_contracts_job(tmpdir, batch_size, contract_addresses, output_format, resource_group,
-                              web3_provider_type):
+                              web3_provider_type, cache, analysis_max_workers):
     contracts_output_file = tmpdir.join('actual_contracts.' + output_format)
 
     job = ExportContractsJob(
@@ -55,10 +61,49 @@ def test_export_contracts_job(tmpdir, batch_size, contract_addresses, output_for
             lambda: get_web3_provider(web3_provider_type, lambda file: read_resource(resource_group, file), batch=True)
         ),
         max_workers=5,
-        item_exporter=contracts_item_exporter(contracts_output_file)
+        item_exporter=contracts_item_exporter(contracts_output_file),
+        contract_analysis_cache=ContractAnalysisCache() if cache else None,
+        analysis_max_workers=analysis_max_workers
     )
     job.run()
 
-    compare_lines_ignore_order(
-        read_resource(resource_group, 'expected_contracts.' + output_format), read_file(contracts_output_file)
-    )
+    # Every contract address is exported, including the ones with cached bytecode analysis
+    expected_contracts = '\n'.join(
+        [read_resource(resource_group, 'expected_contracts.' + output_format)] * len(contract_addresses))
+    compare_lines_ignore_order(expected_contracts, read_file(contracts_output_file))
+
+
+def test_export_contracts_job_shared_analyzer(tmpdir):
+    resource_group = 'erc721_contract'
+    contract_analyzer = EthContractAnalyzer(max_workers=2)
+    try:
+        # The analysis process pool is reused by the next job
+        for index in range(2):
+            contracts_output_file = tmpdir.join('actual_contracts_{}.json'.format(index))
+            job = ExportContractsJob(
+                contract_addresses_iterable=CONTRACT_ADDRESSES_UNDER_TEST,
+                batch_size=1,
+                batch_web3_provider=ThreadLocalProxy(
+                    lambda: get_web3_provider('mock', lambda file: read_resource(resource_group, file), batch=True)
+                ),
+                max_workers=5,
+                item_exporter=contracts_item_exporter(contracts_output_file),
+                contract_analyzer=contract_analyzer
+            )
+            job.run()
+            compare_lines_ignore_order(
+                read_resource(resource_group, 'expected_contracts.json'), read_file(contracts_output_file))
+    finally:
+        contract_analyzer.shutdown()
+
+
+def test_contracts_item_exporter_interfaces(tmpdir):
+    contracts_output_file = tmpdir.join('actual_contracts.csv')
+
+    item_exporter = contracts_item_exporter(str(contracts_output_file), ['erc20', 'erc1155', 'erc1155'])
+    item_exporter.open()
+    item_exporter.export_item({'type': 'contract', 'address': '0x01', 'is_erc20': True, 'is_erc1155': False})
+    item_exporter.close()
+
+    header = read_file(contracts_output_file).splitlines()[0]
+    assert header == 'address,bytecode,function_sighashes,is_erc20,is_erc721,is_erc1155'
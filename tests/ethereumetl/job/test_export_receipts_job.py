@@ -74,3 +74,34 @@ def test_export_receipts_job(tmpdir, batch_size, transaction_hashes, output_form
     compare_lines_ignore_order(
         read_resource(resource_group, 'expected_logs.' + output_format), read_file(logs_output_file)
     )
+
+
+@pytest.mark.parametrize("batch_size,block_numbers,output_format,resource_group,web3_provider_type", [
+    (1, [483920], 'csv', 'receipts_with_logs', 'mock'),
+    (2, [483920], 'json', 'receipts_with_logs', 'mock')
+])
+def test_export_receipts_job_by_block_numbers(
+        tmpdir, batch_size, block_numbers, output_format, resource_group, web3_provider_type):
+    receipts_output_file = tmpdir.join('actual_receipts.' + output_format)
+    logs_output_file = tmpdir.join('actual_logs.' + output_format)
+
+    job = ExportReceiptsJob(
+        transaction_hashes_iterable=None,
+        block_numbers_iterable=block_numbers,
+        block_receipts_method='eth_getBlockReceipts',
+        batch_size=batch_size,
+        batch_web3_provider=ThreadLocalProxy(
+            lambda: get_web3_provider(web3_provider_type, lambda file: read_resource(resource_group, file), batch=True)
+        ),
+        max_workers=5,
+        item_exporter=receipts_and_logs_item_exporter(receipts_output_file, logs_output_file)
+    )
+    job.run()
+
+    compare_lines_ignore_order(
+        read_resource(resource_group, 'expected_receipts.' + output_format), read_file(receipts_output_file)
+    )
+
+    compare_lines_ignore_order(
+        read_resource(resource_group, 'expected_logs.' + output_format), read_file(logs_output_file)
+    )
@@ -61,3 +61,42 @@ def test_export_tokens_job(tmpdir, token_addresses, resource_group, web3_provide
     compare_lines_ignore_order(
         read_resource(resource_group, 'expected_tokens.csv'), read_file(output_file)
     )
+
+
+# Batched export falls back to bytes32 for string fields, so symbol of the token with alternative return type is EOS
+@pytest.mark.parametrize("token_addresses,resource_group,web3_provider_type,multicall,block", [
+    (['0xf763be8b3263c268e9789abfb3934564a7b80054'], 'token_with_invalid_data', 'mock', False, 'latest'),
+    (['0x86fa049857e0209aa7d9e616f7eb3b3b78ecfdb0'], 'token_with_alternative_return_type', 'mock', False, 'latest'),
+    (['0xf763be8b3263c268e9789abfb3934564a7b80054'], 'token_with_invalid_data', 'mock', True, 'latest'),
+    (['0x86fa049857e0209aa7d9e616f7eb3b3b78ecfdb0'], 'token_with_alternative_return_type', 'mock', True, 16000000),
+    # Multicall3 is not deployed at this block so token functions are called directly
+    (['0x86fa049857e0209aa7d9e616f7eb3b3b78ecfdb0'], 'token_with_alternative_return_type', 'mock', True, 5000000),
+    skip_if_slow_tests_disabled(
+        (['0x86fa049857e0209aa7d9e616f7eb3b3b78ecfdb0'], 'token_with_alternative_return_type', 'infura', False,
+         'latest')
+    ),
+    skip_if_slow_tests_disabled(
+        (['0x86fa049857e0209aa7d9e616f7eb3b3b78ecfdb0'], 'token_with_alternative_return_type', 'infura', True,
+         16000000)
+    )
+])
+def test_export_tokens_job_batch(tmpdir, token_addresses, resource_group, web3_provider_type, multicall, block):
+    output_file = tmpdir.join('tokens.csv')
+
+    job = ExportTokensJob(
+        token_addresses_iterable=token_addresses,
+        web3=None,
+        batch_web3_provider=ThreadLocalProxy(
+            lambda: get_web3_provider(web3_provider_type, lambda file: read_resource(resource_group, file), batch=True)
+        ),
+        item_exporter=tokens_item_exporter(output_file),
+        max_workers=5,
+        batch_size=2,
+        multicall=multicall,
+        block=block
+    )
+    job.run()
+
+    compare_lines_ignore_order(
+        read_resource(resource_group, 'expected_tokens_batch.csv'), read_file(output_file)
+    )
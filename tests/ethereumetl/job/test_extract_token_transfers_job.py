@@ -26,6 +26,7 @@ import io
 import pytest
 
 import tests.resources
+from ethereumetl.chunked_reader import ChunkedItemReader
 from ethereumetl.jobs.exporters.token_transfers_item_exporter import token_transfers_item_exporter
 from ethereumetl.jobs.extract_token_transfers_job import ExtractTokenTransfersJob
 from tests.helpers import compare_lines_ignore_order, read_file
@@ -56,3 +57,25 @@ def test_export_token_transfers_job(tmpdir, resource_group):
     compare_lines_ignore_order(
         read_resource(resource_group, 'expected_token_transfers.csv'), read_file(output_file)
     )
+
+
+@pytest.mark.parametrize('resource_group, processes', [
+    ('logs', None),
+    ('logs', 2)
+])
+def test_export_token_transfers_job_chunked(tmpdir, resource_group, processes):
+    logs_file = tmpdir.join('logs.csv')
+    logs_file.write(read_resource(resource_group, 'logs.csv'))
+    output_file = tmpdir.join('token_transfers.csv')
+
+    job = ExtractTokenTransfersJob(
+        logs_iterable=ChunkedItemReader(str(logs_file), max_workers=processes, chunk_size=200),
+        batch_size=2,
+        item_exporter=token_transfers_item_exporter(output_file),
+        max_workers=5
+    )
+    job.run()
+
+    compare_lines_ignore_order(
+        read_resource(resource_group, 'expected_token_transfers.csv'), read_file(output_file)
+    )
@@ -0,0 +1,122 @@
+# MIT License
+#
+# Copyright (c) 2018 Evgeny Medvedev, evge.medvedev@gmail.com
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+
+import pytest
+
+import tests.resources
+from ethereumetl.jobs.export_blocks_job import BlockResponseMapper, ExportBlocksJob
+from ethereumetl.jobs.export_contracts_job import ContractResponseMapper, ExportContractsJob
+from ethereumetl.jobs.export_receipts_job import ExportReceiptsJob, ReceiptResponseMapper
+from ethereumetl.jobs.exporters.blocks_and_transactions_item_exporter import blocks_and_transactions_item_exporter
+from ethereumetl.jobs.exporters.contracts_item_exporter import contracts_item_exporter
+from ethereumetl.jobs.exporters.raw_archive_item_exporter import raw_archive_item_exporter
+from ethereumetl.jobs.exporters.receipts_and_logs_item_exporter import receipts_and_logs_item_exporter
+from ethereumetl.jobs.replay_raw_archive_job import ReplayRawArchiveJob
+from ethereumetl.providers.raw_archive import RawArchiveWriter, RawCaptureBatchProvider
+from tests.ethereumetl.job.mock_batch_web3_provider import MockBatchWeb3Provider
+from tests.helpers import compare_lines_ignore_order, read_file
+
+BLOCKS_RESOURCE_GROUP = ['test_export_blocks_job', 'blocks_with_transactions']
+RECEIPTS_RESOURCE_GROUP = ['test_export_receipts_job', 'receipts_with_logs']
+CONTRACTS_RESOURCE_GROUP = ['test_export_contracts_job', 'erc721_contract']
+
+TX_HASHES = ['0x04cbcb236043d8fb7839e07bbc7f5eed692fb2ca55d897f1101eac3e3ad4fab8',
+             '0x463d53f0ad57677a3b430a007c1c31d15d62c37fab5eee598551697c297c235c',
+             '0x05287a561f218418892ab053adfb3d919860988b19458c570c5c30f51c146f02',
+             '0xcea6f89720cc1d2f46cc7a935463ae0b99dd5fad9c91bb7357de5421511cee49']
+
+
+def capturing_provider(resource_group, raw_archive_writer):
+    return RawCaptureBatchProvider(
+        MockBatchWeb3Provider(lambda file: tests.resources.read_resource(resource_group, file)), raw_archive_writer)
+
+
+# With duplicated, blocks and receipts are requested again, like batches retried by the batch work executor
+def capture_raw_archive(path, output_dir, duplicated=False):
+    raw_archive_writer = RawArchiveWriter(path)
+    for _ in range(2 if duplicated else 1):
+        ExportBlocksJob(
+            start_block=47218, end_block=47219, batch_size=1,
+            batch_web3_provider=capturing_provider(BLOCKS_RESOURCE_GROUP, raw_archive_writer),
+            max_workers=1,
+            item_exporter=blocks_and_transactions_item_exporter(
+                output_dir.join('blocks.csv'), output_dir.join('transactions.csv'))).run()
+    for batch_size in ([2, 1] if duplicated else [2]):
+        ExportReceiptsJob(
+            transaction_hashes_iterable=TX_HASHES, batch_size=batch_size,
+            batch_web3_provider=capturing_provider(RECEIPTS_RESOURCE_GROUP, raw_archive_writer),
+            max_workers=1,
+            item_exporter=receipts_and_logs_item_exporter(
+                output_dir.join('receipts.csv'), output_dir.join('logs.csv'))).run()
+    ExportContractsJob(
+        contract_addresses_iterable=['0x06012c8cf97bead5deae237070f9587f8e7a266d'], batch_size=1,
+        batch_web3_provider=capturing_provider(CONTRACTS_RESOURCE_GROUP, raw_archive_writer),
+        max_workers=1,
+        item_exporter=contracts_item_exporter(output_dir.join('contracts.json'))).run()
+    raw_archive_writer.close()
+
+
+@pytest.mark.parametrize("max_workers,lines_per_task,duplicated", [
+    (None, 20, False),
+    (2, 1, False),
+    (None, 20, True),
+    (2, 1, True),
+])
+def test_replay_raw_archive_job(tmpdir, max_workers, lines_per_task, duplicated):
+    raw_archive_path = str(tmpdir.join('raw.jsonl.gz'))
+    capture_raw_archive(raw_archive_path, tmpdir.mkdir('live'), duplicated)
+
+    blocks_output_file = tmpdir.join('actual_blocks.csv')
+    transactions_output_file = tmpdir.join('actual_transactions.csv')
+    receipts_output_file = tmpdir.join('actual_receipts.csv')
+    logs_output_file = tmpdir.join('actual_logs.csv')
+    contracts_output_file = tmpdir.join('actual_contracts.json')
+    token_transfers_output_file = tmpdir.join('actual_token_transfers.csv')
+
+    job = ReplayRawArchiveJob(
+        raw_archive_paths=[raw_archive_path],
+        response_mappers=[
+            BlockResponseMapper(), ReceiptResponseMapper(export_token_transfers=True), ContractResponseMapper()],
+        item_exporter=raw_archive_item_exporter(
+            blocks_output_file, transactions_output_file, receipts_output_file, logs_output_file,
+            contracts_output_file, token_transfers_output_file),
+        max_workers=max_workers,
+        lines_per_task=lines_per_task)
+    job.run()
+
+    compare_lines_ignore_order(
+        tests.resources.read_resource(BLOCKS_RESOURCE_GROUP, 'expected_blocks.csv'), read_file(blocks_output_file))
+    compare_lines_ignore_order(
+        tests.resources.read_resource(BLOCKS_RESOURCE_GROUP, 'expected_transactions.csv'),
+        read_file(transactions_output_file))
+    compare_lines_ignore_order(
+        tests.resources.read_resource(RECEIPTS_RESOURCE_GROUP, 'expected_receipts.csv'),
+        read_file(receipts_output_file))
+    compare_lines_ignore_order(
+        tests.resources.read_resource(RECEIPTS_RESOURCE_GROUP, 'expected_logs.csv'), read_file(logs_output_file))
+    compare_lines_ignore_order(
+        tests.resources.read_resource(CONTRACTS_RESOURCE_GROUP, 'expected_contracts.json'),
+        read_file(contracts_output_file))
+    compare_lines_ignore_order(
+        tests.resources.read_resource(RECEIPTS_RESOURCE_GROUP, 'expected_token_transfers.csv'),
+        read_file(token_transfers_output_file))
@@ -0,0 +1,170 @@
+# MIT License
+#
+# Copyright (c) 2018 Evgeny Medvedev, evge.medvedev@gmail.com
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+
+
+import json
+
+import pytest
+
+import tests.resources
+from ethereumetl.cache.sqlite_store import SqliteKeyValueStore
+from ethereumetl.jobs.export_blocks_job import ExportBlocksJob
+from ethereumetl.jobs.exporters.blocks_and_transactions_item_exporter import blocks_and_transactions_item_exporter
+from ethereumetl.json_rpc_requests import generate_get_block_by_number_json_rpc, generate_json_rpc
+from ethereumetl.providers.caching import CachingBatchProvider, ChainMismatchError, ResponseNotCachedError, \
+    RECORD_MODE, REPLAY_MODE, check_response_store_chain, get_cache_key
+from tests.ethereumetl.job.mock_batch_web3_provider import MockBatchWeb3Provider
+from tests.helpers import compare_lines_ignore_order, read_file
+
+
+def read_resource(resource_group, file_name):
+    return tests.resources.read_resource(['test_export_blocks_job', resource_group], file_name)
+
+
+# Records the requests sent to the node
+class RecordingBatchWeb3Provider(object):
+    def __init__(self, batch_web3_provider):
+        self.batch_web3_provider = batch_web3_provider
+        self.requests = []
+
+    def make_request(self, text):
+        self.requests.extend(json.loads(text))
+        return self.batch_web3_provider.make_request(text)
+
+
+class FailingBatchWeb3Provider(object):
+    def make_request(self, text):
+        raise AssertionError('Responses should be read from the cache')
+
+
+@pytest.mark.parametrize("request_,expected_key", [
+    (generate_json_rpc('eth_getBlockByNumber', ['0x10', True]), 'block:16:full'),
+    (generate_json_rpc('eth_getBlockByNumber', ['latest', True]), None),
+    (generate_json_rpc('eth_getTransactionReceipt', ['0xAB']), 'receipt:0xab'),
+    (generate_json_rpc('eth_getBlockReceipts', ['0x10']), 'eth_getBlockReceipts:16'),
+    (generate_json_rpc('eth_getCode', ['0xAB', '0x10']), 'code:0xab:16'),
+    (generate_json_rpc('eth_getCode', ['0xab', 'latest']), None),
+    (generate_json_rpc('eth_call', [{'to': '0xab', 'data': '0x01'}, 'latest']), None),
+    (generate_json_rpc('eth_blockNumber', []), None),
+])
+def test_get_cache_key(request_, expected_key):
+    assert get_cache_key(request_) == expected_key
+
+
+def test_caching_provider_fetches_only_misses(tmpdir):
+    store = SqliteKeyValueStore(str(tmpdir.join('rpc.db')), compress=True)
+    node = RecordingBatchWeb3Provider(
+        MockBatchWeb3Provider(lambda file: read_resource('blocks_with_transactions', file)))
+    provider = CachingBatchProvider(node, store)
+
+    first_response = provider.make_request(json.dumps(list(generate_get_block_by_number_json_rpc([47218], True))))
+    response = provider.make_request(json.dumps(list(generate_get_block_by_number_json_rpc([47218, 47219], True))))
+    assert [request['params'][0] for request in node.requests] == ['0xb872', '0xb873']
+    assert response[0] == first_response[0]
+    assert [item['result']['number'] for item in response] == ['0xb872', '0xb873']
+    assert [item['id'] for item in response] == [0, 1]
+
+    # Record mode fetches everything again
+    provider = CachingBatchProvider(node, store, mode=RECORD_MODE)
+    provider.make_request(json.dumps(list(generate_get_block_by_number_json_rpc([47218], True))))
+    assert len(node.requests) == 3
+    store.close()
+
+
+def test_caching_provider_replay(tmpdir):
+    path = str(tmpdir.join('rpc.db'))
+
+    def export_blocks(batch_web3_provider, output_dir):
+        job = ExportBlocksJob(
+            start_block=47218, end_block=47219, batch_size=1,
+            batch_web3_provider=batch_web3_provider,
+            max_workers=2,
+            item_exporter=blocks_and_transactions_item_exporter(
+                output_dir.join('blocks.csv'), output_dir.join('transactions.csv')))
+        job.run()
+
+    store = SqliteKeyValueStore(path, compress=True)
+    node = MockBatchWeb3Provider(lambda file: read_resource('blocks_with_transactions', file))
+    export_blocks(CachingBatchProvider(node, store), tmpdir.mkdir('recorded'))
+    store.close()
+
+    store = SqliteKeyValueStore(path, compress=True)
+    export_blocks(CachingBatchProvider(FailingBatchWeb3Provider(), store, mode=REPLAY_MODE), tmpdir.mkdir('replayed'))
+    compare_lines_ignore_order(
+        read_resource('blocks_with_transactions', 'expected_blocks.csv'), read_file(tmpdir.join('replayed/blocks.csv')))
+    compare_lines_ignore_order(
+        read_resource('blocks_with_transactions', 'expected_transactions.csv'),
+        read_file(tmpdir.join('replayed/transactions.csv')))
+
+    provider = CachingBatchProvider(FailingBatchWeb3Provider(), store, mode=REPLAY_MODE)
+    with pytest.raises(ResponseNotCachedError):
+        provider.make_request(json.dumps(list(generate_get_block_by_number_json_rpc([47220], True))))
+    store.close()
+
+
+# Returns the given response to every batch
+class StaticBatchWeb3Provider(object):
+    def __init__(self, response):
+        self.response = response
+
+    def make_request(self, text):
+        return self.response
+
+
+def test_caching_provider_batch_error_keeps_hits(tmpdir):
+    store = SqliteKeyValueStore(str(tmpdir.join('rpc.db')), compress=True)
+    node = MockBatchWeb3Provider(lambda file: read_resource('blocks_with_transactions', file))
+    CachingBatchProvider(node, store).make_request(
+        json.dumps(list(generate_get_block_by_number_json_rpc([47218], True))))
+
+    batch_error = {'jsonrpc': '2.0', 'id': None, 'error': {'code': -32600, 'message': 'Batch too large'}}
+    provider = CachingBatchProvider(StaticBatchWeb3Provider(batch_error), store)
+    response = provider.make_request(json.dumps(list(generate_get_block_by_number_json_rpc([47218, 47219], True))))
+    assert response[0]['result']['number'] == '0xb872'
+    assert response[1] == {'jsonrpc': '2.0', 'id': 1, 'error': batch_error['error']}
+    store.close()
+
+
+@pytest.mark.parametrize('node_response', [
+    [],
+    [{'jsonrpc': '2.0', 'id': 5, 'result': {}}, {'jsonrpc': '2.0', 'id': 1, 'result': {}}],
+])
+def test_caching_provider_unmatched_responses(tmpdir, node_response):
+    store = SqliteKeyValueStore(str(tmpdir.join('rpc.db')), compress=True)
+    provider = CachingBatchProvider(StaticBatchWeb3Provider(node_response), store)
+    with pytest.raises(ValueError):
+        provider.make_request(json.dumps(list(generate_get_block_by_number_json_rpc([47218, 47219], True))))
+    store.close()
+
+
+def test_check_response_store_chain(tmpdir):
+    store = SqliteKeyValueStore(str(tmpdir.join('rpc.db')), compress=True)
+    mainnet = StaticBatchWeb3Provider([{'jsonrpc': '2.0', 'id': 0, 'result': '0x1'}])
+    check_response_store_chain(store, mainnet)
+    check_response_store_chain(store, mainnet)
+
+    with pytest.raises(ChainMismatchError):
+        check_response_store_chain(store, StaticBatchWeb3Provider([{'jsonrpc': '2.0', 'id': 0, 'result': '0xaa36a7'}]))
+    # The node is not called in replay mode
+    check_response_store_chain(store, FailingBatchWeb3Provider(), mode=REPLAY_MODE)
+    store.close()
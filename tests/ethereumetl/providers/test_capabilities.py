@@ -0,0 +1,63 @@
+# MIT License
+#
+# Copyright (c) 2018 Evgeny Medvedev, evge.medvedev@gmail.com
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+
+
+import json
+
+import pytest
+
+from ethereumetl.providers.capabilities import detect_block_receipts_method
+
+
+# Responds to the given methods with an empty list of receipts and to other methods with a JSON RPC error
+class MockBlockReceiptsProvider(object):
+    def __init__(self, supported_methods, raise_error=False):
+        self.supported_methods = supported_methods
+        self.raise_error = raise_error
+
+    def make_request(self, text):
+        if self.raise_error:
+            raise ValueError('Method not allowed')
+        response = []
+        for req in json.loads(text):
+            if req['method'] in self.supported_methods:
+                response.append({'jsonrpc': '2.0', 'id': req['id'], 'result': []})
+            else:
+                response.append({'jsonrpc': '2.0', 'id': req['id'],
+                                 'error': {'code': -32601, 'message': 'Method not found'}})
+        return response
+
+
+@pytest.mark.parametrize("supported_methods,expected_method", [
+    (['eth_getBlockReceipts', 'parity_getBlockReceipts'], 'eth_getBlockReceipts'),
+    (['parity_getBlockReceipts'], 'parity_getBlockReceipts'),
+    ([], None),
+])
+def test_detect_block_receipts_method(supported_methods, expected_method):
+    provider = MockBlockReceiptsProvider(supported_methods)
+    assert detect_block_receipts_method(provider) == expected_method
+
+
+def test_detect_block_receipts_method_request_error():
+    provider = MockBlockReceiptsProvider(['eth_getBlockReceipts'], raise_error=True)
+    assert detect_block_receipts_method(provider) is None
@@ -0,0 +1,67 @@
+# MIT License
+#
+# Copyright (c) 2018 Evgeny Medvedev, evge.medvedev@gmail.com
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+
+
+import pytest
+
+from ethereumetl.service.eth_contract_interfaces import ContractInterfaceRegistry, ERC20_INTERFACE, \
+    ERC721_INTERFACE, contract_interface_registry, get_function_sighash, parse_contract_interface
+
+ERC20_SIGHASHES = ['0x06fdde03', '0x095ea7b3', '0x18160ddd', '0x23b872dd', '0x313ce567', '0x70a08231',
+                   '0x95d89b41', '0xa9059cbb', '0xdd62ed3e']
+
+
+def test_get_function_sighash():
+    assert get_function_sighash('transfer(address,uint256)') == '0xa9059cbb'
+
+
+def test_erc20_interface():
+    assert ERC20_INTERFACE.is_implemented_by(ERC20_SIGHASHES)
+    assert not ERC20_INTERFACE.is_implemented_by([s for s in ERC20_SIGHASHES if s != '0xa9059cbb'])
+
+
+def test_erc721_interface_any_of_functions():
+    sighashes = [get_function_sighash(f) for f in [
+        'balanceOf(address)', 'ownerOf(uint256)', 'approve(address,uint256)', 'transferFrom(address,address,uint256)']]
+    assert ERC721_INTERFACE.is_implemented_by(sighashes)
+    assert not ERC721_INTERFACE.is_implemented_by(sighashes[:-1])
+
+
+def test_parse_contract_interface():
+    interface = parse_contract_interface('ownable: owner(); transferOwnership(address)')
+    assert interface.name == 'ownable'
+    assert interface.selectors == frozenset(['0x8da5cb5b', '0xf2fde38b'])
+
+    with pytest.raises(ValueError):
+        parse_contract_interface('owner()')
+
+
+def test_registry():
+    registry = ContractInterfaceRegistry()
+    registry.register(parse_contract_interface('ownable:owner()'))
+    assert registry.get_implemented_interfaces(['0x8da5cb5b']) == {'ownable': True}
+    assert contract_interface_registry.get_implemented_interfaces(ERC20_SIGHASHES, ['erc20', 'erc721']) == \
+        {'erc20': True, 'erc721': False}
+
+    with pytest.raises(ValueError):
+        registry.get('erc20')
@@ -23,7 +23,7 @@
 
 import pytest
 
-from ethereumetl.service.eth_contract_service import EthContractService
+from ethereumetl.service.eth_contract_service import EthContractService, bytecode_to_bytes, scan_function_sighashes
 
 
 @pytest.mark.parametrize("bytecode,expected_sighashes,is_erc20,is_erc721", [
@@ -66,3 +66,28 @@ def test_get_function_sighashes(bytecode, expected_sighashes, is_erc20, is_erc72
     assert expected_sighashes == sighashes
     assert eth_contract_service.is_erc20_contract(sighashes) == is_erc20
     assert eth_contract_service.is_erc721_contract(sighashes) == is_erc721
+
+
+@pytest.mark.parametrize("code,expected_sighashes", [
+    # PUSH4 0x06fdde03, PUSH4 0x095ea7b3
+    ('6306fdde0363095ea7b3', {'0x06fdde03', '0x095ea7b3'}),
+    # PUSH2 with JUMPDEST and PUSH4 opcodes in its immediate, PUSH4 0x06fdde03
+    ('615b636306fdde03', {'0x06fdde03'}),
+    # PUSH4 0x06fdde03, JUMPDEST, PUSH4 0x095ea7b3
+    ('6306fdde035b63095ea7b3', {'0x06fdde03'}),
+    # Truncated PUSH4 at the end of the code
+    ('6306fd', {'0x06fd'}),
+    ('5b6306fdde03', set()),
+    ('', set()),
+])
+def test_scan_function_sighashes(code, expected_sighashes):
+    assert scan_function_sighashes(bytes.fromhex(code)) == expected_sighashes
+
+
+@pytest.mark.parametrize("bytecode,expected_bytes", [
+    ('6060', b'\x60\x60'),
+    ('0x6060', b'\x60\x60'),
+    ('60z60', b'\x60\x60'),
+])
+def test_bytecode_to_bytes(bytecode, expected_bytes):
+    assert bytecode_to_bytes(bytecode) == expected_bytes
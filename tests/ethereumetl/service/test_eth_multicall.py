@@ -0,0 +1,65 @@
+# MIT License
+#
+# Copyright (c) 2018 Evgeny Medvedev, evge.medvedev@gmail.com
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+
+from ethereumetl.service.eth_multicall import decode_try_aggregate_result, encode_try_aggregate
+
+
+def test_encode_try_aggregate():
+    call_data = encode_try_aggregate([
+        ('0x86fa049857e0209aa7d9e616f7eb3b3b78ecfdb0', '0x06fdde03'),
+        ('0xf763be8b3263c268e9789abfb3934564a7b80054', '0x18160ddd')
+    ])
+    assert call_data == (
+        '0xbce38bd7'
+        '0000000000000000000000000000000000000000000000000000000000000000'
+        '0000000000000000000000000000000000000000000000000000000000000040'
+        '0000000000000000000000000000000000000000000000000000000000000002'
+        '0000000000000000000000000000000000000000000000000000000000000040'
+        '00000000000000000000000000000000000000000000000000000000000000c0'
+        '00000000000000000000000086fa049857e0209aa7d9e616f7eb3b3b78ecfdb0'
+        '0000000000000000000000000000000000000000000000000000000000000040'
+        '0000000000000000000000000000000000000000000000000000000000000004'
+        '06fdde0300000000000000000000000000000000000000000000000000000000'
+        '000000000000000000000000f763be8b3263c268e9789abfb3934564a7b80054'
+        '0000000000000000000000000000000000000000000000000000000000000040'
+        '0000000000000000000000000000000000000000000000000000000000000004'
+        '18160ddd00000000000000000000000000000000000000000000000000000000'
+    )
+
+
+def test_decode_try_aggregate_result():
+    result = bytes.fromhex(
+        '0000000000000000000000000000000000000000000000000000000000000020'
+        '0000000000000000000000000000000000000000000000000000000000000002'
+        '0000000000000000000000000000000000000000000000000000000000000040'
+        '00000000000000000000000000000000000000000000000000000000000000e0'
+        '0000000000000000000000000000000000000000000000000000000000000001'
+        '0000000000000000000000000000000000000000000000000000000000000040'
+        '0000000000000000000000000000000000000000000000000000000000000028'
+        '000102030405060708090a0b0c0d0e0f101112131415161718191a1b1c1d1e1f'
+        '2021222324252627000000000000000000000000000000000000000000000000'
+        '0000000000000000000000000000000000000000000000000000000000000000'
+        '0000000000000000000000000000000000000000000000000000000000000040'
+        '0000000000000000000000000000000000000000000000000000000000000000'
+    )
+    assert decode_try_aggregate_result(result) == [(True, bytes(range(40))), (False, b'')]
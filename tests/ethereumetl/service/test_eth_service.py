@@ -25,6 +25,7 @@ import pytest
 from dateutil.parser import parse
 from web3 import HTTPProvider, Web3
 
+from ethereumetl.providers.rpc import BatchHTTPProvider
 from ethereumetl.service.eth_service import EthService
 from ethereumetl.service.graph_operations import OutOfBoundsError
 from tests.helpers import skip_if_slow_tests_disabled
@@ -45,6 +46,16 @@ def test_get_block_range_for_date(date, expected_start_block, expected_end_block
     assert blocks == (expected_start_block, expected_end_block)
 
 
+@skip_if_slow_tests_disabled
+def test_get_block_ranges_for_dates():
+    eth_service = get_new_eth_service(batch=True)
+    dates = [parse(date) for date in ['2015-07-30', '2015-07-31', '2017-01-01', '2017-01-02', '2018-06-10']]
+    block_ranges = eth_service.get_block_ranges_for_dates(dates)
+    assert block_ranges == [
+        (0, 6911), (6912, 13774), (2912407, 2918517), (2918518, 2924575), (5761663, 5767303)
+    ]
+
+
 @skip_if_slow_tests_disabled
 @pytest.mark.parametrize("date", [
     '2015-07-29',
@@ -78,6 +89,7 @@ def test_get_block_range_for_timestamps_fail(start_timestamp, end_timestamp):
         eth_service.get_block_range_for_timestamps(start_timestamp, end_timestamp)
 
 
-def get_new_eth_service():
+def get_new_eth_service(batch=False):
     web3 = Web3(HTTPProvider('https://mainnet.infura.io'))
-    return EthService(web3)
+    batch_web3_provider = BatchHTTPProvider('https://mainnet.infura.io') if batch else None
+    return EthService(web3, batch_web3_provider=batch_web3_provider)
@@ -0,0 +1,42 @@
+# MIT License
+#
+# Copyright (c) 2018 Evgeny Medvedev, evge.medvedev@gmail.com
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+
+
+import pytest
+
+from ethereumetl.service.eth_token_service import decode_call_result
+
+
+@pytest.mark.parametrize("result,return_type,expected", [
+    ('0x0000000000000000000000000000000000000000000000000000000000000020'
+     '0000000000000000000000000000000000000000000000000000000000000003'
+     '4d4b520000000000000000000000000000000000000000000000000000000000', 'string', 'MKR'),
+    ('0x4d4b520000000000000000000000000000000000000000000000000000000000', 'string', 'MKR'),
+    ('0x0000000000000000000000000000000000000000000000000000000000000012', 'uint8', 18),
+    ('0x0000000000000000000000000000000000000000000000000000000000000112', 'uint8', None),
+    ('0x', 'uint256', None),
+    ('0x', 'string', None),
+    (None, 'string', None),
+])
+def test_decode_call_result(result, return_type, expected):
+    assert decode_call_result(result, return_type) == expected
@@ -0,0 +1,94 @@
+# MIT License
+#
+# Copyright (c) 2018 Evgeny Medvedev, evge.medvedev@gmail.com
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+
+
+import random
+from concurrent.futures import ThreadPoolExecutor
+
+from ethereumetl.service.graph_operations import GraphOperations, Point, SortedPointCache
+
+NUMBER_OF_POINTS = 100000
+
+
+class IrregularGraph(object):
+    """Graph with irregular y increments, similar to block timestamps"""
+
+    def __init__(self, seed=1):
+        rnd = random.Random(seed)
+        self.ys = [0]
+        for _ in range(NUMBER_OF_POINTS):
+            self.ys.append(self.ys[-1] + rnd.choice([1, 2, 5, 14, 15, 17, 30, 60]))
+        self.get_points_calls = 0
+
+    def get_first_point(self):
+        return self.get_point(1)
+
+    def get_last_point(self):
+        return self.get_point(NUMBER_OF_POINTS)
+
+    def get_point(self, x):
+        return Point(x, self.ys[x])
+
+    def get_points(self, xs):
+        self.get_points_calls += 1
+        return [self.get_point(x) for x in xs]
+
+
+def test_get_bounds_for_y_coordinates():
+    graph = IrregularGraph()
+    ys = list(range(graph.ys[1], graph.ys[-1], 3600)) + [graph.ys[5000], graph.ys[-1] + 1, 0]
+
+    bounds = GraphOperations(graph).get_bounds_for_y_coordinates(ys)
+
+    single_graph_operations = GraphOperations(IrregularGraph())
+    expected_bounds = [single_graph_operations.get_bounds_for_y_coordinate(y) for y in ys[:-2]] + [None, None]
+    assert bounds == expected_bounds
+    assert bounds[-3] == (5000, 5000)
+    # All y coordinates are resolved in a few rounds
+    assert graph.get_points_calls <= 8
+
+
+def test_sorted_point_cache():
+    cache = SortedPointCache(capacity=3)
+    for x in [5, 1, 3, 3]:
+        cache.add(Point(x, x * 10))
+    assert [point.x for point in cache.points()] == [1, 3, 5]
+    assert [point.x for point in cache.find_bounds(20)] == [1, 3]
+    assert [point.x for point in cache.find_bounds(30)] == [3, 3]
+    assert cache.find_bounds(60) is None
+
+    # The point added earliest is evicted
+    cache.add(Point(7, 70))
+    assert [point.x for point in cache.points()] == [1, 3, 7]
+
+
+def test_get_bounds_for_y_coordinate_concurrently():
+    graph = IrregularGraph()
+    graph_operations = GraphOperations(graph, cache_capacity=50)
+    ys = list(range(graph.ys[1], graph.ys[-1], 10000))
+
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        bounds = list(executor.map(graph_operations.get_bounds_for_y_coordinate, ys))
+
+    single_graph_operations = GraphOperations(IrregularGraph())
+    assert bounds == [single_graph_operations.get_bounds_for_y_coordinate(y) for y in ys]
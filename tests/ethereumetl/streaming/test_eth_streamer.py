@@ -0,0 +1,94 @@
+# MIT License
+#
+# Copyright (c) 2018 Evgeny Medvedev, evge.medvedev@gmail.com
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+
+
+import os
+
+from web3 import Web3
+
+import tests.resources
+from ethereumetl.jobs.exporters.stream_item_exporter import stream_item_exporter
+from ethereumetl.streaming.eth_streamer import EthStreamer, read_last_synced_block
+from ethereumetl.thread_local_proxy import ThreadLocalProxy
+from tests.ethereumetl.job.helpers import get_web3_provider
+from tests.helpers import compare_lines_ignore_order, read_file
+
+RESOURCE_GROUP = 'test_stream'
+
+
+def read_resource(resource_group, file_name):
+    return tests.resources.read_resource([RESOURCE_GROUP, resource_group], file_name)
+
+
+def create_streamer(tmpdir, resource_group, start_block=None, end_block=None, lag=5):
+    item_exporter = stream_item_exporter(
+        blocks_output=str(tmpdir.join('blocks.csv')),
+        transactions_output=str(tmpdir.join('transactions.csv')),
+        receipts_output=str(tmpdir.join('receipts.csv')),
+        logs_output=str(tmpdir.join('logs.csv')),
+        token_transfers_output=str(tmpdir.join('token_transfers.csv')))
+    return EthStreamer(
+        web3=Web3(get_web3_provider('mock', lambda file: read_resource(resource_group, file))),
+        batch_web3_provider=ThreadLocalProxy(
+            lambda: get_web3_provider('mock', lambda file: read_resource(resource_group, file), batch=True)),
+        item_exporter=item_exporter,
+        last_synced_block_file=str(tmpdir.join('last_synced_block.txt')),
+        lag=lag,
+        start_block=start_block,
+        end_block=end_block,
+        period_seconds=0,
+        batch_size=2)
+
+
+def test_stream(tmpdir):
+    resource_group = 'block_with_logs'
+    streamer = create_streamer(tmpdir, resource_group, start_block=483920, end_block=483920)
+    streamer.stream()
+
+    assert read_last_synced_block(str(tmpdir.join('last_synced_block.txt'))) == 483920
+    for entity in ['blocks', 'transactions', 'receipts', 'logs']:
+        compare_lines_ignore_order(
+            read_resource(resource_group, 'expected_{}.csv'.format(entity)),
+            read_file(tmpdir.join('{}.csv'.format(entity)))
+        )
+    # Transfers are extracted from the logs of 2 transactions calling transfer(address,uint256)
+    token_transfers = read_file(tmpdir.join('token_transfers.csv')).splitlines()
+    assert len(token_transfers) == 3
+    assert all(line.startswith('0xf4eced2f682ce333f96f2d8966c613ded8fc95dd') for line in token_transfers[1:])
+
+
+def test_stream_continues_from_last_synced_block(tmpdir):
+    resource_group = 'block_with_logs'
+    with open(str(tmpdir.join('last_synced_block.txt')), 'w') as last_synced_block_file:
+        last_synced_block_file.write('483919')
+    blocks_file = str(tmpdir.join('blocks.csv'))
+    # Items are appended to the existing files without repeating the header
+    with open(blocks_file, 'w') as blocks:
+        blocks.write(read_resource(resource_group, 'expected_blocks.csv').splitlines()[0] + '\n')
+
+    streamer = create_streamer(tmpdir, resource_group, end_block=483920)
+    streamer.stream()
+
+    assert read_last_synced_block(str(tmpdir.join('last_synced_block.txt'))) == 483920
+    compare_lines_ignore_order(read_resource(resource_group, 'expected_blocks.csv'), read_file(blocks_file))
+    assert os.path.isfile(str(tmpdir.join('transactions.csv')))
@@ -0,0 +1,192 @@
+# MIT License
+#
+# Copyright (c) 2018 Evgeny Medvedev, evge.medvedev@gmail.com
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+
+
+import json
+
+import pytest
+from web3 import Web3
+
+from ethereumetl.jobs.exporters.stream_item_exporter import stream_item_exporter
+from ethereumetl.streaming.eth_streamer import EthStreamer
+from ethereumetl.streaming.reorg_handler import BlockHashWindow, ReorgHandler, ReorgTooDeepError
+from ethereumetl.thread_local_proxy import ThreadLocalProxy
+from tests.ethereumetl.job.helpers import get_web3_provider
+from tests.helpers import read_file
+
+
+def block_hash(fork, block_number):
+    return '0x{}{:063x}'.format(fork, block_number)
+
+
+# Blocks from start_block to end_block, the blocks after fork_block are on the given fork
+def build_chain(start_block, end_block, fork_block=None, fork='b'):
+    chain = {}
+    for block_number in range(start_block, end_block + 1):
+        block_fork = fork if fork_block is not None and block_number > fork_block else 'a'
+        parent_fork = fork if fork_block is not None and block_number - 1 > fork_block else 'a'
+        chain[block_number] = {
+            'number': hex(block_number),
+            'hash': block_hash(block_fork, block_number),
+            'parentHash': block_hash(parent_fork, block_number - 1),
+            'transactions': []
+        }
+    return chain
+
+
+class MockChain(object):
+    def __init__(self, chain):
+        self.chain = chain
+
+    def read_resource(self, file_name):
+        block_number = int(file_name.split('.')[2])
+        return json.dumps({'jsonrpc': '2.0', 'id': 0, 'result': self.chain[block_number]})
+
+
+def block_items(chain, block_numbers):
+    return [{
+        'number': block_number,
+        'hash': chain[block_number]['hash'],
+        'parent_hash': chain[block_number]['parentHash']
+    } for block_number in block_numbers]
+
+
+def test_block_hash_window():
+    window = BlockHashWindow(3)
+    for block_number in range(10, 15):
+        window.add(block_number, block_hash('a', block_number))
+
+    assert window.block_numbers() == [12, 13, 14]
+    assert window.get(11) is None
+    assert window.remove_after(12) == [(13, block_hash('a', 13)), (14, block_hash('a', 14))]
+    assert window.block_numbers() == [12]
+    with pytest.raises(ValueError):
+        window.add(12, block_hash('b', 12))
+
+
+def test_reorg_handler():
+    mock_chain = MockChain(build_chain(100, 105))
+    reorg_handler = ReorgHandler(get_web3_provider('mock', mock_chain.read_resource, batch=True), window_size=10)
+    reorg_handler.add_blocks(block_items(mock_chain.chain, range(100, 104)))
+    assert reorg_handler.find_common_ancestor(block_items(mock_chain.chain, range(104, 106))) is None
+
+    mock_chain.chain = build_chain(100, 105, fork_block=101)
+    assert reorg_handler.find_common_ancestor(block_items(mock_chain.chain, range(104, 106))) == 101
+    assert reorg_handler.rollback(101) == [
+        {'type': 'retracted_block', 'block_number': 102, 'block_hash': block_hash('a', 102)},
+        {'type': 'retracted_block', 'block_number': 103, 'block_hash': block_hash('a', 103)},
+    ]
+    assert reorg_handler.find_common_ancestor(block_items(mock_chain.chain, range(102, 106))) is None
+
+
+def test_reorg_handler_raises_when_reorg_is_deeper_than_window():
+    mock_chain = MockChain(build_chain(100, 105))
+    reorg_handler = ReorgHandler(get_web3_provider('mock', mock_chain.read_resource, batch=True), window_size=2)
+    reorg_handler.add_blocks(block_items(mock_chain.chain, range(100, 104)))
+
+    mock_chain.chain = build_chain(100, 105, fork_block=100)
+    with pytest.raises(ReorgTooDeepError):
+        reorg_handler.find_common_ancestor(block_items(mock_chain.chain, [104]))
+
+
+# The chain head moves on every eth_blockNumber request, block 102 is replaced when the head reaches 104
+class MockReorgingChain(MockChain):
+    def __init__(self, heads):
+        super(MockReorgingChain, self).__init__(build_chain(100, 102))
+        self.heads = heads
+
+    def read_resource(self, file_name):
+        if file_name == 'eth_blockNumber.json':
+            head = self.heads.pop(0) if len(self.heads) > 1 else self.heads[0]
+            self.chain = build_chain(100, head, fork_block=101 if head >= 104 else None)
+            return json.dumps({'jsonrpc': '2.0', 'id': 0, 'result': hex(head)})
+        return super(MockReorgingChain, self).read_resource(file_name)
+
+
+def test_stream_retracts_reorganised_blocks(tmpdir):
+    mock_chain = MockReorgingChain(heads=[99, 102, 104])
+    streamer = EthStreamer(
+        web3=Web3(get_web3_provider('mock', mock_chain.read_resource)),
+        batch_web3_provider=ThreadLocalProxy(lambda: get_web3_provider('mock', mock_chain.read_resource, batch=True)),
+        item_exporter=stream_item_exporter(
+            blocks_output=str(tmpdir.join('blocks.csv')),
+            retracted_blocks_output=str(tmpdir.join('retracted_blocks.csv'))),
+        last_synced_block_file=str(tmpdir.join('last_synced_block.txt')),
+        start_block=100,
+        end_block=104,
+        period_seconds=0,
+        item_types=['block', 'retracted_block'])
+    streamer.stream()
+
+    blocks = [line.split(',')[:3] for line in read_file(tmpdir.join('blocks.csv')).splitlines()[1:]]
+    assert [(int(row[0]), row[1], row[2]) for row in blocks] == [
+        (100, block_hash('a', 100), block_hash('a', 99)),
+        (101, block_hash('a', 101), block_hash('a', 100)),
+        (102, block_hash('a', 102), block_hash('a', 101)),
+        (102, block_hash('b', 102), block_hash('a', 101)),
+        (103, block_hash('b', 103), block_hash('b', 102)),
+        (104, block_hash('b', 104), block_hash('b', 103)),
+    ]
+    assert read_file(tmpdir.join('retracted_blocks.csv')).splitlines() == [
+        'block_number,block_hash',
+        '102,{}'.format(block_hash('a', 102)),
+    ]
+
+
+def test_reorg_handler_save_and_load(tmpdir):
+    mock_chain = MockChain(build_chain(100, 105))
+    block_hashes_file = str(tmpdir.join('last_synced_block.txt.block_hashes'))
+    reorg_handler = ReorgHandler(get_web3_provider('mock', mock_chain.read_resource, batch=True), window_size=10)
+    reorg_handler.add_blocks(block_items(mock_chain.chain, range(100, 104)))
+    reorg_handler.save(block_hashes_file)
+
+    # Block 103 is after the checkpoint, so it's exported again
+    restored_reorg_handler = ReorgHandler(
+        get_web3_provider('mock', mock_chain.read_resource, batch=True), window_size=2)
+    restored_reorg_handler.load(block_hashes_file, last_synced_block=102)
+    assert restored_reorg_handler.window.block_numbers() == [101, 102]
+    assert restored_reorg_handler.find_common_ancestor(block_items(mock_chain.chain, [103])) is None
+
+
+def test_stream_retracts_blocks_reorganised_during_restart(tmpdir):
+    def stream(mock_chain, start_block, end_block):
+        EthStreamer(
+            web3=Web3(get_web3_provider('mock', mock_chain.read_resource)),
+            batch_web3_provider=ThreadLocalProxy(
+                lambda: get_web3_provider('mock', mock_chain.read_resource, batch=True)),
+            item_exporter=stream_item_exporter(
+                blocks_output=str(tmpdir.join('blocks.csv')),
+                retracted_blocks_output=str(tmpdir.join('retracted_blocks.csv'))),
+            last_synced_block_file=str(tmpdir.join('last_synced_block.txt')),
+            start_block=start_block,
+            end_block=end_block,
+            period_seconds=0,
+            item_types=['block', 'retracted_block']).stream()
+
+    stream(MockReorgingChain(heads=[102]), start_block=100, end_block=102)
+    # Block 102 is replaced while the streamer is stopped
+    stream(MockReorgingChain(heads=[104]), start_block=None, end_block=104)
+
+    assert read_file(tmpdir.join('retracted_blocks.csv')).splitlines()[-1] == '102,{}'.format(block_hash('a', 102))
+    blocks = [line.split(',')[:2] for line in read_file(tmpdir.join('blocks.csv')).splitlines() if line[0].isdigit()]
+    assert blocks[-3:] == [[str(block_number), block_hash('b', block_number)] for block_number in range(102, 105)]
@@ -0,0 +1,78 @@
+# MIT License
+#
+# Copyright (c) 2018 Evgeny Medvedev, evge.medvedev@gmail.com
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+
+
+import csv
+import json
+
+import pytest
+
+from ethereumetl.chunked_reader import ChunkedItemReader
+
+LOGS = [
+    {'log_index': '0', 'transaction_hash': '0x01', 'data': '0x', 'topics': 'a,b'},
+    {'log_index': '1', 'transaction_hash': '0x02', 'data': 'multi\nline "quoted"', 'topics': ''},
+    {'log_index': '2', 'transaction_hash': '0x03', 'data': '"', 'topics': 'c'},
+] * 20
+
+
+def write_csv(path):
+    with open(path, 'w', newline='') as csv_file:
+        writer = csv.DictWriter(csv_file, fieldnames=list(LOGS[0].keys()), lineterminator='\r\n')
+        writer.writeheader()
+        writer.writerows(LOGS)
+
+
+def count_logs(logs):
+    return [len(logs)]
+
+
+@pytest.mark.parametrize('max_workers, chunk_size', [
+    (None, 1024 * 1024),
+    (None, 1),
+    (None, 70),
+    (2, 90),
+])
+def test_chunked_item_reader_csv(tmpdir, max_workers, chunk_size):
+    input_path = str(tmpdir.join('logs.csv'))
+    write_csv(input_path)
+
+    reader = ChunkedItemReader(input_path, max_workers=max_workers, chunk_size=chunk_size)
+    assert list(reader) == LOGS
+    assert sum(sum(batch) for batch in reader.read_batches(count_logs)) == len(LOGS)
+
+
+@pytest.mark.parametrize('max_workers, chunk_size', [
+    (None, 1024 * 1024),
+    (None, 1),
+    (2, 200),
+])
+def test_chunked_item_reader_json(tmpdir, max_workers, chunk_size):
+    input_path = str(tmpdir.join('logs.json'))
+    with open(input_path, 'w') as input_file:
+        for log in LOGS:
+            input_file.write(json.dumps(log) + '\n')
+
+    reader = ChunkedItemReader(input_path, max_workers=max_workers, chunk_size=chunk_size)
+    assert list(reader) == LOGS
+    assert sum(sum(batch) for batch in reader.read_batches(count_logs)) == len(LOGS)
@@ -0,0 +1,98 @@
+# MIT License
+#
+# Copyright (c) 2018 Evgeny Medvedev, evge.medvedev@gmail.com
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+
+
+import csv
+import json
+
+import pytest
+
+from ethereumetl.column_extractor import extract_csv_column, extract_json_field, get_json_field
+
+CSV_ROWS = [
+    ['0x01', '0x', '100'],
+    ['0x02', 'multi\nline, "quoted"\nvalue', '101'],
+    ['0x03', '0xa9059cbb', '102'],
+    ['0x04', '"', '103'],
+    ['0x05', 'a\n\nb', '104'],
+] * 20
+
+JSON_ITEMS = [
+    {'type': 'transaction', 'hash': '0x01', 'input': '0x', 'block_number': 100},
+    {'type': 'transaction', 'hash': '0x02', 'input': 'nested "hash": "0x00"'},
+    {'input': {'hash': '0x00'}, 'hash': '0x03'},
+    {'hash': '0x04', 'other_hash': 'hash'},
+] * 20
+
+
+def write_csv(path, line_terminator):
+    with open(path, 'w', newline='') as csv_file:
+        writer = csv.writer(csv_file, lineterminator=line_terminator)
+        writer.writerow(['hash', 'input', 'block_number'])
+        writer.writerows(CSV_ROWS)
+
+
+@pytest.mark.parametrize('column', ['hash', 'input', 'block_number'])
+@pytest.mark.parametrize('line_terminator', ['\n', '\r\n'])
+@pytest.mark.parametrize('max_workers, chunk_size', [
+    (None, 1024 * 1024),
+    (None, 1),
+    (None, 37),
+    (2, 50),
+])
+def test_extract_csv_column(tmpdir, column, line_terminator, max_workers, chunk_size):
+    input_path = str(tmpdir.join('input.csv'))
+    output_path = str(tmpdir.join('output.txt'))
+    write_csv(input_path, line_terminator)
+
+    extract_csv_column(input_path, output_path, column, max_workers=max_workers, chunk_size=chunk_size)
+
+    with open(input_path) as input_file:
+        expected = ''.join(row[column] + '\n' for row in csv.DictReader(input_file))
+    with open(output_path) as output_file:
+        assert output_file.read() == expected
+
+
+@pytest.mark.parametrize('max_workers, chunk_size', [
+    (None, 1024 * 1024),
+    (None, 1),
+    (2, 100),
+])
+def test_extract_json_field(tmpdir, max_workers, chunk_size):
+    input_path = str(tmpdir.join('input.json'))
+    output_path = str(tmpdir.join('output.txt'))
+    with open(input_path, 'w') as input_file:
+        for item in JSON_ITEMS:
+            input_file.write(json.dumps(item) + '\n')
+
+    extract_json_field(input_path, output_path, 'hash', max_workers=max_workers, chunk_size=chunk_size)
+
+    with open(output_path) as output_file:
+        assert output_file.read() == ''.join(item['hash'] + '\n' for item in JSON_ITEMS)
+
+
+def test_get_json_field():
+    assert get_json_field('{"a": 1, "b" :  "x"}\n', 'b') == 'x'
+    assert get_json_field('{"a": {"b": 1}, "b": 2}', 'b') == 2
+    with pytest.raises(KeyError):
+        get_json_field('{"a": {"b": 1}}', 'b')
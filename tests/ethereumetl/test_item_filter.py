@@ -0,0 +1,119 @@
+# MIT License
+#
+# Copyright (c) 2018 Evgeny Medvedev, evge.medvedev@gmail.com
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+
+
+import csv
+import io
+import json
+import os
+import threading
+
+import pytest
+
+from ethereumetl.item_filter import filter_items
+from ethereumetl.predicate import PredicateError
+
+CONTRACTS = [
+    {'address': '0x01', 'bytecode': '0x60', 'is_erc20': True, 'is_erc721': False, 'block_number': 1},
+    {'address': '0x02', 'bytecode': 'multi\nline, "quoted"', 'is_erc20': False, 'is_erc721': False,
+     'block_number': 2},
+    {'address': '0x03', 'bytecode': '', 'is_erc20': False, 'is_erc721': True, 'block_number': 3},
+    {'address': '0x04', 'bytecode': '"', 'is_erc20': True, 'is_erc721': False, 'block_number': 4},
+] * 10
+
+PREDICATE = "is_erc20 or item['is_erc721'] and block_number > 2"
+
+
+def write_csv(path):
+    with open(path, 'w', newline='') as csv_file:
+        writer = csv.DictWriter(csv_file, fieldnames=list(CONTRACTS[0].keys()), lineterminator='\n')
+        writer.writeheader()
+        writer.writerows(CONTRACTS)
+
+
+@pytest.mark.parametrize('max_workers, chunk_size', [
+    (None, 1024 * 1024),
+    (None, 1),
+    (None, 45),
+    (2, 60),
+])
+def test_filter_items_csv(tmpdir, max_workers, chunk_size):
+    input_path = str(tmpdir.join('contracts.csv'))
+    output_path = str(tmpdir.join('filtered.csv'))
+    write_csv(input_path)
+
+    filter_items(input_path, output_path, PREDICATE, max_workers=max_workers, chunk_size=chunk_size)
+
+    expected = io.StringIO()
+    writer = csv.DictWriter(expected, fieldnames=list(CONTRACTS[0].keys()), lineterminator='\n')
+    writer.writeheader()
+    writer.writerows(contract for contract in CONTRACTS if contract['address'] in ('0x01', '0x03', '0x04'))
+    with open(output_path, newline='') as output_file:
+        assert output_file.read() == expected.getvalue()
+
+
+@pytest.mark.parametrize('max_workers, chunk_size', [
+    (None, 1024 * 1024),
+    (None, 1),
+    (2, 100),
+])
+def test_filter_items_json(tmpdir, max_workers, chunk_size):
+    input_path = str(tmpdir.join('contracts.json'))
+    output_path = str(tmpdir.join('filtered.json'))
+    with open(input_path, 'w') as input_file:
+        for contract in CONTRACTS:
+            input_file.write(json.dumps(contract) + '\n')
+
+    filter_items(input_path, output_path, PREDICATE, max_workers=max_workers, chunk_size=chunk_size)
+
+    with open(output_path) as output_file:
+        assert [json.loads(line)['address'] for line in output_file] == ['0x01', '0x03', '0x04'] * 10
+
+
+def test_filter_items_csv_from_pipe(tmpdir):
+    csv_path = str(tmpdir.join('contracts.csv'))
+    input_path = str(tmpdir.join('contracts.pipe'))
+    output_path = str(tmpdir.join('filtered.csv'))
+    write_csv(csv_path)
+    os.mkfifo(input_path)
+
+    def write_pipe():
+        with open(csv_path) as csv_file, open(input_path, 'w') as pipe:
+            pipe.write(csv_file.read())
+    writer = threading.Thread(target=write_pipe)
+    writer.start()
+    filter_items(input_path, output_path, PREDICATE, item_format='csv', max_workers=2)
+    writer.join()
+
+    with open(output_path, newline='') as output_file:
+        rows = list(csv.DictReader(output_file))
+    assert [row['address'] for row in rows] == ['0x01', '0x03', '0x04'] * 10
+    assert rows[1]['bytecode'] == ''
+
+
+def test_filter_items_csv_unknown_column(tmpdir):
+    input_path = str(tmpdir.join('contracts.csv'))
+    write_csv(input_path)
+
+    with pytest.raises(PredicateError):
+        filter_items(input_path, str(tmpdir.join('filtered.csv')), 'is_erc1155')
@@ -0,0 +1,153 @@
+# MIT License
+#
+# Copyright (c) 2018 Evgeny Medvedev, evge.medvedev@gmail.com
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+
+
+import json
+from urllib.request import urlopen
+
+import pytest
+
+prometheus_client = pytest.importorskip('prometheus_client')
+
+from ethereumetl.jobs.exporters.composite_item_exporter import CompositeItemExporter
+from ethereumetl.metrics import MetricsRegistry, MetricsTextfileWriter, registry, start_http_server
+from ethereumetl.providers.request_metrics import track_batch_request
+
+
+def test_metrics_text_format():
+    metrics_registry = MetricsRegistry()
+    requests = metrics_registry.counter('requests_total', 'Requests.', ['method'])
+    requests.labels('eth_call').inc()
+    requests.labels('eth_call').inc(2)
+    requests.labels('say "hi"').inc()
+    metrics_registry.gauge('in_progress', 'In progress.\nSecond line').labels().set(1.5)
+    duration = metrics_registry.histogram('duration_seconds', 'Duration.', buckets=(0.1, 1.0)).labels()
+    for value in [0.05, 0.5, 0.5, 5]:
+        duration.observe(value)
+
+    lines = metrics_registry.generate_text().splitlines()
+    for line in [
+        '# HELP duration_seconds Duration.',
+        '# TYPE duration_seconds histogram',
+        'duration_seconds_bucket{le="0.1"} 1.0',
+        'duration_seconds_bucket{le="1.0"} 3.0',
+        'duration_seconds_bucket{le="+Inf"} 4.0',
+        'duration_seconds_count 4.0',
+        'duration_seconds_sum 6.05',
+        '# HELP in_progress In progress.\\nSecond line',
+        '# TYPE in_progress gauge',
+        'in_progress 1.5',
+        '# HELP requests_total Requests.',
+        '# TYPE requests_total counter',
+        'requests_total{method="eth_call"} 3.0',
+        'requests_total{method="say \\"hi\\""} 1.0',
+    ]:
+        assert line in lines
+    assert metrics_registry.get_sample_value('requests_total', {'method': 'eth_call'}) == 3
+
+
+def test_metrics_registry_returns_registered_metric():
+    metrics_registry = MetricsRegistry()
+    counter = metrics_registry.counter('requests_total', 'Requests.', ['method'])
+    assert metrics_registry.counter('requests_total', 'Requests.', ['method']) is counter
+    with pytest.raises(ValueError):
+        metrics_registry.gauge('requests_total', 'Requests.', ['method'])
+    with pytest.raises(ValueError):
+        counter.labels()
+
+
+def test_gauge_function():
+    metrics_registry = MetricsRegistry()
+    queue = []
+    metrics_registry.gauge('queue_size', 'Queue size.').labels().set_function(lambda: len(queue))
+    queue.extend([1, 2])
+    assert 'queue_size 2.0' in metrics_registry.generate_text().splitlines()
+
+
+def test_metrics_http_server():
+    metrics_registry = MetricsRegistry()
+    metrics_registry.counter('requests_total', 'Requests.').labels().inc()
+    server = start_http_server(0, addr='127.0.0.1', metrics_registry=metrics_registry)
+    try:
+        with urlopen('http://127.0.0.1:{}/metrics'.format(server.server_address[1])) as response:
+            assert response.headers['Content-Type'].startswith('text/plain; version=0.0.4')
+            assert 'requests_total 1.0' in response.read().decode('utf-8').splitlines()
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+def test_metrics_textfile_writer(tmpdir):
+    metrics_registry = MetricsRegistry()
+    requests = metrics_registry.counter('requests_total', 'Requests.').labels()
+    writer = MetricsTextfileWriter(str(tmpdir.join('ethereumetl.prom')), period_seconds=60,
+                                   metrics_registry=metrics_registry)
+    writer.start()
+    requests.inc()
+    writer.close()
+    assert 'requests_total 1.0' in tmpdir.join('ethereumetl.prom').read().splitlines()
+    assert tmpdir.listdir() == [tmpdir.join('ethereumetl.prom')]
+
+
+class MockBatchProvider(object):
+    @track_batch_request
+    def make_request(self, text):
+        return [{'jsonrpc': '2.0', 'id': req['id'], 'error': {'code': -32000, 'message': 'error'}}
+                if req['params'][0] == '0x0' else {'jsonrpc': '2.0', 'id': req['id'], 'result': '0x'}
+                for req in json.loads(text)]
+
+
+def get_sample_value(name, labels):
+    return registry.get_sample_value(name, labels) or 0
+
+
+def test_track_batch_request():
+    labels = {'method': 'eth_getCode'}
+    requests_before = get_sample_value('ethereumetl_rpc_requests_total', labels)
+    errors_before = get_sample_value('ethereumetl_rpc_errors_total', labels)
+    count_before = get_sample_value('ethereumetl_rpc_request_duration_seconds_count', labels)
+
+    batch = [{'jsonrpc': '2.0', 'method': 'eth_getCode', 'params': [hex(index)], 'id': index} for index in range(3)]
+    MockBatchProvider().make_request(json.dumps(batch))
+
+    assert get_sample_value('ethereumetl_rpc_requests_total', labels) - requests_before == 3
+    assert get_sample_value('ethereumetl_rpc_errors_total', labels) - errors_before == 1
+    assert get_sample_value('ethereumetl_rpc_request_duration_seconds_count', labels) - count_before == 1
+
+
+def test_composite_item_exporter_metrics(tmpdir):
+    labels = {'item_type': 'metrics_test'}
+    items_before = get_sample_value('ethereumetl_exporter_items_total', labels)
+    bytes_before = get_sample_value('ethereumetl_exporter_bytes_total', labels)
+
+    output_file = tmpdir.join('items.csv')
+    exporter = CompositeItemExporter(
+        filename_mapping={'metrics_test': str(output_file)}, field_mapping={'metrics_test': ['value']})
+    exporter.open()
+    for value in range(3):
+        exporter.export_item({'type': 'metrics_test', 'value': value})
+    exporter.close()
+
+    assert get_sample_value('ethereumetl_exporter_items_total', labels) - items_before == 3
+    assert get_sample_value('ethereumetl_exporter_bytes_total', labels) - bytes_before == \
+        len(output_file.read_binary())
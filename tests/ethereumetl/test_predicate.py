@@ -0,0 +1,71 @@
+# MIT License
+#
+# Copyright (c) 2018 Evgeny Medvedev, evge.medvedev@gmail.com
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+
+
+import pytest
+
+from ethereumetl.predicate import PredicateError, compile_predicate
+
+ITEM = {
+    'type': 'token_transfer',
+    'token_address': '0xA0B86991C6218B36C1D19D4A2E9EB0CE3606EB48',
+    'value': 1000,
+    'block_number': 5000000,
+    'is_erc20': True,
+    'is_erc721': False,
+    'input': '0x1a',
+    'function_sighashes': ['0xa9059cbb'],
+}
+
+
+@pytest.mark.parametrize('predicate, expected', [
+    ("item['is_erc20'] or item['is_erc721']", True),
+    ('is_erc20 and is_erc721', False),
+    ('not is_erc721', True),
+    ('value > 100 and block_number <= 5000000', True),
+    ('4999999 < block_number < 5000000', False),
+    ("address(token_address) in {'0xa0b86991c6218b36c1d19d4a2e9eb0ce3606eb48', '0x01'}", True),
+    ("type not in ['token_transfer']", False),
+    ("hex_to_int(input) == 26", True),
+    ("'0xa9059cbb' in function_sighashes", True),
+    ("len(function_sighashes) == 1", True),
+    ('missing_field == None', True),
+    ('missing_field > 0', False),
+    ('value != -1', True),
+])
+def test_compile_predicate(predicate, expected):
+    assert compile_predicate(predicate)(ITEM) is expected
+
+
+@pytest.mark.parametrize('predicate', [
+    '__import__("os").system("ls")',
+    'item.value',
+    'value + 1 > 0',
+    'item[0]',
+    '{value}',
+    'lambda: True',
+    'value >',
+])
+def test_compile_predicate_rejects_code(predicate):
+    with pytest.raises(PredicateError):
+        compile_predicate(predicate)
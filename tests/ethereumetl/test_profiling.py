@@ -0,0 +1,101 @@
+# MIT License
+#
+# Copyright (c) 2018 Evgeny Medvedev, evge.medvedev@gmail.com
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+
+
+import json
+import pstats
+import time
+
+import pytest
+
+import tests.resources
+from ethereumetl.jobs.export_blocks_job import ExportBlocksJob
+from ethereumetl.jobs.exporters.blocks_and_transactions_item_exporter import blocks_and_transactions_item_exporter
+from ethereumetl.profiling import StageProfiler, profiler
+from ethereumetl.thread_local_proxy import ThreadLocalProxy
+from tests.ethereumetl.job.helpers import get_web3_provider
+
+
+@pytest.fixture
+def global_profiler():
+    yield profiler
+    profiler.configure(enabled=False)
+
+
+def test_nested_stages_exclude_nested_time():
+    stage_profiler = StageProfiler()
+    stage_profiler.configure()
+    with stage_profiler.stage('batch'):
+        time.sleep(0.01)
+        for _ in range(2):
+            with stage_profiler.stage('network'):
+                time.sleep(0.02)
+
+    breakdown = stage_profiler.report('job')
+    stages = {stage['stage']: stage for stage in breakdown['stages']}
+    assert stages['network']['calls'] == 2
+    assert 0.04 <= stages['network']['seconds'] < 0.06
+    assert 0.01 <= stages['batch']['seconds'] < 0.02
+    assert breakdown['stages'][0]['stage'] == 'network'
+
+
+def test_sampling_skips_nested_stages():
+    stage_profiler = StageProfiler()
+    stage_profiler.configure(sample_rate=0.000001)
+    for _ in range(10):
+        with stage_profiler.stage('batch'):
+            with stage_profiler.stage('network'):
+                pass
+    assert stage_profiler.report('job')['stages'] == []
+
+
+def test_disabled_profiler():
+    stage_profiler = StageProfiler()
+    with stage_profiler.stage('batch'), stage_profiler.job_stage('export'):
+        pass
+    assert stage_profiler.report('job') is None
+
+
+def test_job_profiling_report(tmpdir, global_profiler):
+    report_file = str(tmpdir.join('profile.json'))
+    cprofile_file = str(tmpdir.join('profile.pstats'))
+    global_profiler.configure(output_format='json', output_file=report_file, cprofile_output=cprofile_file)
+
+    def read_resource(file_name):
+        return tests.resources.read_resource(['test_export_blocks_job', 'block_without_transactions'], file_name)
+
+    job = ExportBlocksJob(
+        start_block=0, end_block=0, batch_size=1,
+        batch_web3_provider=ThreadLocalProxy(lambda: get_web3_provider('mock', read_resource, batch=True)),
+        max_workers=1,
+        item_exporter=blocks_and_transactions_item_exporter(str(tmpdir.join('blocks.csv')), None),
+        export_transactions=False)
+    job.run()
+
+    breakdown = json.loads(open(report_file).read())
+    assert breakdown['job'] == 'ExportBlocksJob'
+    assert [stage['stage'] for stage in breakdown['job_stages']] == ['start', 'export', 'end']
+    assert {stage['stage'] for stage in breakdown['stages']} == \
+        {'batch', 'request_building', 'mapping', 'serialization', 'write'}
+    assert abs(sum(stage['percentage'] for stage in breakdown['stages']) - 100) < 0.1
+    assert pstats.Stats(cprofile_file).total_calls > 0
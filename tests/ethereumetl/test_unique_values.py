@@ -0,0 +1,77 @@
+# MIT License
+#
+# Copyright (c) 2018 Evgeny Medvedev, evge.medvedev@gmail.com
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+
+
+import io
+
+import pytest
+
+from ethereumetl.csv_utils import read_csv_column
+from ethereumetl.unique_values import UniqueValuesWriter, key_to_value, value_to_key
+
+ADDRESS_1 = '0x' + '1' * 40
+ADDRESS_2 = '0x' + 'a' * 40
+HASH_1 = '0x' + 'b' * 64
+
+
+@pytest.mark.parametrize('value', [ADDRESS_1, HASH_1, '123', '', '0x' + 'A' * 40, 'contract, "quoted"'])
+def test_value_to_key_round_trip(value):
+    assert key_to_value(value_to_key(value)) == value
+
+
+def test_value_to_key_stores_addresses_and_hashes_as_binary():
+    assert len(value_to_key(ADDRESS_1)) == 21
+    assert len(value_to_key(HASH_1)) == 33
+
+
+def test_read_csv_column():
+    input_file = io.StringIO(
+        'hash,input,block_number\n'
+        '0x01,0x,100\n'
+        '\n'
+        '0x02,"multi\nline, ""quoted""",101\n'
+        '0x03,0x,102\r\n'
+    )
+    assert list(read_csv_column(input_file, 'block_number')) == ['100', '101', '102']
+
+    input_file.seek(0)
+    assert list(read_csv_column(input_file, 'input')) == ['0x', 'multi\nline, "quoted"', '0x']
+
+
+def test_read_csv_column_missing_column():
+    with pytest.raises(ValueError):
+        list(read_csv_column(io.StringIO('hash\n0x01\n'), 'block_number'))
+
+
+@pytest.mark.parametrize('max_memory_bytes', [1024 * 1024, 1, 300])
+def test_unique_values_writer(tmpdir, max_memory_bytes):
+    values = [ADDRESS_1, '5', ADDRESS_2, ADDRESS_1, HASH_1, '', '5', ADDRESS_2, '7', ''] * 3
+
+    output_file = io.StringIO()
+    writer = UniqueValuesWriter(output_file, max_memory_bytes, spill_dir=str(tmpdir))
+    writer.write_all(values)
+    writer.close()
+
+    lines = output_file.getvalue().split('\n')[:-1]
+    assert sorted(lines) == sorted(set(values))
+    assert tmpdir.listdir() == []